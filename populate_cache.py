@@ -1,16 +1,20 @@
 import sys
 sys.path.insert(0, './src/admin/biomodels-cache-admin')  # Ensure local package is importable
 
-from biomodels_cache_admin import CacheManager
+from biomodels_cache_admin import BioModelsAPI, CatalogCrawler
 
 def progress_callback(current, total):
     print(f"Progress: {current}/{total} models processed", end='\r')
 
 def main():
-    cache_manager = CacheManager(cache_dir="./cache")
+    api = BioModelsAPI(cache_dir="./cache")
+    crawler = CatalogCrawler(api)
     print("Updating cache with real BioModels data...")
-    cache_manager.update_cache(progress_callback)
-    print("\nCache update complete!")
+    summary = crawler.crawl(progress_callback)
+    print(f"\nCache update complete! Fetched {summary['fetched']} new models, "
+          f"skipped {summary['skipped']} cached models.")
+    if summary["failed"]:
+        print(f"Failed to fetch {len(summary['failed'])} models; run again to retry them.")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,239 @@
+"""
+Benchmark CacheManager load, lookup, search and save on synthetic corpora.
+
+Each corpus size is measured in a fresh worker process, so the cold load
+and the peak resident set size are those of that size alone. Results are
+written as JSON and can be compared with a stored baseline; every metric
+is a time or a size, so lower is better.
+
+Usage (with the package installed, e.g. pip install -e .):
+    python benchmarks/bench_cache.py [--sizes 1000,10000,100000] [--backend json]
+        [--output results.json] [--baseline benchmarks/baseline.json] [--tolerance 0.25]
+
+benchmarks/baseline.json holds reference results of the json backend at the
+default sizes; regenerate it with --output benchmarks/baseline.json.
+
+Exits with status 1 if a metric is more than the tolerance worse than the
+baseline.
+"""
+import os
+import sys
+import json
+import random
+import argparse
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+from statistics import median
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+from corpus import VOCABULARY, generate_corpus
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+# Measured values of each corpus size, in report order
+METRICS = [
+    ("load_ms", "Cold load", "ms"),
+    ("get_model_p50_us", "get_model p50", "us"),
+    ("get_model_p95_us", "get_model p95", "us"),
+    ("search_p50_ms", "search_models p50", "ms"),
+    ("search_p95_ms", "search_models p95", "ms"),
+    ("search_filtered_p50_ms", "filtered search p50", "ms"),
+    ("search_filtered_p95_ms", "filtered search p95", "ms"),
+    ("save_ms", "_save_cache", "ms"),
+    ("peak_rss_mib", "Peak RSS", "MiB"),
+]
+FILTERS = {
+    "journals": ["PLoS Comput Biol", "J Theor Biol", "Nature"],
+    "dateRange": {"start": "2005-01-01", "end": "2015-12-31"},
+}
+LOOKUPS = 2000
+QUERIES = 20
+REPEATS = 3
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Return the sample at a fraction of the sorted samples."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def latencies(run: Callable[[Any], Any], args: List[Any]) -> List[float]:
+    """Return the seconds taken by run for each argument."""
+    samples = []
+    for arg in args:
+        start = time.perf_counter()
+        run(arg)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def peak_rss_mib() -> Optional[float]:
+    """Return the peak resident set size of this process, if known."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def prepare(cache_dir: str, size: int, seed: int, backend: str) -> int:
+    """Write a corpus in the layout of a backend; return the models' file size."""
+    from biomodels_cache_admin.cache import CacheManager
+
+    models = generate_corpus(size, seed)
+    cache_file = os.path.join(cache_dir, "biomodels_cache.json")
+    with open(cache_file, "w") as f:
+        json.dump(models, f, indent=2)
+    if backend == "snapshot":
+        CacheManager(cache_dir).export_snapshot()
+        os.remove(cache_file)
+    elif backend != "json":
+        os.remove(cache_file)
+        CacheManager(cache_dir, backend=backend).update_cache(list(models.values()))
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(cache_dir)
+        for name in names
+    )
+
+
+def measure(cache_dir: str, size: int, seed: int, backend: str) -> Dict[str, Any]:
+    """Measure a prepared cache; run in a fresh process."""
+    from biomodels_cache_admin.cache import CacheManager
+
+    rng = random.Random(seed)
+    load_times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        # Without memoization, so every search does its work
+        cache_manager = CacheManager(cache_dir, backend=backend, search_cache_size=0)
+        load_times.append(time.perf_counter() - start)
+
+    # Numeric IDs, which get_model expands to BIOMD IDs: mostly hits, and
+    # misses for the MODEL IDs and the numbers past the corpus
+    model_ids = [str(rng.randint(1, size * 11 // 10)) for _ in range(LOOKUPS)]
+    lookups = latencies(cache_manager.get_model, model_ids)
+    queries = rng.sample(VOCABULARY, QUERIES)
+    # Build the lazy filter indexes before timing, as a long-running process would have
+    cache_manager.search_models("", FILTERS)
+    searches = latencies(cache_manager.search_models, queries)
+    filtered = latencies(lambda query: cache_manager.search_models(query, FILTERS), queries)
+    save_times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        cache_manager._save_cache()
+        save_times.append(time.perf_counter() - start)
+
+    return {
+        "models": len(cache_manager.cache),
+        "load_ms": min(load_times) * 1e3,
+        "get_model_p50_us": percentile(lookups, 0.5) * 1e6,
+        "get_model_p95_us": percentile(lookups, 0.95) * 1e6,
+        "search_p50_ms": percentile(searches, 0.5) * 1e3,
+        "search_p95_ms": percentile(searches, 0.95) * 1e3,
+        "search_filtered_p50_ms": percentile(filtered, 0.5) * 1e3,
+        "search_filtered_p95_ms": percentile(filtered, 0.95) * 1e3,
+        "save_ms": median(save_times) * 1e3,
+        "peak_rss_mib": peak_rss_mib(),
+    }
+
+
+def run_size(size: int, seed: int, backend: str) -> Dict[str, Any]:
+    """Prepare a corpus, then measure it in a worker process."""
+    cache_dir = tempfile.mkdtemp()
+    try:
+        file_bytes = prepare(cache_dir, size, seed, backend)
+        output = subprocess.run(
+            [sys.executable, __file__, "--worker", cache_dir,
+             "--sizes", str(size), "--seed", str(seed), "--backend", backend],
+            check=True, stdout=subprocess.PIPE).stdout
+        return dict(json.loads(output), file_bytes=file_bytes)
+    finally:
+        shutil.rmtree(cache_dir)
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Print each metric against the baseline.
+
+    Returns:
+        Descriptions of the metrics more than tolerance worse than the baseline
+    """
+    regressions = []
+    for size, measured in results["results"].items():
+        before = baseline["results"].get(size)
+        if before is None:
+            continue
+        print(f"\n{int(size):,} models       {'baseline':>12}  {'current':>12}  {'change':>8}")
+        for key, label, unit in METRICS:
+            old, new = before.get(key), measured.get(key)
+            if not old or new is None:
+                continue
+            change = new / old - 1
+            flag = "  REGRESSION" if change > tolerance else ""
+            print(f"{label + ':':<21}{old:10.2f} {unit:<3}{new:10.2f} {unit:<3}{100 * change:+7.1f} %{flag}")
+            if flag:
+                regressions.append(f"{label} at {int(size):,} models: {100 * change:+.1f} %")
+    return regressions
+
+
+def main():
+    """Measure each corpus size, then report and optionally compare the results."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Comma-separated corpus sizes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backend", default="json", choices=["json", "sharded", "sqlite", "snapshot"])
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare with the results in this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Relative slowdown reported as a regression (default 0.25)")
+    parser.add_argument("--worker", metavar="CACHE_DIR", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    if args.worker:
+        json.dump(measure(args.worker, sizes[0], args.seed, args.backend), sys.stdout)
+        return 0
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": args.backend,
+            "seed": args.seed,
+        },
+        "results": {},
+    }
+    for size in sizes:
+        measured = run_size(size, args.seed, args.backend)
+        results["results"][str(size)] = measured
+        print(f"\n{size:,} models ({measured['file_bytes'] / 1024 / 1024:.1f} MiB on disk, {args.backend})")
+        for key, label, unit in METRICS:
+            if measured[key] is not None:
+                print(f"{label + ':':<21}{measured[key]:10.2f} {unit}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions beyond {:.0f} %:".format(100 * args.tolerance))
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""
+Benchmark loading and saving the cache file with each installed JSON codec.
+
+Compares the indented stdlib encoding the cache file used to have with the
+compact, one-record-per-line layout of each codec in biomodels_cache_admin.codec.
+
+Usage (with the package installed, e.g. pip install -e .):
+    python benchmarks/bench_codec.py [path/to/biomodels_cache.json] [repeats]
+"""
+import os
+import sys
+import io
+import json
+import time
+from biomodels_cache_admin.codec import available_codecs, get_codec
+
+DEFAULT_CACHE_FILE = os.path.join(
+    os.path.dirname(__file__), "..", "..", "..", "..", "cache", "biomodels_cache.json")
+
+
+def best_time(run, repeats):
+    """Return the fastest of several runs of a call, in seconds."""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    """Encode and decode the cache each way and report time and size."""
+    path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CACHE_FILE
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    with open(path, "rb") as f:
+        models = json.loads(f.read())
+
+    # The previous format: json.dump with indent=2 to a text file
+    indented = json.dumps(models, indent=2).encode("utf-8")
+    rows = [(
+        "json, indent=2",
+        best_time(lambda: json.loads(indented), repeats),
+        best_time(lambda: json.dumps(models, indent=2).encode("utf-8"), repeats),
+        len(indented),
+    )]
+    for name in available_codecs():
+        codec = get_codec(name)
+
+        def save():
+            f = io.BytesIO()
+            codec.dump_models(models, f)
+            return f.getvalue()
+
+        data = save()
+        assert codec.loads(data) == models
+        rows.append((f"{name}, compact", best_time(lambda: codec.loads(data), repeats),
+                     best_time(save, repeats), len(data)))
+
+    _, base_load, base_save, base_size = rows[0]
+    print(f"Models:             {len(models)}")
+    print(f"{'':20}{'load':>9}  {'save':>9}  {'size':>10}")
+    for label, load, save, size in rows:
+        print(f"{label + ':':<20}{load * 1000:6.1f} ms  {save * 1000:6.1f} ms  {size / 1024:6.0f} KiB"
+              f"   ({base_load / load:4.1f}x, {base_save / save:4.1f}x, {100 * (1 - size / base_size):4.1f} % smaller)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark the memory used by cached records as dicts and as CompactRecords.
+
+Usage (with the package installed, e.g. pip install -e .):
+    python benchmarks/bench_records.py [path/to/biomodels_cache.json]
+"""
+import os
+import sys
+import json
+import gc
+import tracemalloc
+from biomodels_cache_admin.records import CompactRecord
+
+TEXT_FIELDS = ("name", "title", "synopsis", "citation", "url")
+DEFAULT_CACHE_FILE = os.path.join(
+    os.path.dirname(__file__), "..", "..", "..", "..", "cache", "biomodels_cache.json")
+
+
+def measure(build):
+    """Return (result, bytes allocated) for building a structure."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def main():
+    """Load the cache both ways and report the memory each takes."""
+    path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CACHE_FILE
+    with open(path, "rb") as f:
+        raw = f.read()
+
+    def load_dicts():
+        models = json.loads(raw)
+        # Records as normalize_model returns them, with "id" next to "model_id"
+        for model in models.values():
+            model.setdefault("id", model.get("model_id"))
+        return models
+
+    def load_compact():
+        return {model_id: CompactRecord(model) for model_id, model in load_dicts().items()}
+
+    # Interning authors and journals grows the interpreter's interned string
+    # table, which is shared with everything else in the process. Build the
+    # records once to measure that growth, and keep them while measuring
+    # again so the second build interns nothing new; the interned strings,
+    # now shared with the first build, are added back
+    warm_up, cold_bytes = measure(load_compact)
+    interned = {
+        id(value): value
+        for model in warm_up.values()
+        for value in [model.get("journal")] + list(model.get("authors") or ())
+        if isinstance(value, str)
+    }
+    interned_bytes = sum(sys.getsizeof(value) for value in interned.values())
+
+    dicts, dict_bytes = measure(load_dicts)
+    compact, compact_bytes = measure(load_compact)
+    compact_bytes += interned_bytes
+    assert compact == dicts
+
+    # Free text is stored once either way, so also report the memory used
+    # by everything else
+    text_bytes = sum(
+        sys.getsizeof(model[field])
+        for model in dicts.values()
+        for field in TEXT_FIELDS
+        if isinstance(model.get(field), str)
+    )
+
+    print(f"Models:             {len(dicts)}")
+    print(f"                    {'total':>10}  {'excl. text':>10}")
+    print(f"dict records:       {dict_bytes / 1024:7.1f} KiB  {(dict_bytes - text_bytes) / 1024:7.1f} KiB")
+    print(f"CompactRecord:      {compact_bytes / 1024:7.1f} KiB  {(compact_bytes - text_bytes) / 1024:7.1f} KiB")
+    print(f"Reduction:          {100 * (1 - compact_bytes / dict_bytes):9.1f} %  "
+          f"{100 * (1 - (compact_bytes - text_bytes) / (dict_bytes - text_bytes)):9.1f} %")
+    print(f"Intern table growth:{max(0, cold_bytes - compact_bytes) / 1024:7.1f} KiB  (not counted above)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark search_many against calling search_models in a loop.
+
+Runs on the synthetic corpora of bench_cache.py, or on a cache file.
+Queries are vocabulary words, like the gene and pathway terms of a
+nightly matching job: common words of the synthetic synopses, or
+distinct words of the cache file's synopses.
+
+Usage (with the package installed, e.g. pip install -e .):
+    python benchmarks/bench_search_many.py [--sizes 1000,10000,100000] [--queries 200]
+    python benchmarks/bench_search_many.py --cache-file path/to/biomodels_cache.json [--queries 2000]
+"""
+import os
+import sys
+import json
+import random
+import argparse
+import shutil
+import tempfile
+import time
+from biomodels_cache_admin.cache import CacheManager
+
+from corpus import VOCABULARY, generate_corpus
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+FILTERS = [None, {"journals": ["Nature", "PLoS Comput Biol", "J Theor Biol"]}]
+
+
+def timed(run):
+    """Return (result, seconds taken) for a call."""
+    start = time.perf_counter()
+    result = run()
+    return result, time.perf_counter() - start
+
+
+def compare(cache_dir: str, queries: list) -> None:
+    """Run the same queries both ways on a cache directory and report the throughput of each."""
+    # Without memoization, so the loop does the work of distinct queries
+    cache_manager = CacheManager(cache_dir, search_cache_size=0)
+    _, build = timed(lambda: cache_manager.search_many([]))
+    print(f"\n{len(cache_manager.cache):,} models, {len(queries)} queries")
+    print(f"Batch index build:  {build * 1000:9.1f} ms")
+    for filters in FILTERS:
+        loop, loop_time = timed(lambda: {
+            query: [model["model_id"] for model in cache_manager.search_models(query, filters)]
+            for query in queries})
+        many, many_time = timed(lambda: cache_manager.search_many(queries, filters))
+        assert many == loop
+        print(f"Filters:            {filters}")
+        print(f"  search_models:    {len(queries) / loop_time:9.0f} queries/s")
+        print(f"  search_many:      {len(queries) / many_time:9.0f} queries/s")
+        print(f"  Speedup:          {loop_time / many_time:9.1f} x")
+
+
+def main():
+    """Compare both ways of searching on each corpus."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Comma-separated synthetic corpus sizes")
+    parser.add_argument("--cache-file", help="Benchmark this cache file instead of synthetic corpora")
+    parser.add_argument("--queries", type=int, help="Number of queries (default 200, or 2000 on a cache file)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    cache_dir = tempfile.mkdtemp()
+    try:
+        cache_file = os.path.join(cache_dir, "biomodels_cache.json")
+        if args.cache_file:
+            shutil.copy(args.cache_file, cache_file)
+            with open(cache_file, "r") as f:
+                words = sorted({word.lower() for model in json.load(f).values()
+                                for word in model["synopsis"].split()})
+            compare(cache_dir, rng.sample(words, min(args.queries or 2000, len(words))))
+            return 0
+        # Vocabulary words, and their plurals, which match fewer models
+        words = sorted(set(VOCABULARY))
+        words += [word + "s" for word in words]
+        queries = rng.sample(words, min(args.queries or 200, len(words)))
+        for size in (int(size) for size in args.sizes.split(",")):
+            with open(cache_file, "w") as f:
+                json.dump(generate_corpus(size, args.seed), f)
+            compare(cache_dir, queries)
+    finally:
+        shutil.rmtree(cache_dir)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Deterministic synthetic BioModels corpus for benchmarks.
+
+Records have the fields of normalized models (see api.normalize_model):
+names and titles built from a biology vocabulary, one to eight authors
+drawn with a skew toward prolific authors, synopses of 80 to 400 words,
+ISO dates from 1990 to 2024 and a weighted choice of real journals.
+The same count and seed always give the same corpus.
+
+Usage:
+    python benchmarks/corpus.py COUNT OUTPUT.json [--seed N]
+"""
+import sys
+import json
+import random
+import argparse
+from typing import Any, Dict
+
+VOCABULARY = """
+cell cycle mitotic oscillator kinase phosphatase receptor ligand binding
+signalling pathway cascade feedback loop negative positive bistable switch
+circadian clock period gene expression transcription translation protein
+degradation ubiquitin proteasome calcium oscillations membrane potential
+neuron synaptic plasticity action potential channel sodium potassium
+glycolysis metabolism enzyme kinetics michaelis menten flux balance
+yeast saccharomyces escherichia coli mammalian human mouse drosophila
+insulin glucose homeostasis liver pancreas beta secretion apoptosis caspase
+mitochondria cytochrome release p53 mdm2 nf-kb tnf inflammation cytokine
+interleukin t-cell immune response virus infection hiv replication
+tumour growth angiogenesis chemotherapy drug pharmacokinetics dose
+model simulation ordinary differential equations stochastic deterministic
+parameter estimation sensitivity analysis steady state dynamics robustness
+wnt notch hedgehog tgf-beta mapk erk jak stat egfr ras raf mek pi3k akt mtor
+""".split()
+
+FIRST_NAMES = """
+Anna Ben Carla David Elena Frank Grace Hiro Ines Jan Kira Luca Maria Nils
+Olga Pedro Qin Rosa Sven Tara Umar Vera Wei Xena Yusuf Zoe
+""".split()
+
+LAST_NAMES = """
+Smith Novak Tanaka Garcia Muller Rossi Kim Chen Ivanova Okafor Silva Jensen
+Kowalski Dubois Haddad Nakamura Schmidt Larsen Moreau Petrov Singh Walker
+Bianchi Costa Fischer Li Wang Zhang Sato Lopez
+""".split()
+
+# Journals with relative weights, roughly as skewed as the real catalog
+JOURNALS = [
+    ("PLoS Comput Biol", 12), ("J Theor Biol", 10), ("Biophys J", 8), ("Nature", 4),
+    ("Proc Natl Acad Sci U S A", 9), ("Mol Syst Biol", 7), ("J Biol Chem", 6),
+    ("Bioinformatics", 4), ("BMC Syst Biol", 6), ("Math Biosci", 5), ("Cell", 3),
+    ("Science", 2), ("Bull Math Biol", 4), ("FEBS J", 3), ("Eur J Biochem", 3),
+    ("Biochem J", 3), ("Sci Rep", 4), ("Front Physiol", 3), ("Cell Syst", 2),
+    ("IET Syst Biol", 2),
+]
+
+
+def _words(rng: random.Random, low: int, high: int) -> str:
+    return " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(low, high)))
+
+
+def generate_corpus(count: int, seed: int = 0) -> Dict[str, Dict[str, Any]]:
+    """
+    Generate a synthetic corpus of normalized model records.
+
+    Args:
+        count: Number of models
+        seed: Random seed
+
+    Returns:
+        Mapping of model ID to model, in model ID order like the cache file
+    """
+    rng = random.Random(seed)
+    # A pool of authors, of whom the first ones write most models
+    authors = [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(max(50, count // 4))]
+    author_weights = [1.0 / (rank + 1) for rank in range(len(authors))]
+    journal_names = [name for name, _ in JOURNALS]
+    journal_weights = [weight for _, weight in JOURNALS]
+
+    models = {}
+    for number in range(1, count + 1):
+        prefix = "MODEL" if number % 10 == 0 else "BIOMD"
+        model_id = f"{prefix}{number:010d}"
+        title = _words(rng, 6, 14).capitalize()
+        models[model_id] = {
+            "name": _words(rng, 2, 6).title(),
+            "authors": rng.choices(authors, weights=author_weights, k=rng.randint(1, 8)),
+            "url": f"https://identifiers.org/pubmed/{rng.randint(1000000, 39999999)}",
+            "id": model_id,
+            "model_id": model_id,
+            "title": title,
+            "synopsis": _words(rng, 80, 400).capitalize() + ".",
+            "citation": None if rng.random() < 0.3 else f"{title}. {rng.randint(1, 500)}:{rng.randint(1, 9999)}",
+            "date": f"{rng.randint(1990, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "journal": rng.choices(journal_names, weights=journal_weights)[0],
+        }
+    return dict(sorted(models.items()))
+
+
+def main():
+    """Write a corpus to a JSON file in the cache file format."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("count", type=int)
+    parser.add_argument("output")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    with open(args.output, "w") as f:
+        json.dump(generate_corpus(args.count, args.seed), f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
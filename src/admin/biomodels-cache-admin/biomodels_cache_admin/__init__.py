@@ -4,6 +4,8 @@ BioModels Cache Admin package for managing BioModels database cache.
 
 from .cache import CacheManager
 from .api import BioModelsAPI
+from .crawler import CatalogCrawler
+from .filestore import FileStore
 
 __version__ = "0.1.0"
-__all__ = ['CacheManager', 'BioModelsAPI'] 
\ No newline at end of file
+__all__ = ['CacheManager', 'BioModelsAPI', 'CatalogCrawler', 'FileStore'] 
\ No newline at end of file
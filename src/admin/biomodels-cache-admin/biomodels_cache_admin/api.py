@@ -2,10 +2,25 @@
 BioModels API client for fetching model data.
 """
 import requests  # type: ignore
+from requests.adapters import HTTPAdapter  # type: ignore
 import os
 import json
-from typing import Dict, List, Any, Optional
+import hashlib
+import logging
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, Any, Optional, Tuple, Union
 from .cache import CacheManager
+from .codec import JSONCodec
+from .download import CHUNK_SIZE, DownloadManifest, sha256_file
+from .filestore import FileStore
+from .freshness import FreshnessStore, content_hash
+from .metrics import Metrics
+from .ndjson import iter_ndjson, write_ndjson
+from .negative import ERROR, NegativeCache
+from .ratelimit import RateLimiter, map_concurrent
+from .sync import SingleFlight
+
+logger = logging.getLogger(__name__)
 
 
 def normalize_model(model: Dict[str, Any], requested_id: Optional[str] = None) -> Dict[str, Any]:
@@ -67,19 +82,86 @@ def normalize_model(model: Dict[str, Any], requested_id: Optional[str] = None) -
 class BioModelsAPI:
     """Client for interacting with the BioModels API."""
 
-    def __init__(self, cache_dir: str = "cache"):
-        """Initialize the API client."""
+    def __init__(
+        self,
+        cache_dir: str = "cache",
+        max_workers: int = 8,
+        rate_limit: Optional[float] = None,
+        pool_size: Optional[int] = None,
+        file_store: Optional[FileStore] = None,
+        negative_ttl: float = 3600.0,
+        error_ttl: float = 0.0,
+        metrics: Optional[Metrics] = None,
+        json_codec: Optional[Union[str, JSONCodec]] = None
+    ):
+        """
+        Initialize the API client.
+
+        Args:
+            cache_dir: Directory to store cache files
+            max_workers: Default number of threads used by batch methods
+            rate_limit: Optional maximum number of requests per second
+            pool_size: Connections kept open per host, defaults to max_workers
+            file_store: Optional compressed store that download_model saves
+                to when it is not given a file path
+            negative_ttl: Seconds to remember that a model was not found,
+                so it is not requested again; 0 disables
+            error_ttl: Seconds to remember that a request for a model
+                failed, re-raising the failure without a request; 0 disables
+            metrics: Registry to record upstream requests, bytes downloaded
+                and the cache manager's metrics in; defaults to a new one
+            json_codec: JSON codec of the cache and export files (see
+                CacheManager)
+        """
         self.base_url = "https://www.ebi.ac.uk/biomodels"
         self.headers = {
             "Accept": "application/json",
             "Content-Type": "application/json"
         }
-        self.cache_manager = CacheManager(cache_dir)
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.cache_manager = CacheManager(cache_dir, metrics=self.metrics, json_codec=json_codec)
+        self.freshness = FreshnessStore(cache_dir)
+        self.negative_cache = NegativeCache(
+            cache_dir, ttl=negative_ttl, error_ttl=error_ttl, metrics=self.metrics)
+        self.downloads = DownloadManifest(cache_dir)
+        self.file_store = file_store
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(rate_limit) if rate_limit else None
+        # Concurrent cache misses for one model share a single request
+        self._fetches = SingleFlight()
+
+        # One session shares pooled keep-alive connections across calls and threads
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size or max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _get(self, url: str, endpoint: str = "model", **kwargs) -> requests.Response:
+        """
+        Send a rate-limited GET request over the shared session.
+
+        The request is counted and timed under the endpoint label, and the
+        size of the body is counted unless the response is streamed.
+        """
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+        try:
+            with self.metrics.timer("upstream_request_seconds", endpoint=endpoint):
+                response = self.session.get(url, headers=kwargs.pop("headers", self.headers), **kwargs)
+        except requests.exceptions.RequestException:
+            self.metrics.inc("upstream_requests_total", endpoint=endpoint, status="error")
+            raise
+        self.metrics.inc("upstream_requests_total", endpoint=endpoint, status=response.status_code)
+        if not kwargs.get("stream"):
+            self.metrics.inc("downloaded_bytes_total", len(response.content), endpoint=endpoint)
+        return response
 
     def get_model(self, model_id: str) -> Optional[Dict[str, Any]]:
         """
         Get detailed information for a specific model.
         If the model is not in cache, it will be fetched and saved to cache.
+        Threads that miss the same model at once wait for one shared
+        request; cache lookups for other models are never held up by it.
 
         Args:
             model_id: Model ID (e.g., 'BIOMD0000000001')
@@ -94,61 +176,394 @@ class BioModelsAPI:
         # Check cache first
         cached_model = self.cache_manager.get_model(model_id)
         if cached_model:
-            print(f"Model {model_id} found in cache")
+            logger.debug("Model %s found in cache", model_id, extra={"model_id": model_id})
             return cached_model
 
         # Model not in cache, fetch from API
+        return self._fetches.do(model_id, lambda: self._fetch_into_cache(model_id))
+
+    def _fetch_into_cache(self, model_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch a model and save it to the cache; run once per concurrent miss."""
+        # Another request may have filled the cache since the lookup; not
+        # counted as a second cache miss
+        cached_model = self.cache_manager._get_model(model_id)
+        if cached_model:
+            return cached_model
+
+        normalized = self.fetch_model(model_id)
+        if normalized is None:
+            return None
+
+        # Save normalized to cache using normalized model_id as key
+        self.cache_manager.save_model(normalized["model_id"], normalized)
+        logger.debug("Model %s saved to cache", model_id, extra={"model_id": model_id})
+        return normalized
+
+    def fetch_model(self, model_id: str, use_negative_cache: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Fetch and normalize a model from the API without touching the cache.
+
+        Models recently found missing, or whose request recently failed,
+        are answered from the negative cache without a request. Changes to
+        the negative cache are saved at most every save_interval seconds;
+        batch methods and close save the rest.
+
+        Args:
+            model_id: Full model ID (e.g., 'BIOMD0000000001')
+            use_negative_cache: Answer from the negative cache if it has an
+                entry; the outcome of the request is recorded either way
+
+        Returns:
+            Normalized model metadata if found, None otherwise
+
+        Raises:
+            requests.exceptions.RequestException: If the request fails, or
+                failed within error_ttl seconds
+        """
+        negative = self.negative_cache.get(model_id) if use_negative_cache else None
+        if negative is not None:
+            if negative["reason"] == ERROR:
+                raise requests.exceptions.RequestException(
+                    f"Request for {model_id} failed recently: {negative['error']}")
+            return None
+
         url = f"{self.base_url}/{model_id}"
-        print(f"Requesting model from: {url}")
+        logger.debug("Requesting model from: %s", url, extra={"model_id": model_id, "url": url})
 
         try:
-            response = requests.get(url, headers=self.headers)
+            response = self._get(url)
             response.raise_for_status()
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 404:
+                if self.negative_cache.add_missing(model_id):
+                    self.negative_cache.flush()
                 return None
+            if self.negative_cache.add_error(model_id, e):
+                self.negative_cache.flush()
             raise e
         except requests.exceptions.RequestException as e:
+            if self.negative_cache.add_error(model_id, e):
+                self.negative_cache.flush()
             raise e
 
+        if self.negative_cache.discard(model_id):
+            self.negative_cache.flush()
+
         try:
             model = response.json()
-            normalized = normalize_model(model, requested_id=model_id)
-            # Save normalized to cache using normalized model_id as key
-            self.cache_manager.cache[normalized["model_id"]] = normalized
-            self.cache_manager._save_cache()
-            print(f"Model {model_id} saved to cache")
-            return normalized
+            return normalize_model(model, requested_id=model_id)
         except Exception as e:
-            print(f"Error parsing JSON: {str(e)}")
+            logger.warning("Error parsing JSON of model %s: %s", model_id, e, extra={"model_id": model_id})
             return None
 
-    def download_model(self, model_id: str, filepath: str) -> bool:
+    def download_model(
+        self,
+        model_id: str,
+        filepath: Optional[str] = None,
+        expected_sha256: Optional[str] = None,
+        verify: bool = True,
+        save_manifest: bool = True
+    ) -> bool:
         """
         Download a model file.
 
+        The response is streamed in chunks to <filepath>.part and renamed into
+        place once complete, so memory use does not grow with file size. An
+        interrupted download is resumed with an HTTP Range request, unless
+        the file changed upstream in the meantime. The SHA-256 of every
+        download is recorded in the download manifest with the file's ETag
+        and Last-Modified. A file whose hash matches the manifest is
+        revalidated with a conditional request and not downloaded again
+        unless it changed upstream; a download with the recorded ETag or
+        Last-Modified must have the recorded hash.
+
         Args:
             model_id: Model ID (e.g., 'BIOMD0000000001')
-            filepath: Path to save the model file
+            filepath: Path to save the model file; if omitted the file is
+                saved compressed in the client's file store
+            expected_sha256: Hash the file must have; an existing file with
+                this hash is not downloaded again
+            verify: Reject downloads that don't match the expected hash or,
+                for an unchanged upstream file, the manifest hash
+            save_manifest: Write the manifest to disk after the download
 
         Returns:
             True if download successful, False otherwise
         """
         try:
-            download_url = f"{self.base_url}/model/download/{model_id}"
-            print(f"Downloading model from: {download_url}")
-
-            response = requests.get(download_url, headers=self.headers)
-            response.raise_for_status()
+            record = self.downloads.get(model_id) or {}
+            # Hash of the file version with the recorded ETag and Last-Modified
+            known_sha256 = record.get("sha256")
+
+            if filepath is None:
+                if self.file_store is None:
+                    raise ValueError("filepath is required when there is no file store")
+                stored = self.file_store.get(model_id)
+                current_sha256 = stored["sha256"] if stored else None
+                part_path = os.path.join(self.file_store.tmp_dir, f"{model_id}.part")
+            else:
+                current_sha256 = None
+                if (expected_sha256 or known_sha256) and os.path.exists(filepath):
+                    current_sha256 = sha256_file(filepath)
+                part_path = f"{filepath}.part"
+            if expected_sha256 and current_sha256 == expected_sha256:
+                logger.debug("Model %s already downloaded", model_id, extra={"model_id": model_id})
+                return True
 
-            with open(filepath, "wb") as f:
-                f.write(response.content)
+            download_url = f"{self.base_url}/model/download/{model_id}"
+            logger.debug(
+                "Downloading model from: %s", download_url, extra={"model_id": model_id, "url": download_url})
+
+            offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            headers = dict(self.headers)
+            partial = record.get("partial") or {}
+            validator = partial.get("etag") or partial.get("last_modified")
+            if offset and validator:
+                # Resume only if the file is unchanged, otherwise get all of it
+                headers["Range"] = f"bytes={offset}-"
+                headers["If-Range"] = validator
+            else:
+                offset = 0
+            if current_sha256 and current_sha256 == known_sha256:
+                # Only download the file again if it changed upstream
+                if record.get("etag"):
+                    headers["If-None-Match"] = record["etag"]
+                if record.get("last_modified"):
+                    headers["If-Modified-Since"] = record["last_modified"]
+
+            hasher = hashlib.sha256()
+            with self._get(download_url, endpoint="download", headers=headers, stream=True) as response:
+                if response.status_code == 416:
+                    # The partial file is no longer a prefix of the file, start over
+                    os.remove(part_path)
+                    return self.download_model(
+                        model_id, filepath, expected_sha256, verify, save_manifest)
+                if response.status_code == 304:
+                    logger.debug("Model %s unchanged upstream", model_id, extra={"model_id": model_id})
+                    return True
+                response.raise_for_status()
+                if response.status_code != 206:
+                    offset = 0
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+                if offset:
+                    with open(part_path, "rb") as f:
+                        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                            hasher.update(chunk)
+                else:
+                    # Record what is being downloaded so a restart can resume it
+                    self.downloads.update(
+                        model_id, partial={"etag": etag, "last_modified": last_modified})
+                    self.downloads.save()
+
+                with open(part_path, "ab" if offset else "wb") as f:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        f.write(chunk)
+                        hasher.update(chunk)
+                        self.metrics.inc("downloaded_bytes_total", len(chunk), endpoint="download")
+
+            digest = hasher.hexdigest()
+            if etag is not None:
+                unchanged = etag == record.get("etag")
+            else:
+                unchanged = last_modified is not None and last_modified == record.get("last_modified")
+            if expected_sha256 is None and unchanged:
+                expected_sha256 = known_sha256
+            if verify and expected_sha256 and digest != expected_sha256:
+                os.remove(part_path)
+                raise ValueError(f"SHA-256 mismatch: expected {expected_sha256}, got {digest}")
+
+            size = os.path.getsize(part_path)
+            if filepath is None:
+                self.file_store.put_file(model_id, part_path, remove=True, save=save_manifest)
+            else:
+                os.replace(part_path, filepath)
+            self.downloads.update(
+                model_id,
+                sha256=digest,
+                size=size,
+                etag=etag,
+                last_modified=last_modified,
+                partial=None,
+            )
+            if save_manifest:
+                self.downloads.save()
             return True
 
         except Exception as e:
-            print(f"Error downloading model {model_id}: {str(e)}")
+            logger.warning(
+                "Error downloading model %s: %s", model_id, e, extra={"model_id": model_id})
             return False
 
+    def get_models(
+        self,
+        model_ids: Iterable[str],
+        max_workers: Optional[int] = None,
+        return_exceptions: bool = False
+    ) -> Iterator[Tuple[str, Any]]:
+        """
+        Get many models concurrently, fetching and caching any that are missing.
+
+        Args:
+            model_ids: Model IDs (full or numeric)
+            max_workers: Number of threads, defaults to the client's max_workers
+            return_exceptions: Yield request errors in place of models instead
+                of raising them
+
+        Yields:
+            Tuples of (model_id, model) in completion order, where model is
+            None if the model doesn't exist
+        """
+        try:
+            yield from map_concurrent(
+                self.get_model, model_ids, max_workers or self.max_workers, return_exceptions)
+        finally:
+            self.negative_cache.flush(force=True)
+
+    def refresh_model(self, model_id: str, listed: Any = None) -> str:
+        """
+        Re-fetch a model only if it changed upstream.
+
+        A conditional request (If-None-Match / If-Modified-Since) is sent
+        using the validators from the last refresh. If the server returns the
+        model anyway, it is only saved when its normalized content differs
+        from the cached copy. Does not save the freshness store.
+
+        Args:
+            model_id: Full model ID (e.g., 'BIOMD0000000001')
+            listed: Optional modification timestamp of the model in the
+                search listing; if it matches the one stored by the last
+                refresh, no request is sent at all
+
+        Returns:
+            "unchanged", "updated" (including newly cached models), or
+            "missing" if the model no longer exists upstream
+
+        Raises:
+            requests.exceptions.RequestException: If the request fails
+        """
+        fresh = self.freshness.get(model_id) or {}
+        cached = self.cache_manager._get_model(model_id)
+        if cached is not None and listed is not None and fresh.get("listed") == listed:
+            return "unchanged"
+        now = datetime.now(timezone.utc).isoformat()
+
+        headers = dict(self.headers)
+        if cached is not None:
+            if fresh.get("etag"):
+                headers["If-None-Match"] = fresh["etag"]
+            if fresh.get("last_modified"):
+                headers["If-Modified-Since"] = fresh["last_modified"]
+
+        response = self._get(f"{self.base_url}/{model_id}", headers=headers)
+        if response.status_code == 304:
+            self.freshness.set(model_id, dict(fresh, checked=now, listed=listed))
+            return "unchanged"
+        if response.status_code == 404:
+            return "missing"
+        response.raise_for_status()
+
+        normalized = normalize_model(response.json(), requested_id=model_id)
+        digest = content_hash(normalized)
+        if cached is not None and digest == (fresh.get("content_hash") or content_hash(cached)):
+            status = "unchanged"
+        else:
+            self.cache_manager.save_model(normalized["model_id"], normalized)
+            status = "updated"
+        self.freshness.set(model_id, {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "listed": listed,
+            "content_hash": digest,
+            "checked": now,
+        })
+        return status
+
+    def refresh_models(
+        self,
+        model_ids: Optional[Iterable[str]] = None,
+        listing: Optional[Dict[str, Any]] = None,
+        max_workers: Optional[int] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> Dict[str, List[str]]:
+        """
+        Refresh cached models, re-downloading only those that changed upstream.
+
+        Args:
+            model_ids: Model IDs to refresh, defaults to every listed model
+                or, without a listing, every cached model
+            listing: Optional mapping of model ID to listing modification
+                timestamp (see CatalogCrawler.refresh)
+            max_workers: Number of threads, defaults to the client's max_workers
+            progress_callback: Optional callback for progress updates
+
+        Returns:
+            Dictionary mapping "unchanged", "updated", "missing" and "failed"
+            to lists of model IDs
+        """
+        listing = listing or {}
+        if model_ids is None:
+            model_ids = list(listing) if listing else list(self.cache_manager.cache)
+        else:
+            model_ids = list(model_ids)
+
+        def refresh(model_id: str) -> str:
+            return self.refresh_model(model_id, listing.get(model_id))
+
+        summary: Dict[str, List[str]] = {"unchanged": [], "updated": [], "missing": [], "failed": []}
+        try:
+            for idx, (model_id, status) in enumerate(map_concurrent(
+                    refresh, model_ids, max_workers or self.max_workers, return_exceptions=True), 1):
+                if isinstance(status, Exception):
+                    logger.warning(
+                        "Error refreshing model %s: %s", model_id, status, extra={"model_id": model_id})
+                    status = "failed"
+                summary[status].append(model_id)
+                if progress_callback:
+                    progress_callback(idx, len(model_ids))
+        finally:
+            self.freshness.save()
+        return summary
+
+    def download_models(
+        self,
+        model_ids: Iterable[str],
+        directory: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        extension: str = ".xml",
+        verify: bool = True
+    ) -> Iterator[Tuple[str, bool]]:
+        """
+        Download many model files concurrently.
+
+        Args:
+            model_ids: Model IDs to download
+            directory: Directory to save the files in, as <model_id><extension>;
+                if omitted the files are saved in the client's file store
+            max_workers: Number of threads, defaults to the client's max_workers
+            extension: File name extension
+            verify: Reject downloads that don't match their manifest hash,
+                as in download_model
+
+        Yields:
+            Tuples of (model_id, success) in completion order
+        """
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+        def download(model_id: str) -> bool:
+            filepath = None
+            if directory is not None:
+                filepath = os.path.join(directory, f"{model_id}{extension}")
+            return self.download_model(model_id, filepath, verify=verify, save_manifest=False)
+
+        try:
+            yield from map_concurrent(download, model_ids, max_workers or self.max_workers)
+        finally:
+            self.downloads.save()
+            if self.file_store is not None:
+                self.file_store.save()
+
     def search_cached_models(self, search_term: str) -> List[Dict[str, Any]]:
         """
         Search through cached models by content (name, title, synopsis, etc.).
@@ -176,17 +591,17 @@ class BioModelsAPI:
             RuntimeError: If there's an error processing the models
         """
         try:
-            # Get all models
+            # Get all models, keeping the requested order
+            fetched = dict(self.get_models(model_ids))
             models_data = {}
             for model_id in model_ids:
-                model = self.get_model(model_id)
-                if model:
-                    models_data[model_id] = model
+                if fetched.get(model_id):
+                    models_data[model_id] = fetched[model_id]
 
-            # Write to JSON file
+            # Write to JSON file, indented for people to read
             try:
-                with open(filepath, 'w') as f:
-                    json.dump(models_data, f, indent=2)
+                with open(filepath, 'wb') as f:
+                    self.cache_manager.json_codec.dump(models_data, f, pretty=True)
             except (IOError, OSError) as e:
                 raise ValueError(f"Cannot write to file {filepath}: {str(e)}")
 
@@ -196,6 +611,65 @@ class BioModelsAPI:
         except Exception as e:
             raise RuntimeError(f"Error exporting models: {str(e)}")
 
+    def export_models_ndjson(
+        self,
+        filepath: str,
+        model_ids: Iterable[str],
+        codec: Optional[str] = None,
+        max_workers: Optional[int] = None
+    ) -> int:
+        """Export models to a newline-delimited JSON file, one model per line.
+
+        Missing models are fetched concurrently (see get_models) and each
+        model is written as soon as it is available, in completion order,
+        so memory use does not grow with the number of models. Models that
+        don't exist are left out. The file only appears once complete.
+
+        Args:
+            filepath: Path where the file will be saved; a .gz, .xz or .zst
+                extension compresses it
+            model_ids: Model IDs to export, which may be a generator
+            codec: Compression codec, overriding the extension
+            max_workers: Number of threads, defaults to the client's max_workers
+
+        Returns:
+            Number of models written
+
+        Raises:
+            requests.exceptions.RequestException: If fetching a model fails
+        """
+        models = (model for _, model in self.get_models(model_ids, max_workers) if model)
+        return write_ndjson(filepath, models, codec, self.cache_manager.json_codec)
+
+    def import_models_ndjson(
+        self,
+        filepath: str,
+        batch_size: int = 1000,
+        codec: Optional[str] = None
+    ) -> Dict[str, int]:
+        """Merge models from a newline-delimited JSON file into the cache.
+
+        Records are normalized and upserted in batches as the file is read
+        (see CacheManager.upsert_models), and the cache file is written
+        once at the end.
+
+        Args:
+            filepath: Path to the file; .gz, .xz and .zst files are decompressed
+            batch_size: Number of changed models stored per batch
+            codec: Compression codec, overriding the extension
+
+        Returns:
+            Dictionary with the number of models inserted, updated and skipped
+
+        Raises:
+            FileNotFoundError: If the file doesn't exist
+            ValueError: If a line is not a JSON object
+            RuntimeError: If a record cannot be normalized
+        """
+        records = iter_ndjson(filepath, codec, self.cache_manager.json_codec)
+        models = (normalize_model(model) for model in records)
+        return self.cache_manager.upsert_models(models, batch_size)
+
     def import_models_from_json(self, filepath: str) -> List[Dict[str, Any]]:
         """Import models from a JSON file.
 
@@ -211,8 +685,8 @@ class BioModelsAPI:
         """
         try:
             try:
-                with open(filepath, 'r') as f:
-                    models_data = json.load(f)
+                with open(filepath, 'rb') as f:
+                    models_data = self.cache_manager.json_codec.load(f)
             except (IOError, OSError) as e:
                 raise ValueError(f"Cannot read file {filepath}: {str(e)}")
             except json.JSONDecodeError as e:
@@ -232,3 +706,8 @@ class BioModelsAPI:
             raise e
         except Exception as e:
             raise RuntimeError(f"Error importing models: {str(e)}")
+
+    def close(self) -> None:
+        """Save the negative cache's pending changes and close the HTTP session."""
+        self.negative_cache.flush(force=True)
+        self.session.close()
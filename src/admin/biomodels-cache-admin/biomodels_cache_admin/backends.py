@@ -0,0 +1,549 @@
+"""
+Storage backends for CacheManager.
+"""
+import os
+import json
+import sqlite3
+import threading
+import warnings
+from collections.abc import MutableMapping
+from contextlib import contextmanager, nullcontext
+from typing import Any, ContextManager, Dict, Iterator, List, Optional, Tuple
+from .codec import JSONCodec, get_codec
+from .fileutil import atomic_open, keep_backup
+from .shards import ShardedStore
+from .snapshot import MmapSnapshot, SnapshotStore, write_snapshot
+
+
+class StorageBackend:
+    """Where a CacheManager keeps its records.
+
+    A backend hands CacheManager a mutable mapping of model ID to model data,
+    which may be a plain dict or a view that reads from disk on demand, and
+    persists that mapping when the cache is saved.
+
+    Backends whose mapping writes through to durable storage set journaled
+    to False, and CacheManager then skips its write-ahead journal for them.
+    Backends whose mapping reads single records from disk without holding
+    the others in memory set random_access, and can be used in the
+    bounded-memory mode.
+    """
+
+    name = ""
+    journaled = True
+    random_access = False
+
+    def exists(self) -> bool:
+        """Check whether the backend's files exist."""
+        raise NotImplementedError
+
+    def load(self) -> MutableMapping:
+        """Open the stored records."""
+        raise NotImplementedError
+
+    def save(self, models: MutableMapping) -> None:
+        """Persist the records returned by load()."""
+        raise NotImplementedError
+
+    def replace(self, models: Dict[str, Dict[str, Any]]) -> MutableMapping:
+        """
+        Replace every stored record.
+
+        The change is persisted by the next save().
+
+        Args:
+            models: Mapping of model ID to model data
+
+        Returns:
+            The mapping now holding the records
+        """
+        raise NotImplementedError
+
+    def changed_records(self, models: MutableMapping) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Find records that other processes saved since this backend loaded or saved.
+
+        Args:
+            models: Mapping returned by load()
+
+        Yields:
+            (model_id, model) pairs that may differ from the ones in models
+        """
+        return iter(())
+
+    def transaction(self) -> ContextManager:
+        """Group writes to the mapping so they are persisted together."""
+        return nullcontext()
+
+    def search_candidates(
+        self,
+        query: str,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Narrow a search using the backend's own indexes.
+
+        Args:
+            query: Lowercased search query
+            filters: Optional search filters
+
+        Returns:
+            Models that may match, in cache order, to be verified by the
+            caller; or None if the backend cannot narrow the search
+        """
+        return None
+
+    def data_version(self) -> Optional[int]:
+        """
+        Get a number that changes when another process writes the storage.
+
+        Only backends whose mapping reads through to shared storage need
+        one; the others are changed only through this process's mapping.
+
+        Returns:
+            The current data version, or None if the backend has none
+        """
+        return None
+
+
+class JSONBackend(StorageBackend):
+    """All records in memory, saved as a single JSON file.
+
+    The previous file is kept as a backup, which is used if the file is
+    found corrupt on load. A corrupt file is never overwritten by load.
+    """
+
+    name = "json"
+
+    def __init__(self, cache_file: str, codec: Optional[JSONCodec] = None):
+        """
+        Args:
+            cache_file: Path of the JSON cache file
+            codec: JSON codec, defaults to the fastest installed one
+        """
+        self.cache_file = cache_file
+        self.codec = codec or get_codec()
+        self.backup_file = cache_file + ".bak"
+        self.snapshot_ok = True
+        self._snapshot_stat: Optional[Tuple[int, int]] = None
+
+    def exists(self) -> bool:
+        return os.path.exists(self.cache_file)
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        models, self.snapshot_ok = self._load_snapshot()
+        self._snapshot_stat = self._stat_snapshot()
+        return models
+
+    def _load_snapshot(self) -> Tuple[Dict[str, Dict[str, Any]], bool]:
+        """
+        Read the cache file, falling back to the last good snapshot.
+
+        Returns:
+            Tuple of (models, whether the cache file itself was valid)
+        """
+        if not os.path.exists(self.cache_file):
+            return {}, True
+        try:
+            with open(self.cache_file, "rb") as f:
+                return self.codec.load(f), True
+        except json.JSONDecodeError:
+            pass
+
+        try:
+            with open(self.backup_file, "rb") as f:
+                models = self.codec.load(f)
+            warnings.warn(f"Cache file {self.cache_file} is corrupt, using {self.backup_file}")
+        except (OSError, json.JSONDecodeError):
+            # If no valid snapshot exists, initialize empty cache
+            models = {}
+            warnings.warn(f"Cache file {self.cache_file} is corrupt and has no backup")
+        return models, False
+
+    def _stat_snapshot(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.cache_file)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def changed_records(self, models: MutableMapping) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        if self.snapshot_ok and self._stat_snapshot() != self._snapshot_stat:
+            snapshot, _ = self._load_snapshot()
+            yield from snapshot.items()
+
+    def save(self, models: MutableMapping) -> None:
+        if self.snapshot_ok:
+            keep_backup(self.cache_file, self.backup_file)
+        with atomic_open(self.cache_file, "wb") as f:
+            self.codec.dump_models(models, f)
+        self.snapshot_ok = True
+        self._snapshot_stat = self._stat_snapshot()
+
+    def replace(self, models: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        return models
+
+
+class ShardedBackend(StorageBackend):
+    """Records in a ShardedStore, loaded one shard at a time."""
+
+    name = "sharded"
+
+    def __init__(self, directory: str, shard_count: int = 64, codec: Optional[JSONCodec] = None):
+        """
+        Args:
+            directory: Directory of the sharded store
+            shard_count: Number of shards of a new store
+            codec: JSON codec, defaults to the fastest installed one
+        """
+        self.directory = directory
+        self.shard_count = shard_count
+        self.codec = codec
+        self.store: Optional[ShardedStore] = None
+
+    def exists(self) -> bool:
+        return ShardedStore.exists(self.directory)
+
+    def load(self) -> ShardedStore:
+        self.store = ShardedStore(self.directory, shard_count=self.shard_count, codec=self.codec)
+        return self.store
+
+    def changed_records(self, models: MutableMapping) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        # Only shards in memory can be stale; the rest are read on demand
+        return iter(list(models.changed_on_disk()))
+
+    def save(self, models: MutableMapping) -> None:
+        models.flush()
+
+    def replace(self, models: Dict[str, Dict[str, Any]]) -> ShardedStore:
+        self.store.replace(models)
+        return self.store
+
+
+class SnapshotBackend(StorageBackend):
+    """Records in a memory-mapped binary snapshot, for fast startup.
+
+    Opening the cache maps the snapshot instead of parsing it, and each
+    lookup decodes a single record. Changes are held in memory and
+    journaled, and saving rewrites the snapshot.
+    """
+
+    name = "snapshot"
+    random_access = True
+
+    def __init__(self, path: str, codec: Optional[JSONCodec] = None):
+        """
+        Args:
+            path: Path of the snapshot file
+            codec: JSON codec of the records, defaults to get_codec()
+        """
+        self.path = path
+        self.codec = get_codec(codec)
+        self.store: Optional[SnapshotStore] = None
+        self._stat: Optional[Tuple[int, int]] = None
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def _stat_snapshot(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def load(self) -> SnapshotStore:
+        self.store = SnapshotStore(self.path, self.codec)
+        self._stat = self._stat_snapshot()
+        return self.store
+
+    def changed_records(self, models: MutableMapping) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        if self._stat_snapshot() != self._stat:
+            snapshot = MmapSnapshot(self.path, self.codec)
+            try:
+                yield from snapshot.items()
+            finally:
+                snapshot.close()
+
+    def save(self, models: MutableMapping) -> None:
+        write_snapshot(models.items(), self.path, self.codec)
+        self.store.reload()
+        self._stat = self._stat_snapshot()
+
+    def replace(self, models: Dict[str, Dict[str, Any]]) -> SnapshotStore:
+        self.store.replace(models)
+        return self.store
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS models (
+    rowid INTEGER PRIMARY KEY,
+    model_id TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    title TEXT NOT NULL,
+    synopsis TEXT NOT NULL,
+    authors TEXT NOT NULL,
+    journal_key TEXT,
+    authors_key TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS models_journal_key ON models (journal_key);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS models_fts USING fts5(
+    name, title, synopsis, authors,
+    content='models', content_rowid='rowid', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS models_ai AFTER INSERT ON models BEGIN
+    INSERT INTO models_fts (rowid, name, title, synopsis, authors)
+    VALUES (new.rowid, new.name, new.title, new.synopsis, new.authors);
+END;
+CREATE TRIGGER IF NOT EXISTS models_ad AFTER DELETE ON models BEGIN
+    INSERT INTO models_fts (models_fts, rowid, name, title, synopsis, authors)
+    VALUES ('delete', old.rowid, old.name, old.title, old.synopsis, old.authors);
+END;
+CREATE TRIGGER IF NOT EXISTS models_au AFTER UPDATE ON models BEGIN
+    INSERT INTO models_fts (models_fts, rowid, name, title, synopsis, authors)
+    VALUES ('delete', old.rowid, old.name, old.title, old.synopsis, old.authors);
+    INSERT INTO models_fts (rowid, name, title, synopsis, authors)
+    VALUES (new.rowid, new.name, new.title, new.synopsis, new.authors);
+END;
+"""
+
+UPSERT = """
+INSERT INTO models (model_id, name, title, synopsis, authors, journal_key, authors_key, data)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (model_id) DO UPDATE SET
+    name = excluded.name, title = excluded.title, synopsis = excluded.synopsis,
+    authors = excluded.authors, journal_key = excluded.journal_key,
+    authors_key = excluded.authors_key, data = excluded.data
+"""
+
+# Trigram matching needs at least this many characters
+FTS_MIN_QUERY = 3
+
+# Rows fetched at a time when iterating over the models table
+FETCH_SIZE = 500
+
+
+def _text(value: Any) -> str:
+    return value if isinstance(value, str) else ""
+
+
+def _row(model_id: str, model: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Encode a model as the values of an UPSERT."""
+    authors = [a for a in model.get("authors") or [] if isinstance(a, str)]
+    journal = model.get("journal")
+    return (
+        model_id,
+        _text(model.get("name")),
+        _text(model.get("title")),
+        _text(model.get("synopsis")),
+        "; ".join(authors),
+        journal.lower() if isinstance(journal, str) else None,
+        json.dumps([a.lower() for a in authors]),
+        json.dumps(model),
+    )
+
+
+class SQLiteModels(MutableMapping):
+    """Mapping view of the models table; every access reads or writes the database.
+
+    Iteration follows insertion order. Replacing a model keeps its position,
+    like a dict.
+    """
+
+    def __init__(self, backend: "SQLiteBackend"):
+        self._backend = backend
+
+    def _query(self, sql: str, params: Tuple[Any, ...] = ()) -> List[Tuple[Any, ...]]:
+        return self._backend.query(sql, params)
+
+    def __getitem__(self, model_id: str) -> Dict[str, Any]:
+        rows = self._query("SELECT data FROM models WHERE model_id = ?", (model_id,))
+        if not rows:
+            raise KeyError(model_id)
+        return json.loads(rows[0][0])
+
+    def __setitem__(self, model_id: str, model: Dict[str, Any]) -> None:
+        with self._backend.transaction():
+            self._backend.execute(UPSERT, _row(model_id, model))
+
+    def __delitem__(self, model_id: str) -> None:
+        with self._backend.transaction():
+            if not self._backend.execute("DELETE FROM models WHERE model_id = ?", (model_id,)).rowcount:
+                raise KeyError(model_id)
+
+    def __contains__(self, model_id: object) -> bool:
+        return bool(self._query("SELECT 1 FROM models WHERE model_id = ?", (model_id,)))
+
+    def __len__(self) -> int:
+        return self._query("SELECT COUNT(*) FROM models")[0][0]
+
+    def __iter__(self) -> Iterator[str]:
+        for (model_id,) in self._backend.iter_query("SELECT model_id FROM models ORDER BY rowid"):
+            yield model_id
+
+    def items(self):
+        # Rows are decoded as they are consumed, so iterating does not
+        # load the whole table
+        for model_id, data in self._backend.iter_query("SELECT model_id, data FROM models ORDER BY rowid"):
+            yield model_id, json.loads(data)
+
+    def values(self):
+        for (data,) in self._backend.iter_query("SELECT data FROM models ORDER BY rowid"):
+            yield json.loads(data)
+
+
+class SQLiteBackend(StorageBackend):
+    """Records in an SQLite database with an FTS5 trigram index.
+
+    The database runs in WAL mode, so any number of processes can read while
+    one writes, and every write is durable once its transaction commits. The
+    FTS5 table indexes name, title, synopsis and authors, and is used to
+    narrow substring searches. Lowercased journals and authors are stored in
+    indexed columns so those filters are evaluated in SQL. If SQLite was
+    built without FTS5 or its trigram tokenizer, searches scan the table.
+    """
+
+    name = "sqlite"
+    random_access = True
+    journaled = False
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        """
+        Args:
+            path: Path of the database file
+            timeout: Seconds to wait for another process's write lock
+        """
+        self.path = path
+        self.timeout = timeout
+        self.fts = False
+        self._conn: Optional[sqlite3.Connection] = None
+        # The connection is shared by BioModelsAPI worker threads
+        self._lock = threading.RLock()
+        self._depth = 0
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout,
+                                   isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            try:
+                conn.executescript(FTS_SCHEMA)
+                self.fts = True
+            except sqlite3.OperationalError:
+                self.fts = False
+            self._conn = conn
+        return self._conn
+
+    def execute(self, sql: str, params: Tuple[Any, ...] = ()) -> sqlite3.Cursor:
+        """Run a statement on the shared connection."""
+        with self._lock:
+            return self._connect().execute(sql, params)
+
+    def query(self, sql: str, params: Tuple[Any, ...] = ()) -> List[Tuple[Any, ...]]:
+        """Run a query on the shared connection and fetch all rows."""
+        with self._lock:
+            return self._connect().execute(sql, params).fetchall()
+
+    def iter_query(self, sql: str, params: Tuple[Any, ...] = ()) -> Iterator[Tuple[Any, ...]]:
+        """Run a query on the shared connection, fetching rows in batches as they are consumed."""
+        with self._lock:
+            cursor = self._connect().execute(sql, params)
+        try:
+            while True:
+                with self._lock:
+                    rows = cursor.fetchmany(FETCH_SIZE)
+                if not rows:
+                    return
+                yield from rows
+        finally:
+            with self._lock:
+                cursor.close()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Run writes in one transaction, committed when the outermost block exits.
+
+        The transaction holds the database's write lock, so other writers
+        wait, while readers keep seeing the last committed state.
+        """
+        with self._lock:
+            conn = self._connect()
+            if self._depth == 0:
+                conn.execute("BEGIN IMMEDIATE")
+            self._depth += 1
+            try:
+                yield
+            except BaseException:
+                self._depth -= 1
+                if self._depth == 0:
+                    conn.execute("ROLLBACK")
+                raise
+            self._depth -= 1
+            if self._depth == 0:
+                conn.execute("COMMIT")
+
+    def load(self) -> SQLiteModels:
+        self._connect()
+        return SQLiteModels(self)
+
+    def save(self, models: MutableMapping) -> None:
+        # Writes are committed as they are made
+        pass
+
+    def replace(self, models: Dict[str, Dict[str, Any]]) -> SQLiteModels:
+        with self.transaction():
+            self.execute("DELETE FROM models")
+            with self._lock:
+                self._connect().executemany(
+                    UPSERT, (_row(model_id, model) for model_id, model in models.items()))
+        return SQLiteModels(self)
+
+    def search_candidates(
+        self,
+        query: str,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        clauses = []
+        params: List[Any] = []
+        if self.fts and len(query) >= FTS_MIN_QUERY:
+            # Match the query as one phrase, which trigrams turn into a substring match
+            phrase = '"' + query.replace('"', '""') + '"'
+            clauses.append("rowid IN (SELECT rowid FROM models_fts WHERE models_fts MATCH ?)")
+            params.append("{name title synopsis} : " + phrase)
+        if filters and "journals" in filters:
+            journals = [j.lower() for j in filters["journals"]]
+            clauses.append(f"journal_key IN ({', '.join('?' * len(journals))})")
+            params.extend(journals)
+        if filters and "authors" in filters:
+            authors = [a.lower() for a in filters["authors"]]
+            clauses.append(
+                "EXISTS (SELECT 1 FROM json_each(authors_key) "
+                f"WHERE value IN ({', '.join('?' * len(authors))}))")
+            params.extend(authors)
+
+        sql = "SELECT data FROM models"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY rowid"
+        return [json.loads(data) for (data,) in self.query(sql, tuple(params))]
+
+    def data_version(self) -> Optional[int]:
+        # Changes when another connection commits to the database
+        return self.query("PRAGMA data_version")[0][0]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,242 @@
+"""
+Batch evaluation of many search queries against one view of the cache.
+"""
+from collections import defaultdict
+from functools import lru_cache
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+from .index import date_ordinal
+
+# Longest substrings of the terms indexed to find the terms that contain a word
+GRAM = 3
+
+# Terms matched by a word beyond which their models are selected in one pass over the matrix
+_SLICED_TERMS = 64
+
+# Filter keys handled by the date mask instead of the per-model check
+_DATE_KEYS = ("dateRange", "_date_bounds")
+# Filters that search_models checks before the date
+_BEFORE_DATE_KEYS = ("authors", "_authors", "journals", "_journals")
+
+
+@lru_cache(maxsize=None)
+def _load_numpy() -> Any:
+    """Import NumPy the first time a searcher is built, or return None if it is not installed."""
+    try:
+        import numpy  # type: ignore
+    except ImportError:  # pragma: no cover - optional dependency
+        return None
+    return numpy
+
+
+class BatchSearcher:
+    """Answers search_models queries in bulk.
+
+    The name, title and synopsis of every model are lowercased once and
+    split on whitespace into terms, and each distinct term gets a posting
+    list of the models that contain it. A query without whitespace occurs
+    in a model exactly when it occurs in one of the model's terms, so its
+    matches are the union of the posting lists of the terms that contain
+    it, and no model text is read. Those terms are found through an index
+    of the vocabulary's substrings of up to three characters. For
+    a query with whitespace, each of its words must occur in a term, and
+    only the models left are checked for the whole query.
+
+    With NumPy installed the posting lists are one sparse term-by-model
+    matrix, and the matches and filters are boolean masks over the
+    models; the dateRange filter is a vectorized comparison over an array
+    of date ordinals. Without it they are sets of model positions.
+    """
+
+    def __init__(self, models: Iterable[Tuple[str, Mapping[str, Any]]]):
+        """
+        Index a view of the cache.
+
+        Args:
+            models: (model_id, model) pairs in cache order
+        """
+        self.ids: List[str] = []
+        self.models: List[Mapping[str, Any]] = []
+        vocabulary: Dict[str, int] = {}
+        postings: List[List[int]] = []
+        for position, (model_id, model) in enumerate(models):
+            self.ids.append(model_id)
+            self.models.append(model)
+            terms = set(model["name"].lower().split())
+            terms.update(model["title"].lower().split())
+            terms.update(model["synopsis"].lower().split())
+            for term in terms:
+                number = vocabulary.get(term)
+                if number is None:
+                    number = vocabulary[term] = len(postings)
+                    postings.append([])
+                postings[number].append(position)
+        self.terms = list(vocabulary)
+        grams: Dict[str, List[int]] = defaultdict(list)
+        for number, term in enumerate(self.terms):
+            for gram in {term[i:i + size] for size in range(1, GRAM + 1) for i in range(len(term) - size + 1)}:
+                grams[gram].append(number)
+        self._grams = dict(grams)
+        self.ordinals = [date_ordinal(model["date"]) for model in self.models]
+
+        self._numpy = _load_numpy()
+        if self._numpy is None:
+            self._postings = postings
+            return
+        numpy = self._numpy
+        # Compressed sparse rows: the models of term t are indices[indptr[t]:indptr[t + 1]]
+        lengths = numpy.fromiter(map(len, postings), dtype=numpy.int64, count=len(postings))
+        self._indptr = numpy.concatenate(([0], numpy.cumsum(lengths)))
+        self._indices = numpy.fromiter(
+            chain.from_iterable(postings), dtype=numpy.int32, count=int(self._indptr[-1]))
+        self._lengths = lengths
+        # NumPy array of the ordinals, -1 for undated, made by the first date filter
+        self._ordinal_array: Any = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def terms_containing(self, word: str) -> List[int]:
+        """Get the numbers of the terms that contain a lowercased word without whitespace."""
+        size = min(GRAM, len(word))
+        rarest = min((self._grams.get(word[i:i + size], ()) for i in range(len(word) - size + 1)), key=len)
+        return [term for term in rarest if word in self.terms[term]]
+
+    def _containing(self, word: str) -> Any:
+        """Get the models with a term that contains a word, as a mask or a set."""
+        terms = self.terms_containing(word)
+        numpy = self._numpy
+        if numpy is None:
+            found: Any = set()
+            for term in terms:
+                found.update(self._postings[term])
+            return found
+        found = numpy.zeros(len(self.ids), dtype=bool)
+        if len(terms) <= _SLICED_TERMS:
+            for term in terms:
+                found[self._indices[self._indptr[term]:self._indptr[term + 1]]] = True
+        else:
+            # Select the terms' entries of the matrix in one pass
+            selected = numpy.zeros(len(self.terms), dtype=bool)
+            selected[terms] = True
+            found[self._indices[numpy.repeat(selected, self._lengths)]] = True
+        return found
+
+    def _mask(self, flags: Iterable[bool]) -> Any:
+        """Make a mask or set of the models from one flag per model."""
+        if self._numpy is None:
+            return {position for position, flag in enumerate(flags) if flag}
+        return self._numpy.fromiter(flags, dtype=bool, count=len(self.ids))
+
+    def _positions(self, found: Any) -> List[int]:
+        """List the positions of a mask or set of models, in cache order."""
+        if self._numpy is None:
+            return sorted(found)
+        return self._numpy.flatnonzero(found).tolist()
+
+    def candidates(self, query: str) -> Tuple[Any, bool]:
+        """
+        Find the models that can match a lowercased query.
+
+        Returns:
+            (candidates, exact): the candidates, as a boolean NumPy array
+            over the models or a set of positions without NumPy, and
+            whether they are exactly the models that the query matches
+        """
+        words = query.split()
+        found = None
+        for word in words:
+            matched = self._containing(word)
+            found = matched if found is None else found & matched
+            empty = not found.any() if self._numpy is not None else not found
+            if empty:
+                break
+        if found is None:
+            found = self._mask([True] * len(self.ids))
+        return found, not query or words == [query]
+
+    def _matches(self, position: int, query: str) -> bool:
+        model = self.models[position]
+        return (query in model["name"].lower() or query in model["title"].lower()
+                or query in model["synopsis"].lower())
+
+    def filter_masks(
+        self,
+        filters: Dict[str, Any],
+        check: Callable[[Mapping[str, Any], Dict[str, Any]], bool]
+    ) -> Tuple[Any, Optional[Any]]:
+        """
+        Evaluate prepared filters for every model.
+
+        Args:
+            filters: Filters prepared by CacheManager._prepare_filters
+            check: CacheManager._check_filters, used for the filters other
+                than dateRange
+
+        Returns:
+            (passed, invalid) masks or sets: the models that pass the
+            filters, and those that search_models would reject with an
+            error because the dateRange filter cannot parse their date,
+            or None without a dateRange filter
+        """
+        other = {name: value for name, value in filters.items() if name not in _DATE_KEYS}
+        passed = self._mask(check(model, other) for model in self.models)
+        if "dateRange" not in filters:
+            return passed, None
+
+        before = {name: other[name] for name in _BEFORE_DATE_KEYS if name in other}
+        start, end = (bound.toordinal() for bound in filters["_date_bounds"])
+        numpy = self._numpy
+        if numpy is not None:
+            if self._ordinal_array is None:
+                self._ordinal_array = numpy.array(
+                    [-1 if o is None else o for o in self.ordinals], dtype=numpy.int64)
+            ordinals = self._ordinal_array
+            in_range = (ordinals >= start) & (ordinals <= end)
+            undated = ordinals < 0
+        else:
+            in_range = self._mask(o is not None and start <= o <= end for o in self.ordinals)
+            undated = self._mask(o is None for o in self.ordinals)
+        if before:
+            undated = undated & self._mask(check(model, before) for model in self.models)
+        return passed & in_range, undated
+
+    def search(
+        self,
+        queries: Iterable[str],
+        filters: Optional[Dict[str, Any]] = None,
+        check: Optional[Callable[[Mapping[str, Any], Dict[str, Any]], bool]] = None
+    ) -> Dict[str, List[str]]:
+        """
+        Run many queries with the same filters.
+
+        Args:
+            queries: Search query strings
+            filters: Optional filters prepared by CacheManager._prepare_filters
+            check: CacheManager._check_filters, required with filters
+
+        Returns:
+            Mapping of each query to the IDs of its matching models, in
+            cache order
+
+        Raises:
+            ValueError: If a model matching a query has a date that the
+                dateRange filter cannot parse, as search_models does
+        """
+        passed, invalid = self.filter_masks(filters, check) if filters else (None, None)
+        results: Dict[str, List[str]] = {}
+        for query in queries:
+            if query in results:
+                continue
+            lowered = query.lower()
+            found, exact = self.candidates(lowered)
+            if invalid is not None:
+                for position in self._positions(found & invalid):
+                    if exact or self._matches(position, lowered):
+                        # Raises the error search_models would
+                        check(self.models[position], filters)
+            if passed is not None:
+                found = found & passed
+            results[query] = [self.ids[position] for position in self._positions(found)
+                              if exact or self._matches(position, lowered)]
+        return results
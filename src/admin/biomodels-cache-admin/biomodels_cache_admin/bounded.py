@@ -0,0 +1,138 @@
+"""
+Bounded-memory view of a cache backend that keeps only hot records in memory.
+"""
+import sys
+from collections.abc import MutableMapping
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional
+from .lru import LRUCache
+
+_MISSING = object()
+
+
+def record_size(model: Mapping[str, Any]) -> int:
+    """
+    Estimate the memory taken by a decoded model record.
+
+    Counts the record, its keys and values, and the items of list values
+    such as authors; strings shared with other records are counted again.
+
+    Returns:
+        Approximate size in bytes
+    """
+    size = sys.getsizeof(model)
+    for key, value in model.items():
+        size += sys.getsizeof(key) + sys.getsizeof(value)
+        if isinstance(value, (list, tuple)):
+            size += sum(sys.getsizeof(item) for item in value)
+    return size
+
+
+class BoundedRecords(MutableMapping):
+    """Model records read on demand from a backend, with an LRU of hot records.
+
+    Lookups are served from the LRU when they can; otherwise the record is
+    read from the backing mapping and kept, evicting the least recently
+    used records once max_records or max_bytes is exceeded. Writes go
+    straight to the backing mapping and drop the record from the LRU, so a
+    bulk update does not push out the hot records. Iteration, items() and
+    values() read the backing mapping without filling the LRU.
+    """
+
+    def __init__(
+        self,
+        store: MutableMapping,
+        max_records: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        version: Optional[Callable[[], Any]] = None
+    ):
+        """
+        Args:
+            store: Backing mapping that reads records from disk, such as
+                SQLiteModels or SnapshotStore
+            max_records: Maximum number of records kept in memory
+            max_bytes: Maximum estimated size (see record_size) of the
+                records kept in memory
+            version: Optional function returning a value that changes when
+                another process writes the backing storage, which empties
+                the LRU
+        """
+        if max_records is None and max_bytes is None:
+            raise ValueError("max_records or max_bytes is required")
+        self.store = store
+        self._lru = LRUCache(max_records, max_bytes, record_size)
+        self._version = version
+        self._seen = version() if version is not None else None
+
+    def attach(self, store: MutableMapping) -> None:
+        """Switch to another backing mapping, emptying the LRU but keeping the counters."""
+        self.store = store
+        self.clear_cache()
+
+    def clear_cache(self) -> None:
+        """Drop every record held in memory."""
+        self._lru.clear()
+
+    def _check_version(self) -> None:
+        if self._version is not None:
+            seen = self._version()
+            if seen != self._seen:
+                self._lru.clear()
+                self._seen = seen
+
+    def __getitem__(self, model_id: str) -> Dict[str, Any]:
+        self._check_version()
+        model = self._lru.get(model_id, _MISSING)
+        if model is _MISSING:
+            model = self.store[model_id]
+            self._lru.put(model_id, model)
+        return model
+
+    def __setitem__(self, model_id: str, model: Dict[str, Any]) -> None:
+        self.store[model_id] = model
+        self._lru.pop(model_id)
+
+    def __delitem__(self, model_id: str) -> None:
+        self._lru.pop(model_id)
+        del self.store[model_id]
+
+    def __contains__(self, model_id: object) -> bool:
+        self._check_version()
+        return model_id in self._lru or model_id in self.store
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.store)
+
+    def items(self):
+        return self.store.items()
+
+    def values(self):
+        return self.store.values()
+
+    def info(self) -> Dict[str, Any]:
+        """
+        Get memory and LRU statistics.
+
+        Returns:
+            Dictionary with:
+                - records: int - Records held in memory
+                - bytes: int - Estimated size of those records
+                - max_records, max_bytes: The configured limits
+                - hits, misses: Lookups served from memory and from disk
+                - evictions: Records dropped to stay within the limits
+                - hit_ratio: hits / (hits + misses), or None before the
+                  first lookup
+        """
+        info = self._lru.info()
+        return {
+            "records": info["size"],
+            "bytes": info["weight"],
+            "max_records": info["maxsize"],
+            "max_bytes": info["max_weight"],
+            "hits": info["hits"],
+            "misses": info["misses"],
+            "evictions": info["evictions"],
+            "hit_ratio": info["hit_ratio"],
+        }
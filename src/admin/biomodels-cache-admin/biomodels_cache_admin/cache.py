@@ -3,62 +3,474 @@ Cache management for BioModels data.
 """
 import os
 import json
-from typing import Dict, List, Any, Optional, Union
+import base64
+import hashlib
+import heapq
+import functools
+import threading
+from contextlib import contextmanager
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Any, MutableMapping, Optional, Set, Union
 from datetime import datetime
+from .batch import BatchSearcher
+from .bounded import BoundedRecords, record_size
+from .codec import JSONCodec, get_codec
+from .backends import JSONBackend, ShardedBackend, SnapshotBackend, SQLiteBackend, StorageBackend
+from .fileutil import atomic_open, file_lock
+from .index import BM25Index, FilterIndex, NGramIndex
+from .lru import LRUCache
+from .metrics import Metrics
+from .ndjson import iter_ndjson, write_ndjson
+from .records import CompactRecord
+from .shards import ShardedStore
+from .snapshot import write_snapshot
+from .sync import RWLock
+from .wal import CacheJournal
+
+# Score bonus for models whose ID contains the query (e.g. "52" or "BIOMD00000001")
+ID_PARTIAL_BOOST = 5.0
+# Filters that label the search latency metrics; other keys are ignored
+FILTER_NAMES = ("authors", "journals", "dateRange", "sbmlLevels", "speciesCount", "reactionCount", "annotations")
+
+
+def query_shape(query: Union[str, Iterable[str]], filters: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    Describe a search without its text, for labelling metrics.
+    
+    Returns:
+        Dictionary with "terms" ("none", "one" or "many" words, or "batch"
+        for the queries of search_many) and "filters" (the filters used,
+        joined by "+", or "none")
+    """
+    if isinstance(query, str):
+        words = len(query.split())
+        terms = "none" if words == 0 else "one" if words == 1 else "many"
+    else:
+        terms = "batch"
+    used = sorted(name for name in (filters or {}) if name in FILTER_NAMES)
+    return {"terms": terms, "filters": "+".join(used) or "none"}
+
+
+def _timed_search(method: Callable) -> Callable:
+    """Record a search method's latency in the search_seconds histogram."""
+    @functools.wraps(method)
+    def search(self, query, filters=None, *args, **kwargs):
+        with self.metrics.timer("search_seconds", method=method.__name__, **query_shape(query, filters)):
+            return method(self, query, filters, *args, **kwargs)
+    return search
+
 
 class CacheManager:
     """Manages a local cache of BioModels data."""
     
-    def __init__(self, cache_dir: str = None):
+    def __init__(
+        self,
+        cache_dir: str = None,
+        use_index: bool = False,
+        compact_threshold: int = 1000,
+        backend: Optional[Union[str, StorageBackend]] = None,
+        shard_count: int = 64,
+        compact_records: bool = False,
+        search_cache_size: int = 0,
+        max_records: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        metrics: Optional[Metrics] = None,
+        json_codec: Optional[Union[str, JSONCodec]] = None
+    ):
         """
         Initialize the cache manager.
         
         Args:
             cache_dir: Directory to store cache files
+            use_index: Maintain an n-gram index so search_models only
+                verifies candidate models instead of scanning the whole cache
+            compact_threshold: Number of journaled writes after which the
+                journal is folded back into the cache file
+            backend: Storage backend, or the name of one:
+                - "json": the single biomodels_cache.json file
+                - "sharded": a ShardedStore in the shards/ directory, which
+                  loads only the shards that are used
+                - "sqlite": the biomodels_cache.sqlite3 database, which is
+                  read on demand and searched with its full-text index
+                - "snapshot": the memory-mapped biomodels_cache.snapshot
+                  file written by export_snapshot, for fast startup
+                Defaults to whichever of "sharded" and "sqlite" exists in
+                cache_dir, else "json". A snapshot is only used when asked
+                for, since it is usually exported next to the JSON file.
+            shard_count: Number of shards when creating a sharded cache
+            compact_records: Hold records as read-only CompactRecord views,
+                which use less memory than dicts; JSON backend only
+            search_cache_size: Number of search_models results to memoize;
+                0 (the default) disables the search cache. Only turn it on
+                if the cache is changed through CacheManager's methods and
+                not by assigning to cache[model_id]. Ignored in bounded-memory
+                mode, where memoized results would hold records outside
+                the bound
+            max_records: Bounded-memory mode: keep at most this many
+                records in memory, reading the others from disk on demand;
+                sqlite and snapshot backends only
+            max_bytes: Bounded-memory mode: keep at most this many bytes of
+                records in memory (estimated by bounded.record_size)
+            metrics: Registry to record cache hits and misses, search and
+                save latencies and record gauges in; defaults to a new one
+            json_codec: JSON codec of the cache, journal, snapshot, NDJSON
+                and export files: "orjson", "msgspec", "json" or a
+                JSONCodec; defaults to the fastest installed (see
+                codec.get_codec)
+                
+        Raises:
+            ValueError: If cache_dir is missing, backend is unknown,
+                compact_records is used with another backend, or the
+                bounded-memory mode with a backend that is not random
+                access, or json_codec is unknown or not installed
         """
         if not cache_dir:
             raise ValueError("cache_dir must be provided")
             
         self.cache_dir = cache_dir
         self.cache_file = os.path.join(cache_dir, "biomodels_cache.json")
-        self.cache: Dict[str, Dict[str, Any]] = {}
+        self.shard_dir = os.path.join(cache_dir, "shards")
+        self.database_file = os.path.join(cache_dir, "biomodels_cache.sqlite3")
+        self.snapshot_file = os.path.join(cache_dir, "biomodels_cache.snapshot")
+        self.backup_file = self.cache_file + ".bak"
+        self.json_codec = get_codec(json_codec)
+        if backend is None:
+            if ShardedStore.exists(self.shard_dir):
+                backend = "sharded"
+            elif os.path.exists(self.database_file):
+                backend = "sqlite"
+            else:
+                backend = "json"
+        if backend == "json":
+            backend = JSONBackend(self.cache_file, codec=self.json_codec)
+        elif backend == "sharded":
+            backend = ShardedBackend(self.shard_dir, shard_count=shard_count, codec=self.json_codec)
+        elif backend == "sqlite":
+            backend = SQLiteBackend(self.database_file)
+        elif backend == "snapshot":
+            backend = SnapshotBackend(self.snapshot_file, codec=self.json_codec)
+        elif not isinstance(backend, StorageBackend):
+            raise ValueError(f"Unknown cache backend: {backend}")
+        self.backend: StorageBackend = backend
+        if compact_records and not isinstance(backend, JSONBackend):
+            raise ValueError("compact_records requires the json backend")
+        self.compact_records = compact_records
+        self._records: Optional[BoundedRecords] = None
+        if max_records is not None or max_bytes is not None:
+            if not backend.random_access:
+                raise ValueError(
+                    f"max_records and max_bytes need the sqlite or snapshot backend, not {backend.name}")
+            self._records = BoundedRecords(
+                {}, max_records=max_records, max_bytes=max_bytes, version=backend.data_version)
+        self.lock_file = self.cache_file + ".lock"
+        # Each backend has its own journal, so a manager never replays or
+        # truncates writes meant for another backend's files
+        journal_name = "biomodels_cache.journal"
+        if backend.name not in ("", "json"):
+            journal_name = f"biomodels_cache.{backend.name}.journal"
+        self.journal = CacheJournal(os.path.join(cache_dir, journal_name), self.json_codec)
+        self.compact_threshold = compact_threshold
+        self._index: Optional[NGramIndex] = NGramIndex() if use_index else None
+        self._ranker: Optional[BM25Index] = None
+        self._filter_index: Optional[FilterIndex] = None
+        # Versions of the cache (see _index_version) the lazily built
+        # indexes were last brought up to date with
+        self._ranker_version: Optional[tuple] = None
+        self._filter_index_version: Optional[tuple] = None
+        # Serializes writes, which may come from BioModelsAPI worker threads
+        self._lock = threading.RLock()
+        # Keeps searches from seeing the in-memory cache halfway through a
+        # write; writers take it only while changing memory, never for I/O
+        self._rwlock = RWLock()
+        # Serializes the lazy index builds done by readers
+        self._build_lock = threading.Lock()
+        # IDs written in memory since the cache file was last loaded or saved
+        self._unsaved: Set[str] = set()
+        # Bumped by every change to the cache, so memoized searches expire
+        self._generation = 0
+        self._search_cache = LRUCache(search_cache_size if self._records is None else 0)
+        # BatchSearcher for search_many and the version of the cache it covers
+        self._batch: Optional[BatchSearcher] = None
+        self._batch_version: Optional[tuple] = None
+        self.cache: MutableMapping[str, Dict[str, Any]] = {}
+        self.metrics = metrics if metrics is not None else Metrics()
+        # Generation and (records, bytes) of the last in-memory size estimate
+        self._memory_estimate: Optional[tuple] = None
+        self.metrics.set_gauge("records", lambda: len(self._cache))
+        self.metrics.set_gauge("records_in_memory", lambda: self._memory_usage()[0])
+        self.metrics.set_gauge("record_bytes", lambda: self._memory_usage()[1])
         
         # Create cache directory if it doesn't exist
         os.makedirs(cache_dir, exist_ok=True)
         
-        # Initialize empty cache file if it doesn't exist
-        if not os.path.exists(self.cache_file):
+        # Load existing cache if available
+        with file_lock(self.lock_file, shared=True):
+            initialized = self.backend.exists()
+            models = self.backend.load()
+            # Replay writes made since the cache file was last saved
+            with self.backend.transaction():
+                for model_id, model in self.journal.replay():
+                    models[model_id] = model
+        self.cache = models
+        
+        # Initialize the cache file if it doesn't exist
+        if not initialized:
             self._save_cache()
-        else:
-            # Load existing cache if available
+    
+    @property
+    def cache(self) -> MutableMapping[str, Dict[str, Any]]:
+        """The cached models, keyed by model ID; a view of the backend's storage."""
+        return self._cache
+    
+    @cache.setter
+    def cache(self, models: MutableMapping[str, Dict[str, Any]]) -> None:
+        if self.compact_records:
+            models = {model_id: CompactRecord(model) for model_id, model in models.items()}
+        if self._records is not None and models is not self._records:
+            self._records.attach(models)
+            models = self._records
+        with self._rwlock.write():
+            self._cache = models
+            self._unsaved = set()
+            for index in self._indexes():
+                index.build(models)
+            self._invalidate_searches()
+            self._mark_indexes_current()
+    
+    def _indexes(self) -> List[Any]:
+        """Get the indexes that must be kept in sync with the cache."""
+        return [index for index in (self._index, self._ranker, self._filter_index) if index is not None]
+    
+    def put_model(self, model_id: str, model: Dict[str, Any]) -> None:
+        """
+        Add or replace a model in the in-memory cache, keeping indexes current.
+        
+        Args:
+            model_id: Model ID to store the model under
+            model: Model data
+        """
+        if self.compact_records:
+            model = CompactRecord(model)
+        with self._lock, self._rwlock.write():
+            self._drop_stale_indexes()
+            indexes = self._indexes()
+            old = self._cache.get(model_id) if indexes else None
+            for index in indexes:
+                if old is not None:
+                    index.remove(model_id, old)
+                index.add(model_id, model)
+            self._cache[model_id] = model
+            self._unsaved.add(model_id)
+            self._invalidate_searches()
+            self._mark_indexes_current()
+    
+    def _index_version(self) -> tuple:
+        """Get the version of the cache the lazily built indexes are keyed on."""
+        return (self._generation, self.backend.data_version())
+    
+    def _drop_stale_indexes(self) -> None:
+        """Drop lazily built indexes that another process's writes made stale."""
+        if self._ranker is None and self._filter_index is None:
+            return
+        version = self._index_version()
+        if self._ranker_version != version:
+            self._ranker = None
+        if self._filter_index_version != version:
+            self._filter_index = None
+    
+    def _mark_indexes_current(self) -> None:
+        """Record that the lazily built indexes were just brought up to date."""
+        if self._ranker is None and self._filter_index is None:
+            return
+        version = self._index_version()
+        if self._ranker is not None:
+            self._ranker_version = version
+        if self._filter_index is not None:
+            self._filter_index_version = version
+    
+    @property
+    def generation(self) -> int:
+        """Number that increases with every change to the cached models."""
+        return self._generation
+    
+    def _invalidate_searches(self) -> None:
+        """Start a new cache generation, dropping memoized search results."""
+        self._generation += 1
+        self._search_cache.clear()
+    
+    def memory_info(self) -> Optional[Dict[str, Any]]:
+        """
+        Get the bounded-memory mode's statistics.
+        
+        Returns:
+            Records and estimated bytes held in memory, the limits, and
+            the hits, misses, evictions and hit_ratio of lookups (see
+            BoundedRecords.info); None if the mode is off
+        """
+        return self._records.info() if self._records is not None else None
+    
+    def _memory_usage(self) -> tuple:
+        """
+        Estimate the records held in memory, for the metrics gauges.
+        
+        Returns:
+            Tuple of (records, estimated bytes); (None, None) for the
+            sharded backend, whose loaded shards are not tracked
+        """
+        if self._records is not None:
+            info = self._records.info()
+            return info["records"], info["bytes"]
+        if self.backend.random_access:
+            # Records are read from disk on demand and not kept
+            return 0, 0
+        if not isinstance(self.backend, JSONBackend):
+            return None, None
+        with self._rwlock.read():
+            estimate = self._memory_estimate
+            if estimate is None or estimate[0] != self._generation:
+                models = list(self._cache.values())
+                estimate = (self._generation, (len(models), sum(record_size(model) for model in models)))
+                self._memory_estimate = estimate
+        return estimate[1]
+    
+    def search_cache_info(self) -> Dict[str, int]:
+        """
+        Get search cache statistics.
+        
+        Returns:
+            Dictionary with the search cache's statistics (see
+            LRUCache.info) and the current cache generation
+        """
+        info = self._search_cache.info()
+        info["generation"] = self._generation
+        return info
+    
+    def save_model(self, model_id: str, model: Dict[str, Any]) -> None:
+        """
+        Add or replace a model and persist it by appending to the journal.
+        
+        Unlike _save_cache, this writes only the one record. The journal is
+        compacted into the cache file once it holds compact_threshold records.
+        
+        Args:
+            model_id: Model ID to store the model under
+            model: Model data
+        """
+        self.save_models({model_id: model})
+    
+    def save_models(self, models: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Add or replace a batch of models, journaling them with one lock.
+        
+        Backends that write through to durable storage, such as SQLite, save
+        the batch in one transaction instead of journaling it.
+        
+        Args:
+            models: Mapping of model ID to model data
+        """
+        self._journal_models(models, compact=True)
+    
+    def _journal_models(self, models: Dict[str, Dict[str, Any]], compact: bool) -> None:
+        """
+        Store a batch of models, journaling them if the backend needs it.
+        
+        Args:
+            models: Mapping of model ID to model data
+            compact: Compact the journal once it reaches compact_threshold
+        """
+        with self._lock:
+            with self._transaction():
+                for model_id, model in models.items():
+                    self.put_model(model_id, model)
+            if not self.backend.journaled:
+                self._unsaved = set()
+                return
+            with file_lock(self.lock_file):
+                self.journal.extend(models.items())
+            if compact and self.journal.entries >= self.compact_threshold:
+                self.compact()
+    
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """
+        Group writes in one backend transaction under the lock.
+        
+        The write lock is taken before the backend's transaction, since
+        readers of a backend such as SQLite take the read lock and then the
+        backend's own lock. If the transaction is rolled back, the records
+        it wrote may already be in memoized search results or in the
+        bounded-memory LRU, so a new generation is started and the LRU
+        is emptied.
+        """
+        with self._lock, self._rwlock.write():
             try:
-                with open(self.cache_file, "r") as f:
-                    self.cache = json.load(f)
-            except json.JSONDecodeError:
-                # If file is invalid JSON, initialize empty cache
-                self.cache = {}
-                self._save_cache()
-    
-    def _save_cache(self) -> None:
-        """Save the cache to disk."""
-        with open(self.cache_file, "w") as f:
-            json.dump(self.cache, f, indent=2)
+                with self.backend.transaction():
+                    yield
+            except BaseException:
+                self._invalidate_searches()
+                if self._records is not None:
+                    self._records.clear_cache()
+                raise
+    
+    def compact(self) -> None:
+        """Fold the journal into the cache file."""
+        self._save_cache()
+    
+    def _merge_from_disk(self) -> None:
+        """
+        Pull in records saved by other processes since this cache was loaded.
+        
+        Records written in memory by this manager since its last save win.
+        Must be called with the lock held.
+        """
+        for model_id, model in self.backend.changed_records(self._cache):
+            if model_id not in self._unsaved and self._cache.get(model_id) != model:
+                self.put_model(model_id, model)
+        for model_id, model in self.journal.replay():
+            if model_id not in self._unsaved:
+                self.put_model(model_id, model)
+    
+    def _save_cache(self, merge: bool = True) -> None:
+        """
+        Save the cache to disk.
+        
+        The backend writes its files under an exclusive lock; the JSON
+        backend replaces the cache file atomically and keeps the previous
+        snapshot as a backup for readers to fall back on.
+        
+        Args:
+            merge: Merge records saved by other processes before writing
+        """
+        with self._lock, self.metrics.timer("cache_save_seconds", backend=self.backend.name), \
+                file_lock(self.lock_file):
+            if merge:
+                unsaved = set(self._unsaved)
+                self._merge_from_disk()
+                self._unsaved = unsaved
+            self.backend.save(self._cache)
+            # Everything journaled is now in the snapshot
+            self.journal.truncate()
+            self._unsaved = set()
     
     def update_cache(self, models: List[Dict[str, Any]], progress_callback=None) -> None:
         """
         Update the cache with new model data.
         
+        With the SQLite backend the new models are written in one
+        transaction, so either all of them are stored or none are.
+        
         Args:
             models: List of model data to cache
             progress_callback: Optional callback for progress updates
         """
         total = len(models)
-        for idx, model in enumerate(models, 1):
-            model_id = model["id"]
-            if model_id not in self.cache:
-                self.cache[model_id] = model
-            if progress_callback:
-                progress_callback(idx, total)
+        with self._transaction():
+            for idx, model in enumerate(models, 1):
+                model_id = model["id"]
+                if model_id not in self.cache:
+                    self.put_model(model_id, model)
+                if progress_callback:
+                    progress_callback(idx, total)
         # Save updated cache
         self._save_cache()
     
@@ -72,12 +484,38 @@ class CacheManager:
         Returns:
             Model data if found, None otherwise
         """
+        model = self._get_model(model_id)
+        self.metrics.inc("cache_hits_total" if model is not None else "cache_misses_total")
+        return model
+    
+    def _get_model(self, model_id: str) -> Optional[Dict[str, Any]]:
+        """Look up a model like get_model, without counting a hit or miss."""
         # Convert numeric ID to full ID if needed
         if model_id.isdigit():
             model_id = f"BIOMD{model_id.zfill(10)}"
             
-        return self.cache.get(model_id)
+        with self._rwlock.read():
+            return self.cache.get(model_id)
+    
+    def list_models(self, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        List a page of the cached models, in cache order.
+        
+        Only the requested models are copied out of the cache, so paging
+        through a large cache does not list it whole for every page.
+        
+        Args:
+            offset: Number of models to skip
+            limit: Maximum number of models to return, or None for all
+            
+        Returns:
+            List of models
+        """
+        stop = offset + limit if limit is not None else None
+        with self._rwlock.read():
+            return [model for _, model in islice(self.cache.items(), offset, stop)]
     
+    @_timed_search
     def search_models(
         self,
         query: str,
@@ -86,6 +524,9 @@ class CacheManager:
         """
         Search for models in the cache.
         
+        With search_cache_size set, results are memoized per query and
+        filters until the cache changes (see search_cache_info).
+        
         Args:
             query: Search query string
             filters: Optional filters to apply
@@ -93,64 +534,364 @@ class CacheManager:
         Returns:
             List of matching models
         """
-        results = []
         query = query.lower()
+        # The generation is read first, so results computed while another
+        # thread changes the cache are stored under the old generation
+        key = (
+            self._generation,
+            self.backend.data_version(),
+            query,
+            json.dumps(filters or {}, sort_keys=True, default=str),
+        )
+        cached = self._search_cache.get(key)
+        if cached is not None:
+            return list(cached)
         
-        for model in self.cache.values():
-            # Basic text search
-            if (query in model["name"].lower() or
-                query in model["title"].lower() or
-                query in model["synopsis"].lower()):
-                
-                # Apply filters if specified
-                if filters:
-                    if not self._apply_filters(model, filters):
-                        continue
-                        
-                results.append(model)
+        results = []
+        prepared = self._prepare_filters(filters) if filters else None
+        
+        with self._rwlock.read():
+            for model in self._search_candidates(query, prepared):
+                # Basic text search
+                if self._matches_query(model, query):
+                    
+                    # Apply filters if specified
+                    if prepared:
+                        if not self._check_filters(model, prepared):
+                            continue
+                            
+                    results.append(model)
         
+        self._search_cache.put(key, tuple(results))
         return results
     
+    @_timed_search
+    def search_many(
+        self,
+        queries: Iterable[str],
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, List[str]]:
+        """
+        Run many searches with the same filters in one pass.
+        
+        Gives the same matches as calling search_models for each query,
+        but the cache's text is split into terms and indexed once, and the
+        filters are evaluated once for the whole batch. The index is kept
+        until the cache changes.
+        
+        Args:
+            queries: Search query strings
+            filters: Optional filters to apply to every query
+            
+        Returns:
+            Mapping of each query to the IDs of its matching models, in
+            cache order
+            
+        Raises:
+            ValueError: If the filters are invalid, or a matching model has
+                a date the dateRange filter cannot parse
+        """
+        prepared = self._prepare_filters(filters) if filters else None
+        with self._rwlock.read(), self._build_lock:
+            version = (self._generation, self.backend.data_version())
+            if self._batch is None or self._batch_version != version:
+                self._batch = BatchSearcher(self.cache.items())
+                self._batch_version = version
+            batch = self._batch
+        # The searcher holds its own view of the models, so no lock is needed
+        return batch.search(queries, prepared, self._check_filters)
+    
+    @_timed_search
+    def search_ranked(
+        self,
+        query: str,
+        filters: Optional[Dict[str, Any]] = None,
+        page: int = 1,
+        page_size: int = 20,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Search for models ranked by relevance, one page at a time.
+        
+        Models are scored with field-weighted BM25 over name, title, authors
+        and synopsis. An exact model ID match (numeric IDs are expanded, so
+        "5" matches BIOMD0000000005) is always ranked first, and models whose
+        ID contains an ID-like query get a score bonus. Only the top
+        page * page_size hits are selected, so later pages cost more than
+        earlier ones but no page sorts the whole result set.
+        
+        Args:
+            query: Search query string
+            filters: Optional filters to apply
+            page: 1-based page number, ignored if cursor is given
+            page_size: Number of results per page
+            cursor: Opaque cursor returned as next_cursor by a previous call
+                with the same query and filters
+            
+        Returns:
+            Dictionary with:
+                - results: List[Dict[str, Any]] - Models on the requested page
+                - total: int - Total number of matching models
+                - page: int - 1-based page number
+                - page_size: int - Number of results per page
+                - next_cursor: Optional[str] - Cursor for the next page, or
+                  None if this is the last page
+                
+        Raises:
+            ValueError: If page, page_size or cursor is invalid
+        """
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+        fingerprint = self._query_fingerprint(query, filters, page_size)
+        if cursor is not None:
+            page = self._decode_cursor(cursor, fingerprint)
+        if page < 1:
+            raise ValueError("page must be at least 1")
+        
+        with self._rwlock.read():
+            with self._build_lock:
+                version = self._index_version()
+                if self._ranker is None or self._ranker_version != version:
+                    ranker = BM25Index()
+                    ranker.build(self.cache)
+                    self._ranker = ranker
+                    self._ranker_version = version
+                ranker = self._ranker
+            scores = ranker.score(query)
+            
+            # ID matches
+            term = query.strip().upper()
+            if term.isdigit():
+                exact_id = f"BIOMD{term.zfill(10)}"
+            else:
+                exact_id = term
+            if term.isdigit() or term.startswith(("BIOMD", "MODEL")):
+                for model_id in self.cache:
+                    if term in model_id.upper():
+                        scores[model_id] = scores.get(model_id, 0.0) + ID_PARTIAL_BOOST
+            if exact_id in self.cache:
+                scores[exact_id] = float("inf")
+            
+            if filters:
+                prepared = self._prepare_filters(filters)
+                allowed = self._filter_candidates(prepared)
+                hits = [model_id for model_id in scores
+                        if (allowed is None or model_id in allowed)
+                        and self._check_filters(self.cache[model_id], prepared)]
+            else:
+                hits = list(scores)
+            
+            offset = (page - 1) * page_size
+            top = heapq.nlargest(
+                offset + page_size,
+                hits,
+                key=lambda model_id: (scores[model_id], -ranker.order(model_id))
+            )
+            results = [self.cache[model_id] for model_id in top[offset:]]
+        
+        next_cursor = None
+        if offset + page_size < len(hits):
+            next_cursor = self._encode_cursor(page + 1, fingerprint)
+        return {
+            "results": results,
+            "total": len(hits),
+            "page": page,
+            "page_size": page_size,
+            "next_cursor": next_cursor,
+        }
+    
+    @staticmethod
+    def _query_fingerprint(query: str, filters: Optional[Dict[str, Any]], page_size: int) -> str:
+        """Hash a ranked query so cursors can't be reused with another query."""
+        key = json.dumps([query, filters or {}, page_size], sort_keys=True, default=str)
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+    
+    @staticmethod
+    def _encode_cursor(page: int, fingerprint: str) -> str:
+        raw = json.dumps({"p": page, "q": fingerprint}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+    
+    @staticmethod
+    def _decode_cursor(cursor: str, fingerprint: str) -> int:
+        try:
+            state = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            page = int(state["p"])
+            query = state["q"]
+        except Exception as e:
+            raise ValueError(f"Invalid cursor: {str(e)}")
+        if query != fingerprint:
+            raise ValueError("Cursor does not belong to this query")
+        return page
+    
+    def _search_candidates(
+        self,
+        query: str,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Iterable[Dict[str, Any]]:
+        """
+        Get the models that may match a lowercased query, in cache order.
+        
+        The backend's own indexes are used if it has them; otherwise the
+        n-gram index and the filter index are intersected.
+        """
+        candidates = self.backend.search_candidates(query, filters)
+        if candidates is not None:
+            return candidates
+        model_ids = self._index.candidates(query) if self._index is not None else None
+        allowed = self._filter_candidates(filters)
+        if allowed is not None:
+            if model_ids is None:
+                model_ids = sorted(allowed, key=self._filter_index.order)
+            else:
+                model_ids = [model_id for model_id in model_ids if model_id in allowed]
+        if model_ids is not None:
+            return [self.cache[model_id] for model_id in model_ids]
+        return self.cache.values()
+    
+    def _filter_candidates(self, filters: Optional[Dict[str, Any]]) -> Optional[Set[str]]:
+        """
+        Get the IDs of models that may pass prepared filters.
+        
+        The filter index is built on the first filtered search and kept up
+        to date by put_model from then on. It is rebuilt if another process
+        changed the backend's storage since.
+        
+        Returns:
+            Candidate IDs, or None if no indexed filter applies
+        """
+        if not filters or not any(name in filters for name in FilterIndex.FILTERS):
+            return None
+        with self._build_lock:
+            version = self._index_version()
+            if self._filter_index is None or self._filter_index_version != version:
+                filter_index = FilterIndex()
+                filter_index.build(self.cache)
+                self._filter_index = filter_index
+                self._filter_index_version = version
+            filter_index = self._filter_index
+        date_range = None
+        if "dateRange" in filters:
+            start, end = filters["_date_bounds"]
+            date_range = (start.toordinal(), end.toordinal())
+        return filter_index.candidates(filters, date_range)
+    
+    @staticmethod
+    def _matches_query(model: Dict[str, Any], query: str) -> bool:
+        """Check whether a lowercased query occurs in a model's text fields."""
+        return (query in model["name"].lower() or
+                query in model["title"].lower() or
+                query in model["synopsis"].lower())
+    
     def _apply_filters(self, model: Dict[str, Any], filters: Dict[str, Any]) -> bool:
         """Apply filters to a model."""
+        return self._check_filters(model, self._prepare_filters(filters))
+    
+    @staticmethod
+    def _prepare_filters(filters: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Normalize filter values once per search instead of once per model.
+        
+        Returns:
+            Copy of filters with lowercased author and journal sets and the
+            parsed dateRange bounds added under private keys
+            
+        Raises:
+            ValueError: If the dateRange bounds are not YYYY-MM-DD dates
+        """
+        prepared = dict(filters)
+        if "authors" in filters:
+            prepared["_authors"] = {a.lower() for a in filters["authors"]}
+        if "journals" in filters:
+            prepared["_journals"] = {j.lower() for j in filters["journals"]}
+        if "dateRange" in filters:
+            try:
+                prepared["_date_bounds"] = (
+                    datetime.strptime(filters["dateRange"]["start"], "%Y-%m-%d"),
+                    datetime.strptime(filters["dateRange"]["end"], "%Y-%m-%d"),
+                )
+            except ValueError as e:
+                raise ValueError(f"Invalid date format in filters: {str(e)}")
+        return prepared
+    
+    @staticmethod
+    def _check_filters(model: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+        """Apply filters prepared by _prepare_filters to a model."""
         # Author filter
         if "authors" in filters:
-            authors = [a.lower() for a in model["authors"]]
-            filter_authors = [a.lower() for a in filters["authors"]]
-            if not any(a in authors for a in filter_authors):
+            if not any(a.lower() in filters["_authors"] for a in model["authors"]):
                 return False
                 
         # Journal filter
         if "journals" in filters:
-            model_journal = model["journal"].lower()
-            filter_journals = [j.lower() for j in filters["journals"]]
-            if model_journal not in filter_journals:
+            if model["journal"].lower() not in filters["_journals"]:
                 return False
                 
         # Date range filter
         if "dateRange" in filters:
             try:
                 model_date = datetime.strptime(model["date"], "%Y-%m-%d")
-                start_date = datetime.strptime(filters["dateRange"]["start"], "%Y-%m-%d")
-                end_date = datetime.strptime(filters["dateRange"]["end"], "%Y-%m-%d")
-                
-                if not (start_date <= model_date <= end_date):
-                    return False
             except ValueError as e:
                 # If date parsing fails, raise ValueError
                 raise ValueError(f"Invalid date format in filters: {str(e)}")
+            start_date, end_date = filters["_date_bounds"]
+            if not (start_date <= model_date <= end_date):
+                return False
+        
+        # SBML structure filters, which need metadata from sbml.extract_into_cache
+        if "sbmlLevels" in filters:
+            if model.get("sbml_level") not in filters["sbmlLevels"]:
+                return False
+        
+        for filter_name, field in (("speciesCount", "species_count"), ("reactionCount", "reaction_count")):
+            if filter_name in filters:
+                count = model.get(field)
+                bounds = filters[filter_name]
+                if count is None:
+                    return False
+                if bounds.get("min") is not None and count < bounds["min"]:
+                    return False
+                if bounds.get("max") is not None and count > bounds["max"]:
+                    return False
+        
+        # Annotation filter, matching URI substrings such as "GO:0006096"
+        if "annotations" in filters:
+            uris = model.get("annotation_uris") or []
+            if not any(a in uri for a in filters["annotations"] for uri in uris):
+                return False
                 
         return True
     
-    def export_json(self, filepath: str) -> None:
+    def export_json(self, filepath: str, pretty: bool = True) -> None:
         """
         Export the cache to a JSON file.
         
         Args:
             filepath: Path to save the JSON file
+            pretty: Indent the file for people to read; pass False for the
+                compact layout of the cache file
         """
-        with open(filepath, "w") as f:
-            json.dump(self.cache, f, indent=2)
+        with self._rwlock.read():
+            models = dict(self.cache.items())
+        with atomic_open(filepath, "wb") as f:
+            self.json_codec.dump_models(models, f, pretty=pretty)
+    
+    def export_snapshot(self, filepath: Optional[str] = None) -> int:
+        """
+        Export the cache as a memory-mapped binary snapshot.
+        
+        Open the snapshot with CacheManager(cache_dir, backend="snapshot")
+        to skip parsing the whole cache at startup.
+        
+        Args:
+            filepath: Path to save the snapshot, defaults to
+                biomodels_cache.snapshot in the cache directory
+            
+        Returns:
+            Number of models written
+        """
+        with self._rwlock.read():
+            models = list(self.cache.items())
+        return write_snapshot(models, filepath or self.snapshot_file, self.json_codec)
     
     def import_json(self, filepath: str) -> None:
         """
@@ -163,8 +904,100 @@ class CacheManager:
             FileNotFoundError: If the file doesn't exist
             json.JSONDecodeError: If the file contains invalid JSON
         """
-        with open(filepath, "r") as f:
-            self.cache = json.load(f)
+        with open(filepath, "rb") as f:
+            models = self.json_codec.load(f)
+        with self._lock, self._rwlock.write():
+            self.cache = self.backend.replace(models)
+        
+        # Save to cache file, replacing whatever was there
+        self._save_cache(merge=False) 
+    
+    def export_ndjson(self, filepath: str, codec: Optional[str] = None) -> int:
+        """
+        Export the cache as newline-delimited JSON, one model per line.
+        
+        Models are written as they are read from the cache, so sharded,
+        SQLite and snapshot caches are streamed rather than loaded whole.
+        Writes to the cache wait until the export is done.
+        
+        Args:
+            filepath: Path to save the file; a .gz, .xz or .zst extension
+                compresses it
+            codec: Compression codec, overriding the extension
+            
+        Returns:
+            Number of models written
+        """
+        with self._rwlock.read():
+            return write_ndjson(filepath, self.cache.values(), codec, self.json_codec)
+    
+    def upsert_models(self, models: Iterable[Dict[str, Any]], batch_size: int = 1000) -> Dict[str, int]:
+        """
+        Merge a stream of models into the cache in batches.
         
-        # Save to cache file
-        self._save_cache() 
\ No newline at end of file
+        Each batch is stored with one save_models call, and the journal is
+        compacted once at the end, so the cache file is written once rather
+        than once per model. Models equal to the cached copy are skipped.
+        
+        Args:
+            models: Models to merge, keyed by their model_id (or id) field
+            batch_size: Number of changed models stored per batch
+            
+        Returns:
+            Dictionary with the number of models inserted, updated and
+            skipped
+            
+        Raises:
+            ValueError: If a model has neither model_id nor id
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        counts = {"inserted": 0, "updated": 0, "skipped": 0}
+        batch: Dict[str, Dict[str, Any]] = {}
+        for model in models:
+            model_id = model.get("model_id") or model.get("id")
+            if not model_id:
+                raise ValueError("Model has neither model_id nor id")
+            current = batch.get(model_id)
+            if current is None:
+                with self._rwlock.read():
+                    current = self.cache.get(model_id)
+            if current is None:
+                counts["inserted"] += 1
+            elif current == model:
+                counts["skipped"] += 1
+                continue
+            else:
+                counts["updated"] += 1
+            batch[model_id] = model
+            if len(batch) >= batch_size:
+                self._journal_models(batch, compact=False)
+                batch = {}
+        if batch:
+            self._journal_models(batch, compact=False)
+        if counts["inserted"] or counts["updated"]:
+            self.compact()
+        return counts
+    
+    def import_ndjson(self, filepath: str, batch_size: int = 1000, codec: Optional[str] = None) -> Dict[str, int]:
+        """
+        Merge models from a newline-delimited JSON file into the cache.
+        
+        The file is read one line at a time, so memory use does not grow
+        with its size. See upsert_models.
+        
+        Args:
+            filepath: Path to the file; .gz, .xz and .zst files are
+                decompressed
+            batch_size: Number of changed models stored per batch
+            codec: Compression codec, overriding the extension
+            
+        Returns:
+            Dictionary with the number of models inserted, updated and
+            skipped
+            
+        Raises:
+            FileNotFoundError: If the file doesn't exist
+            ValueError: If a line is not a JSON object or lacks an ID
+        """
+        return self.upsert_models(iter_ndjson(filepath, codec, self.json_codec), batch_size)
@@ -0,0 +1,164 @@
+"""
+JSON codecs for cache files: the standard library, or orjson or msgspec when installed.
+"""
+import json
+from typing import Any, BinaryIO, Callable, Dict, Mapping, Optional, Type, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+
+class JSONCodec:
+    """Encodes and decodes JSON as UTF-8 bytes with the standard library.
+
+    Compact output has no whitespace; pretty output, for files people read,
+    is indented by two spaces. Non-ASCII characters are written as UTF-8,
+    so every codec writes the same bytes for model records and the cache
+    file does not change with the codecs installed. (Floats in exponent
+    notation are the exception, and model records have none.) Mappings
+    that are not dicts, such as CompactRecord, are encoded as dicts.
+    Decoding errors are raised as json.JSONDecodeError whatever the codec.
+    """
+
+    name = "json"
+
+    def __init__(self):
+        self._compact = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False, default=dict).encode
+        self._pretty = json.JSONEncoder(indent=2, ensure_ascii=False, default=dict).encode
+
+    def dumps(self, obj: Any, pretty: bool = False) -> bytes:
+        """
+        Encode a value.
+
+        Args:
+            obj: Value to encode
+            pretty: Indent the output
+
+        Returns:
+            UTF-8 encoded JSON
+        """
+        return (self._pretty if pretty else self._compact)(obj).encode("utf-8")
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        """Decode JSON given as bytes or text."""
+        try:
+            return json.loads(data)
+        except UnicodeDecodeError as e:
+            raise json.JSONDecodeError(f"Invalid UTF-8: {e.reason}", "", e.start) from e
+
+    def dump(self, obj: Any, f: BinaryIO, pretty: bool = False) -> None:
+        """Encode a value to a binary file."""
+        f.write(self.dumps(obj, pretty))
+
+    def load(self, f: BinaryIO) -> Any:
+        """Decode a binary file."""
+        return self.loads(f.read())
+
+    def dump_models(self, models: Mapping[str, Any], f: BinaryIO, pretty: bool = False) -> None:
+        """
+        Encode a mapping of model records to a binary file.
+
+        Compact output puts each record on its own line, so a changed model
+        is a one-line change in version control at almost the size of
+        fully compact JSON. Either way the file is a single JSON object.
+
+        Args:
+            models: Records keyed by model ID
+            f: Binary file
+            pretty: Indent the output
+        """
+        if pretty:
+            self.dump(dict(models), f, pretty=True)
+            return
+        separator = b"{\n"
+        for model_id, model in models.items():
+            f.write(separator + self.dumps(model_id) + b":" + self.dumps(model))
+            separator = b",\n"
+        f.write(b"{}\n" if separator == b"{\n" else b"\n}\n")
+
+
+class OrjsonCodec(JSONCodec):
+    """JSON codec backed by orjson."""
+
+    name = "orjson"
+
+    def __init__(self):
+        if orjson is None:
+            raise ValueError("The orjson codec requires the orjson package")
+
+    def dumps(self, obj: Any, pretty: bool = False) -> bytes:
+        return orjson.dumps(obj, default=dict, option=orjson.OPT_INDENT_2 if pretty else 0)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError
+        return orjson.loads(data)
+
+
+class MsgspecCodec(JSONCodec):
+    """JSON codec backed by msgspec."""
+
+    name = "msgspec"
+
+    def __init__(self):
+        if msgspec is None:
+            raise ValueError("The msgspec codec requires the msgspec package")
+        self._encoder = msgspec.json.Encoder(enc_hook=dict)
+        self._decoder = msgspec.json.Decoder()
+
+    def dumps(self, obj: Any, pretty: bool = False) -> bytes:
+        encoded = self._encoder.encode(obj)
+        return msgspec.json.format(encoded, indent=2) if pretty else encoded
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        try:
+            return self._decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise json.JSONDecodeError(str(e), data if isinstance(data, str) else "", 0) from e
+
+
+# Codecs by name, fastest first
+CODECS: Dict[str, Type[JSONCodec]] = {
+    "orjson": OrjsonCodec,
+    "msgspec": MsgspecCodec,
+    "json": JSONCodec,
+}
+_AVAILABLE: Dict[str, Callable[[], bool]] = {
+    "orjson": lambda: orjson is not None,
+    "msgspec": lambda: msgspec is not None,
+    "json": lambda: True,
+}
+
+
+def available_codecs() -> list:
+    """Get the names of the installed codecs, fastest first."""
+    return [name for name in CODECS if _AVAILABLE[name]()]
+
+
+def get_codec(codec: Optional[Union[str, JSONCodec]] = None) -> JSONCodec:
+    """
+    Get a codec by name.
+
+    Args:
+        codec: "orjson", "msgspec", "json", a JSONCodec instance, or None
+            for the fastest installed codec
+
+    Returns:
+        The codec
+
+    Raises:
+        ValueError: If the codec is unknown or its package is not installed
+    """
+    if isinstance(codec, JSONCodec):
+        return codec
+    if codec is None:
+        codec = available_codecs()[0]
+    if codec not in CODECS:
+        raise ValueError(f"Unknown JSON codec: {codec}")
+    return CODECS[codec]()
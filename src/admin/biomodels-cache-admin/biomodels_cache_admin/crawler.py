@@ -0,0 +1,223 @@
+"""
+Resumable crawler that mirrors the BioModels catalog into the cache.
+"""
+import os
+import json
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from .api import BioModelsAPI
+from .fileutil import atomic_open
+from .ratelimit import map_concurrent
+
+
+class CatalogCrawler:
+    """Pages through the BioModels search listing and caches every model.
+
+    Each listing page is one batch: the details of its uncached models are
+    fetched concurrently, normalized, and saved to the cache together. The
+    listing offset is then checkpointed, so an interrupted crawl resumes
+    from the first page that was not ingested.
+    """
+
+    def __init__(
+        self,
+        api: BioModelsAPI,
+        checkpoint_path: Optional[str] = None,
+        query: str = "*:*",
+        page_size: int = 100
+    ):
+        """
+        Initialize the crawler.
+
+        Args:
+            api: API client whose cache is populated
+            checkpoint_path: Path of the checkpoint file, defaults to
+                crawl_checkpoint.json in the cache directory
+            query: Search query selecting the models to crawl
+            page_size: Number of models per listing page (at most 100)
+        """
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+        self.api = api
+        self.cache_manager = api.cache_manager
+        self.checkpoint_path = checkpoint_path or os.path.join(
+            self.cache_manager.cache_dir, "crawl_checkpoint.json")
+        self.query = query
+        self.page_size = page_size
+
+    def list_page(self, offset: int) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Get one page of the search listing.
+
+        Args:
+            offset: Index of the first model on the page
+
+        Returns:
+            Tuple of (total number of matching models, models on the page)
+
+        Raises:
+            requests.exceptions.RequestException: If the request fails
+        """
+        response = self.api._get(
+            f"{self.api.base_url}/search",
+            endpoint="search",
+            params={
+                "query": self.query,
+                "offset": offset,
+                "numResults": self.page_size,
+                "format": "json",
+            },
+        )
+        response.raise_for_status()
+        data = response.json()
+        return int(data.get("matches", 0)), data.get("models") or []
+
+    def iter_pages(self, offset: int = 0) -> Iterator[Tuple[int, int, List[Dict[str, Any]]]]:
+        """
+        Page through the listing.
+
+        Args:
+            offset: Index of the first model to list
+
+        Yields:
+            Tuples of (offset, total, models) for each page
+        """
+        while True:
+            total, models = self.list_page(offset)
+            if not models:
+                return
+            yield offset, total, models
+            offset += len(models)
+            if offset >= total:
+                return
+
+    def load_checkpoint(self) -> Dict[str, Any]:
+        """Read the checkpoint, or return a fresh one if there is none."""
+        try:
+            with open(self.checkpoint_path, "r") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {"offset": 0, "fetched": 0, "skipped": 0, "missing": 0, "failed": []}
+
+    def _save_checkpoint(self, checkpoint: Dict[str, Any]) -> None:
+        with atomic_open(self.checkpoint_path) as f:
+            json.dump(checkpoint, f, indent=2)
+
+    def crawl(
+        self,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        max_workers: Optional[int] = None,
+        max_pages: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Crawl the catalog, resuming from the checkpoint if one exists.
+
+        Models already in the cache are skipped. Models that fail to download
+        are recorded and skipped, and are retried by the next crawl.
+
+        Args:
+            progress_callback: Optional callback for progress updates,
+                called with (models processed, total models)
+            max_workers: Number of threads, defaults to the client's max_workers
+            max_pages: Stop after this many pages, leaving the checkpoint in
+                place so a later call continues the crawl; at least 1
+
+        Returns:
+            Dictionary with:
+                - total: int - Number of models in the listing
+                - fetched: int - Models fetched and cached
+                - skipped: int - Models that were already cached
+                - missing: int - Listed models the API could not find
+                - failed: List[str] - IDs of models whose requests failed
+                - complete: bool - Whether the whole listing was crawled
+
+        Raises:
+            ValueError: If max_pages is less than 1
+        """
+        if max_pages is not None and max_pages < 1:
+            raise ValueError("max_pages must be at least 1")
+        checkpoint = self.load_checkpoint()
+        total = checkpoint.get("total", 0)
+        complete = True
+
+        for pages, (offset, total, listed) in enumerate(self.iter_pages(checkpoint["offset"]), 1):
+            model_ids = []
+            for entry in listed:
+                model_id = entry.get("id")
+                if not model_id:
+                    continue
+                # Not counted as a cache hit or miss
+                if self.cache_manager._get_model(model_id) is not None:
+                    checkpoint["skipped"] += 1
+                else:
+                    model_ids.append(model_id)
+
+            batch = {}
+            # Listed models exist, so ones recently missing are tried again
+            for model_id, model in map_concurrent(
+                    partial(self.api.fetch_model, use_negative_cache=False), model_ids,
+                    max_workers or self.api.max_workers, return_exceptions=True):
+                if isinstance(model, Exception):
+                    checkpoint["failed"].append(model_id)
+                elif model is None:
+                    checkpoint["missing"] += 1
+                else:
+                    batch[model["model_id"]] = model
+            self.cache_manager.save_models(batch)
+            self.api.negative_cache.flush(force=True)
+            checkpoint["fetched"] += len(batch)
+
+            # The batch is durable in the cache journal, so move past it
+            checkpoint["offset"] = offset + len(listed)
+            checkpoint["total"] = total
+            self._save_checkpoint(checkpoint)
+            if progress_callback:
+                progress_callback(min(checkpoint["offset"], total), total)
+
+            # Stop before requesting another page
+            if max_pages is not None and pages >= max_pages and checkpoint["offset"] < total:
+                complete = False
+                break
+
+        if complete:
+            self.cache_manager.compact()
+            if os.path.exists(self.checkpoint_path):
+                os.remove(self.checkpoint_path)
+
+        return {
+            "total": total,
+            "fetched": checkpoint["fetched"],
+            "skipped": checkpoint["skipped"],
+            "missing": checkpoint["missing"],
+            "failed": checkpoint["failed"],
+            "complete": complete,
+        }
+
+    def refresh(
+        self,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        max_workers: Optional[int] = None
+    ) -> Dict[str, List[str]]:
+        """
+        Bring the cache up to date with the listing, for scheduled updates.
+
+        The listing's modification timestamps are compared with the ones
+        seen by the last refresh, so only new and changed models are
+        requested, and those requests are conditional.
+
+        Args:
+            progress_callback: Optional callback for progress updates
+            max_workers: Number of threads, defaults to the client's max_workers
+
+        Returns:
+            Summary from BioModelsAPI.refresh_models
+        """
+        listing: Dict[str, Any] = {}
+        for _, _, models in self.iter_pages():
+            for entry in models:
+                if entry.get("id"):
+                    listing[entry["id"]] = entry.get("lastModified")
+        summary = self.api.refresh_models(
+            listing=listing, max_workers=max_workers, progress_callback=progress_callback)
+        self.cache_manager.compact()
+        return summary
@@ -0,0 +1,75 @@
+"""
+Manifest of downloaded model files and their SHA-256 hashes.
+"""
+import os
+import json
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+from .fileutil import atomic_open
+
+CHUNK_SIZE = 64 * 1024
+
+
+def sha256_file(filepath: str) -> str:
+    """
+    Hash a file without reading it into memory at once.
+
+    Args:
+        filepath: Path of the file to hash
+
+    Returns:
+        Hex SHA-256 digest of the file contents
+    """
+    hasher = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class DownloadManifest:
+    """Downloaded file records kept in downloads.json in the cache directory.
+
+    Each record holds:
+        - sha256: str - Hex SHA-256 digest of the file
+        - size: int - File size in bytes
+        - etag: Optional[str] - ETag of the response the file came from
+        - last_modified: Optional[str] - Last-Modified of that response
+        - partial: Optional[Dict] - Validators of an interrupted download,
+          used to resume it only if the file did not change upstream
+
+    The store is safe to share between download threads.
+    """
+
+    def __init__(self, cache_dir: str):
+        """
+        Initialize the manifest, loading existing records.
+
+        Args:
+            cache_dir: Cache directory holding downloads.json
+        """
+        self.path = os.path.join(cache_dir, "downloads.json")
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, "r") as f:
+                self.records: Dict[str, Dict[str, Any]] = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self.records = {}
+
+    def get(self, model_id: str) -> Optional[Dict[str, Any]]:
+        """Get the record of a model's file, if any."""
+        with self._lock:
+            record = self.records.get(model_id)
+            return dict(record) if record is not None else None
+
+    def update(self, model_id: str, **fields: Any) -> None:
+        """Update fields of a model's record, creating it if needed."""
+        with self._lock:
+            self.records.setdefault(model_id, {}).update(fields)
+
+    def save(self) -> None:
+        """Write the records to disk atomically."""
+        with self._lock:
+            with atomic_open(self.path) as f:
+                json.dump(self.records, f, indent=2, sort_keys=True)
@@ -0,0 +1,309 @@
+"""
+Compressed, content-addressed storage for cached model files.
+"""
+import os
+import io
+import json
+import gzip
+import lzma
+import glob
+import hashlib
+import tempfile
+import threading
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, Optional
+from .fileutil import atomic_open
+
+try:
+    import zstandard  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+CHUNK_SIZE = 64 * 1024
+
+# File name extension of stored objects for each codec
+CODECS = {"gzip": ".gz", "xz": ".xz", "zstd": ".zst"}
+
+
+def _compressor(codec: str, f: BinaryIO, level: Optional[int]) -> BinaryIO:
+    """Wrap a binary file in a compressing writer."""
+    if codec == "gzip":
+        # mtime=0 makes output reproducible, so identical files compress identically
+        return gzip.GzipFile(fileobj=f, mode="wb", mtime=0,
+                             compresslevel=9 if level is None else level)
+    if codec == "xz":
+        return lzma.LZMAFile(f, "wb", preset=6 if level is None else level)
+    if codec == "zstd":
+        cctx = zstandard.ZstdCompressor(level=19 if level is None else level)
+        return cctx.stream_writer(f, closefd=False)
+    raise ValueError(f"Unknown codec: {codec}")
+
+
+def _decompressor(codec: str, f: BinaryIO) -> BinaryIO:
+    """Wrap a binary file in a decompressing reader."""
+    if codec == "gzip":
+        return gzip.GzipFile(fileobj=f, mode="rb")
+    if codec == "xz":
+        return lzma.LZMAFile(f, "rb")
+    if codec == "zstd":
+        if zstandard is None:
+            raise ValueError("The zstd codec requires the zstandard package")
+        return zstandard.ZstdDecompressor().stream_reader(f, closefd=True)
+    raise ValueError(f"Unknown codec: {codec}")
+
+
+def _open_decompressed(codec: str, path: str) -> BinaryIO:
+    """Open a compressed file for reading; closing the reader closes the file."""
+    if codec == "gzip":
+        return gzip.open(path, "rb")
+    if codec == "xz":
+        return lzma.open(path, "rb")
+    raw = io.open(path, "rb")
+    try:
+        return _decompressor(codec, raw)
+    except BaseException:
+        raw.close()
+        raise
+
+
+class FileStore:
+    """Stores model files compressed, under the SHA-256 of their contents.
+
+    Objects live at objects/<first two hex digits>/<sha256><extension> under
+    the store root, so identical files (for example unchanged revisions)
+    are stored once. manifest.json maps each model ID to the hash, size and
+    codec of its current file.
+    """
+
+    def __init__(self, root: str, codec: str = "gzip", level: Optional[int] = None):
+        """
+        Initialize the store, creating its directories if needed.
+
+        Args:
+            root: Store directory
+            codec: Compression for new objects: "gzip", "xz" or "zstd"
+                (zstd requires the zstandard package)
+            level: Optional compression level for the codec
+
+        Raises:
+            ValueError: If the codec is unknown or unavailable
+        """
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec: {codec}")
+        if codec == "zstd" and zstandard is None:
+            raise ValueError("The zstd codec requires the zstandard package")
+        self.root = root
+        self.codec = codec
+        self.level = level
+        self.objects_dir = os.path.join(root, "objects")
+        self.tmp_dir = os.path.join(root, "tmp")
+        self.manifest_path = os.path.join(root, "manifest.json")
+        self._lock = threading.Lock()
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        try:
+            with open(self.manifest_path, "r") as f:
+                self.manifest: Dict[str, Dict[str, Any]] = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self.manifest = {}
+
+    def __contains__(self, model_id: object) -> bool:
+        return model_id in self.manifest
+
+    def __len__(self) -> int:
+        return len(self.manifest)
+
+    def object_path(self, sha256: str, codec: Optional[str] = None) -> str:
+        """Get the path of the object with the given hash and codec."""
+        ext = CODECS[codec or self.codec]
+        return os.path.join(self.objects_dir, sha256[:2], f"{sha256}{ext}")
+
+    def get(self, model_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the manifest record of a model's file.
+
+        Returns:
+            Dictionary with sha256, size (uncompressed bytes), stored_size
+            (compressed bytes) and codec, or None if the model has no file
+        """
+        with self._lock:
+            record = self.manifest.get(model_id)
+            return dict(record) if record is not None else None
+
+    def put_stream(self, model_id: str, chunks: Iterable[bytes], save: bool = True) -> str:
+        """
+        Store a file given as a stream of chunks, compressing on the fly.
+
+        Args:
+            model_id: Model ID the file belongs to
+            chunks: File contents
+            save: Write the manifest to disk; pass False when storing many
+                files and call save() afterwards
+
+        Returns:
+            Hex SHA-256 digest of the uncompressed contents
+        """
+        hasher = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir, suffix=CODECS[self.codec])
+        try:
+            with os.fdopen(fd, "wb") as raw:
+                writer = _compressor(self.codec, raw, self.level)
+                with writer:
+                    for chunk in chunks:
+                        hasher.update(chunk)
+                        size += len(chunk)
+                        writer.write(chunk)
+                raw.flush()
+                os.fsync(raw.fileno())
+            sha256 = hasher.hexdigest()
+
+            with self._lock:
+                path = self._find_object(sha256)
+                if path is None:
+                    path = self.object_path(sha256)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.replace(tmp_path, path)
+                codec = self._codec_of(path)
+                self.manifest[model_id] = {
+                    "sha256": sha256,
+                    "size": size,
+                    "stored_size": os.path.getsize(path),
+                    "codec": codec,
+                }
+                if save:
+                    self._save_manifest()
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return sha256
+
+    def put_file(self, model_id: str, filepath: str, remove: bool = False, save: bool = True) -> str:
+        """
+        Store a file from disk.
+
+        Args:
+            model_id: Model ID the file belongs to
+            filepath: Path of the uncompressed file
+            remove: Delete filepath once it is stored
+            save: Write the manifest to disk
+
+        Returns:
+            Hex SHA-256 digest of the file
+        """
+        with open(filepath, "rb") as f:
+            sha256 = self.put_stream(model_id, iter(lambda: f.read(CHUNK_SIZE), b""), save=save)
+        if remove:
+            os.remove(filepath)
+        return sha256
+
+    def import_directory(self, directory: str, pattern: str = "*.xml") -> int:
+        """
+        Store files named <model_id><extension>, such as the cache's <ID>.xml files.
+
+        Args:
+            directory: Directory to import from
+            pattern: Glob pattern selecting the files
+
+        Returns:
+            Number of files imported
+        """
+        count = 0
+        for filepath in sorted(glob.glob(os.path.join(directory, pattern))):
+            model_id = os.path.splitext(os.path.basename(filepath))[0]
+            self.put_file(model_id, filepath, save=False)
+            count += 1
+        self.save()
+        return count
+
+    def open(self, model_id: str) -> BinaryIO:
+        """
+        Open a model's file for reading, decompressing on the fly.
+
+        Args:
+            model_id: Model ID
+
+        Returns:
+            Binary file object yielding the uncompressed contents
+
+        Raises:
+            KeyError: If the model has no stored file
+        """
+        record = self.get(model_id)
+        if record is None:
+            raise KeyError(model_id)
+        path = self.object_path(record["sha256"], record["codec"])
+        return _open_decompressed(record["codec"], path)
+
+    def read_chunks(self, model_id: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        Stream a model's uncompressed file contents.
+
+        Args:
+            model_id: Model ID
+            chunk_size: Maximum size of each chunk
+
+        Yields:
+            Chunks of the file
+        """
+        with self.open(model_id) as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                yield chunk
+
+    def export(self, model_id: str, filepath: str) -> None:
+        """
+        Write a model's uncompressed file to disk.
+
+        Args:
+            model_id: Model ID
+            filepath: Destination path
+        """
+        with atomic_open(filepath, "wb") as f:
+            for chunk in self.read_chunks(model_id):
+                f.write(chunk)
+
+    def remove(self, model_id: str) -> None:
+        """Drop a model from the manifest; its object is kept until gc()."""
+        with self._lock:
+            if self.manifest.pop(model_id, None) is not None:
+                self._save_manifest()
+
+    def gc(self) -> int:
+        """
+        Delete objects no longer referenced by the manifest.
+
+        Returns:
+            Number of objects deleted
+        """
+        with self._lock:
+            referenced = {
+                self.object_path(record["sha256"], record["codec"])
+                for record in self.manifest.values()
+            }
+            removed = 0
+            for path in glob.glob(os.path.join(self.objects_dir, "*", "*")):
+                if path not in referenced:
+                    os.remove(path)
+                    removed += 1
+            return removed
+
+    def save(self) -> None:
+        """Write the manifest to disk atomically."""
+        with self._lock:
+            self._save_manifest()
+
+    def _find_object(self, sha256: str) -> Optional[str]:
+        """Find an existing object with the given hash, in any codec."""
+        for codec in CODECS:
+            path = self.object_path(sha256, codec)
+            if os.path.exists(path):
+                return path
+        return None
+
+    @staticmethod
+    def _codec_of(path: str) -> str:
+        ext = os.path.splitext(path)[1]
+        return next(codec for codec, codec_ext in CODECS.items() if codec_ext == ext)
+
+    def _save_manifest(self) -> None:
+        with atomic_open(self.manifest_path) as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
@@ -0,0 +1,125 @@
+"""
+Crash-safe file writing and advisory locking for cache files.
+"""
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import IO, Iterator
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def atomic_open(path: str, mode: str = "w", encoding: str = "utf-8") -> Iterator[IO]:
+    """
+    Open a temporary file that atomically replaces path when closed.
+
+    The data is written to a temporary file in the same directory, flushed
+    and fsynced, then renamed over path. Readers see either the old file or
+    the complete new one, never a partial write. If the block raises, the
+    temporary file is removed and path is left untouched.
+
+    Args:
+        path: Destination file path
+        mode: "w" for text or "wb" for binary
+        encoding: Text encoding, ignored in binary mode
+
+    Yields:
+        The open temporary file
+    """
+    if mode not in ("w", "wb"):
+        raise ValueError("mode must be 'w' or 'wb'")
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        if mode == "wb":
+            f = os.fdopen(fd, mode)
+        else:
+            f = os.fdopen(fd, mode, encoding=encoding)
+        with f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    _fsync_dir(directory)
+
+
+def _fsync_dir(directory: str) -> None:
+    """Persist a rename by fsyncing its directory, where supported."""
+    if fcntl is None:  # pragma: no cover - Windows
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def keep_backup(path: str, backup_path: str) -> None:
+    """
+    Point backup_path at the current contents of path.
+
+    A hard link is used where possible, so no data is copied and path is
+    never missing, even briefly.
+
+    Args:
+        path: File to back up
+        backup_path: Backup file path
+    """
+    if not os.path.exists(path):
+        return
+    tmp_path = f"{backup_path}.tmp"
+    try:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        os.link(path, tmp_path)
+    except OSError:
+        with open(path, "rb") as src, atomic_open(tmp_path, "wb") as dst:
+            for chunk in iter(lambda: src.read(1 << 20), b""):
+                dst.write(chunk)
+    os.replace(tmp_path, backup_path)
+
+
+@contextmanager
+def file_lock(path: str, shared: bool = False) -> Iterator[None]:
+    """
+    Hold an advisory lock on a lock file for the duration of the block.
+
+    Cooperating processes (and threads) that take the same lock are
+    serialized. Exclusive locks wait for all other holders; shared locks only
+    wait for exclusive ones. Windows has no shared locks, so every lock is
+    exclusive there.
+
+    Args:
+        path: Lock file path, created if it doesn't exist
+        shared: Take a shared (reader) lock instead of an exclusive one
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        else:  # pragma: no cover - Windows
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:  # pragma: no cover - Windows
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    finally:
+        os.close(fd)
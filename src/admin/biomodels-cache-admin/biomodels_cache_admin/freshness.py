@@ -0,0 +1,62 @@
+"""
+Per-model freshness data used to refresh only models that changed upstream.
+"""
+import os
+import json
+import hashlib
+from typing import Any, Dict, Optional
+from .fileutil import atomic_open
+
+
+def content_hash(model: Dict[str, Any]) -> str:
+    """
+    Hash model metadata independently of key order.
+
+    Args:
+        model: Model metadata
+
+    Returns:
+        Hex SHA-256 digest of the canonical JSON encoding
+    """
+    encoded = json.dumps(dict(model), sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class FreshnessStore:
+    """Freshness records kept in freshness.json next to the cache file.
+
+    Each record may hold:
+        - etag: str - ETag of the last full response
+        - last_modified: str - Last-Modified header of the last full response
+        - listed: Any - Modification timestamp from the search listing
+        - content_hash: str - content_hash of the cached normalized model
+        - checked: str - When the model was last checked upstream (UTC ISO 8601)
+    """
+
+    def __init__(self, cache_dir: str):
+        """
+        Initialize the store, loading existing records.
+
+        Args:
+            cache_dir: Cache directory holding freshness.json
+        """
+        self.path = os.path.join(cache_dir, "freshness.json")
+        self.records: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(self.path, "r") as f:
+                self.records = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self.records = {}
+
+    def get(self, model_id: str) -> Optional[Dict[str, Any]]:
+        """Get the freshness record of a model, if any."""
+        return self.records.get(model_id)
+
+    def set(self, model_id: str, record: Dict[str, Any]) -> None:
+        """Replace the freshness record of a model."""
+        self.records[model_id] = record
+
+    def save(self) -> None:
+        """Write the records to disk atomically."""
+        with atomic_open(self.path) as f:
+            json.dump(self.records, f, indent=2, sort_keys=True)
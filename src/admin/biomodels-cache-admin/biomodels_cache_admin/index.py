@@ -0,0 +1,462 @@
+"""
+In-memory search indexes for cached BioModels metadata.
+"""
+import bisect
+import math
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Fields matched by CacheManager.search_models
+SEARCH_FIELDS = ("name", "title", "synopsis")
+
+# Field weights for ranked search, following the scoring in the design doc
+RANK_FIELDS = {"name": 3.0, "title": 3.0, "authors": 2.0, "synopsis": 1.0}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercased alphanumeric terms."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+class _OrderedIndex:
+    """Base class tracking the insertion order of indexed model IDs."""
+
+    def __init__(self):
+        # Insertion order of model IDs, so results keep the cache's order
+        self._order: Dict[str, int] = {}
+        self._next_order = 0
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __contains__(self, model_id: object) -> bool:
+        return model_id in self._order
+
+    def _track(self, model_id: str) -> None:
+        if model_id not in self._order:
+            self._order[model_id] = self._next_order
+            self._next_order += 1
+
+    def order(self, model_id: str) -> int:
+        """Get the insertion position of an indexed model ID."""
+        return self._order[model_id]
+
+    def clear(self) -> None:
+        """Remove everything from the index."""
+        self._order.clear()
+        self._next_order = 0
+
+    def build(self, models: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Rebuild the index from a model dictionary.
+
+        Args:
+            models: Mapping of model ID to model metadata
+        """
+        self.clear()
+        for model_id, model in models.items():
+            self.add(model_id, model)
+
+    def add(self, model_id: str, model: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def remove(self, model_id: str, model: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+
+class NGramIndex(_OrderedIndex):
+    """Character n-gram postings index for case-insensitive substring search.
+
+    Every lowercased search field is split into overlapping n-grams and each
+    n-gram maps to the IDs of the models containing it. The candidates for a
+    query are the intersection of the postings of the query's own n-grams.
+    Candidates must still be verified by the caller, since n-grams can occur
+    in the wrong order or in different fields.
+    """
+
+    def __init__(self, n: int = 3, fields: Iterable[str] = SEARCH_FIELDS):
+        """
+        Initialize an empty index.
+
+        Args:
+            n: Length of the indexed n-grams
+            fields: Model fields to index
+        """
+        if n < 1:
+            raise ValueError("n must be at least 1")
+        super().__init__()
+        self.n = n
+        self.fields = tuple(fields)
+        self._postings: Dict[str, Set[str]] = {}
+
+    def _grams(self, text: str) -> Set[str]:
+        n = self.n
+        return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+    def _model_grams(self, model: Dict[str, Any]) -> Set[str]:
+        grams: Set[str] = set()
+        for field in self.fields:
+            value = model.get(field)
+            if isinstance(value, str):
+                grams |= self._grams(value.lower())
+        return grams
+
+    def add(self, model_id: str, model: Dict[str, Any]) -> None:
+        """
+        Index a model. Replaced models must be removed first.
+
+        Args:
+            model_id: Model ID used as the cache key
+            model: Model metadata
+        """
+        self._track(model_id)
+        for gram in self._model_grams(model):
+            ids = self._postings.get(gram)
+            if ids is None:
+                self._postings[gram] = {model_id}
+            else:
+                ids.add(model_id)
+
+    def remove(self, model_id: str, model: Dict[str, Any]) -> None:
+        """
+        Remove the postings of a previously indexed model.
+
+        The model keeps its position in the result order, matching the way a
+        dict keeps the position of a key whose value is replaced.
+
+        Args:
+            model_id: Model ID used as the cache key
+            model: The model metadata that was indexed for model_id
+        """
+        for gram in self._model_grams(model):
+            ids = self._postings.get(gram)
+            if ids is not None:
+                ids.discard(model_id)
+                if not ids:
+                    del self._postings[gram]
+
+    def clear(self) -> None:
+        """Remove everything from the index."""
+        super().clear()
+        self._postings.clear()
+
+    def candidates(self, query: str) -> Optional[List[str]]:
+        """
+        Get the IDs of models that may contain query.
+
+        Args:
+            query: Search query string
+
+        Returns:
+            Candidate model IDs in insertion order, or None if the query is
+            shorter than n and the index cannot narrow the search
+        """
+        grams = self._grams(query.lower())
+        if not grams:
+            return None
+
+        postings = []
+        for gram in grams:
+            ids = self._postings.get(gram)
+            if not ids:
+                return []
+            postings.append(ids)
+
+        postings.sort(key=len)
+        result = set(postings[0])
+        for ids in postings[1:]:
+            result &= ids
+            if not result:
+                return []
+        return sorted(result, key=self._order.__getitem__)
+
+
+class BM25Index(_OrderedIndex):
+    """Field-weighted BM25 (BM25F) term index used for relevance ranking.
+
+    Term frequencies are kept per field. At query time each field's frequency
+    is normalized by that field's length relative to its average, weighted,
+    summed, and passed through the usual BM25 saturation.
+    """
+
+    def __init__(
+        self,
+        field_weights: Optional[Dict[str, float]] = None,
+        k1: float = 1.2,
+        b: float = 0.75
+    ):
+        """
+        Initialize an empty index.
+
+        Args:
+            field_weights: Mapping of model field to weight
+            k1: Term frequency saturation parameter
+            b: Length normalization parameter
+        """
+        super().__init__()
+        self.field_weights = dict(field_weights or RANK_FIELDS)
+        self.fields = tuple(self.field_weights)
+        self.k1 = k1
+        self.b = b
+        # term -> model ID -> per-field term frequencies
+        self._postings: Dict[str, Dict[str, Tuple[int, ...]]] = {}
+        self._lengths: Dict[str, Tuple[int, ...]] = {}
+        self._total_lengths = [0] * len(self.fields)
+
+    def _field_terms(self, model: Dict[str, Any]) -> List[List[str]]:
+        terms = []
+        for field in self.fields:
+            value = model.get(field)
+            if isinstance(value, list):
+                value = " ".join(v for v in value if isinstance(v, str))
+            terms.append(tokenize(value) if isinstance(value, str) else [])
+        return terms
+
+    def add(self, model_id: str, model: Dict[str, Any]) -> None:
+        """
+        Index a model. Replaced models must be removed first.
+
+        Args:
+            model_id: Model ID used as the cache key
+            model: Model metadata
+        """
+        self._track(model_id)
+        field_terms = self._field_terms(model)
+        counts: Dict[str, List[int]] = {}
+        for i, terms in enumerate(field_terms):
+            self._total_lengths[i] += len(terms)
+            for term in terms:
+                tfs = counts.get(term)
+                if tfs is None:
+                    tfs = counts[term] = [0] * len(self.fields)
+                tfs[i] += 1
+        for term, tfs in counts.items():
+            self._postings.setdefault(term, {})[model_id] = tuple(tfs)
+        self._lengths[model_id] = tuple(len(terms) for terms in field_terms)
+
+    def remove(self, model_id: str, model: Dict[str, Any]) -> None:
+        """
+        Remove a previously indexed model.
+
+        Args:
+            model_id: Model ID used as the cache key
+            model: The model metadata that was indexed for model_id
+        """
+        lengths = self._lengths.pop(model_id, None)
+        if lengths is None:
+            return
+        for i, length in enumerate(lengths):
+            self._total_lengths[i] -= length
+        for terms in self._field_terms(model):
+            for term in terms:
+                docs = self._postings.get(term)
+                if docs is not None:
+                    docs.pop(model_id, None)
+                    if not docs:
+                        del self._postings[term]
+
+    def clear(self) -> None:
+        """Remove everything from the index."""
+        super().clear()
+        self._postings.clear()
+        self._lengths.clear()
+        self._total_lengths = [0] * len(self.fields)
+
+    def score(self, query: str) -> Dict[str, float]:
+        """
+        Score every model containing at least one query term.
+
+        Args:
+            query: Search query string
+
+        Returns:
+            Mapping of model ID to relevance score
+        """
+        count = len(self._lengths)
+        if not count:
+            return {}
+        averages = [(total / count) or 1.0 for total in self._total_lengths]
+        weights = [self.field_weights[field] for field in self.fields]
+        k1, b = self.k1, self.b
+
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query)):
+            docs = self._postings.get(term)
+            if not docs:
+                continue
+            df = len(docs)
+            idf = math.log(1.0 + (count - df + 0.5) / (df + 0.5))
+            for model_id, tfs in docs.items():
+                lengths = self._lengths[model_id]
+                tf = 0.0
+                for weight, freq, length, average in zip(weights, tfs, lengths, averages):
+                    if freq:
+                        tf += weight * freq / (1.0 - b + b * length / average)
+                scores[model_id] = scores.get(model_id, 0.0) + idf * tf / (k1 + tf)
+        return scores
+
+
+def date_ordinal(value: Any) -> Optional[int]:
+    """
+    Parse a YYYY-MM-DD date strictly, as the dateRange filter does.
+
+    Returns:
+        Proleptic Gregorian ordinal of the date, or None if it does not parse
+    """
+    if not isinstance(value, str):
+        return None
+    return _parse_date_ordinal(value)
+
+
+@lru_cache(maxsize=4096)
+def _parse_date_ordinal(value: str) -> Optional[int]:
+    # Memoized, since many models share a publication date
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").toordinal()
+    except ValueError:
+        return None
+
+
+class FilterIndex(_OrderedIndex):
+    """Secondary indexes for the authors, journals and dateRange filters.
+
+    Lowercased author names and journal names map to the IDs of their
+    models, and dates are kept in a sorted list searched with bisect.
+    Models whose date does not parse are kept apart, since the dateRange
+    filter reports them as errors rather than skipping them.
+    """
+
+    # Filters that candidates() can evaluate
+    FILTERS = ("authors", "journals", "dateRange")
+
+    def __init__(self):
+        super().__init__()
+        self._authors: Dict[str, Set[str]] = {}
+        self._journals: Dict[str, Set[str]] = {}
+        # Sorted (date ordinal, model ID) pairs
+        self._dates: List[Tuple[int, str]] = []
+        self._undated: Set[str] = set()
+
+    @staticmethod
+    def _keys(model: Dict[str, Any]) -> Tuple[Set[str], Optional[str], Optional[int]]:
+        authors = model.get("authors")
+        journal = model.get("journal")
+        return (
+            {a.lower() for a in authors if isinstance(a, str)} if isinstance(authors, list) else set(),
+            journal.lower() if isinstance(journal, str) else None,
+            date_ordinal(model.get("date")),
+        )
+
+    def build(self, models: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Rebuild the index from a model dictionary, sorting the dates once.
+
+        Args:
+            models: Mapping of model ID to model metadata
+        """
+        self.clear()
+        for model_id, model in models.items():
+            date = self._add_keys(model_id, model)
+            if date is not None:
+                self._dates.append((date, model_id))
+        self._dates.sort()
+
+    def add(self, model_id: str, model: Dict[str, Any]) -> None:
+        """
+        Index a model. Replaced models must be removed first.
+
+        Args:
+            model_id: Model ID used as the cache key
+            model: Model metadata
+        """
+        date = self._add_keys(model_id, model)
+        if date is not None:
+            bisect.insort(self._dates, (date, model_id))
+
+    def _add_keys(self, model_id: str, model: Dict[str, Any]) -> Optional[int]:
+        """Index a model's authors and journal, returning its date ordinal for the caller to index."""
+        self._track(model_id)
+        authors, journal, date = self._keys(model)
+        for author in authors:
+            self._authors.setdefault(author, set()).add(model_id)
+        if journal is not None:
+            self._journals.setdefault(journal, set()).add(model_id)
+        if date is None:
+            self._undated.add(model_id)
+        return date
+
+    def remove(self, model_id: str, model: Dict[str, Any]) -> None:
+        """
+        Remove a previously indexed model.
+
+        Args:
+            model_id: Model ID used as the cache key
+            model: The model metadata that was indexed for model_id
+        """
+        authors, journal, date = self._keys(model)
+        for author in authors:
+            self._discard(self._authors, author, model_id)
+        if journal is not None:
+            self._discard(self._journals, journal, model_id)
+        if date is None:
+            self._undated.discard(model_id)
+        else:
+            position = bisect.bisect_left(self._dates, (date, model_id))
+            if position < len(self._dates) and self._dates[position] == (date, model_id):
+                del self._dates[position]
+
+    @staticmethod
+    def _discard(postings: Dict[str, Set[str]], key: str, model_id: str) -> None:
+        ids = postings.get(key)
+        if ids is not None:
+            ids.discard(model_id)
+            if not ids:
+                del postings[key]
+
+    def clear(self) -> None:
+        """Remove everything from the index."""
+        super().clear()
+        self._authors.clear()
+        self._journals.clear()
+        self._dates.clear()
+        self._undated.clear()
+
+    def candidates(
+        self,
+        filters: Dict[str, Any],
+        date_range: Optional[Tuple[int, int]] = None
+    ) -> Optional[Set[str]]:
+        """
+        Get the IDs of models that may pass the indexed filters.
+
+        Args:
+            filters: Search filters; authors and journals are used
+            date_range: (start, end) date ordinals of the dateRange filter
+
+        Returns:
+            IDs of the models matching every indexed filter, plus models
+            with unparseable dates when date_range is given; or None if no
+            indexed filter applies
+        """
+        sets = []
+        if "authors" in filters:
+            sets.append(set().union(*(self._authors.get(a.lower(), ()) for a in filters["authors"])))
+        if "journals" in filters:
+            sets.append(set().union(*(self._journals.get(j.lower(), ()) for j in filters["journals"])))
+        if date_range is not None:
+            start, end = date_range
+            low = bisect.bisect_left(self._dates, (start, ""))
+            high = bisect.bisect_left(self._dates, (end + 1, ""))
+            sets.append({model_id for _, model_id in self._dates[low:high]} | self._undated)
+        if not sets:
+            return None
+
+        sets.sort(key=len)
+        result = set(sets[0])
+        for ids in sets[1:]:
+            result &= ids
+        return result
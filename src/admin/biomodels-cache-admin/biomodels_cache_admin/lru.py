@@ -0,0 +1,139 @@
+"""
+Thread-safe bounded LRU cache with hit, miss and eviction counters.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """Mapping of a bounded number or total weight of entries that evicts
+    the least recently used.
+
+    All methods are safe to call from several threads.
+    """
+
+    def __init__(
+        self,
+        maxsize: Optional[int] = 128,
+        max_weight: Optional[int] = None,
+        weigh: Optional[Callable[[Any], int]] = None
+    ):
+        """
+        Initialize an empty cache.
+
+        Args:
+            maxsize: Maximum number of entries; 0 disables caching and
+                None leaves the number unbounded
+            max_weight: Maximum total weight of the entries, or None
+            weigh: Function giving the weight of a value, such as its size
+                in bytes; required with max_weight
+        """
+        if maxsize is not None and maxsize < 0:
+            raise ValueError("maxsize must not be negative")
+        if max_weight is not None and (max_weight < 0 or weigh is None):
+            raise ValueError("max_weight must not be negative and needs a weigh function")
+        self.maxsize = maxsize
+        self.max_weight = max_weight
+        self.weigh = weigh
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.weight = 0
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._weights: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """
+        Get an entry and mark it as recently used.
+
+        Args:
+            key: Entry key
+            default: Value returned if the key is not cached
+
+        Returns:
+            The cached value, or default
+        """
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Add or replace an entry, evicting the least recently used if full.
+
+        A value weighing more than max_weight is not cached.
+
+        Args:
+            key: Entry key
+            value: Value to cache
+        """
+        if self.maxsize == 0:
+            return
+        weight = self.weigh(value) if self.weigh is not None else 0
+        with self._lock:
+            self._remove(key)
+            if self.max_weight is not None and weight > self.max_weight:
+                return
+            self._entries[key] = value
+            self._weights[key] = weight
+            self.weight += weight
+            while ((self.maxsize is not None and len(self._entries) > self.maxsize)
+                   or (self.max_weight is not None and self.weight > self.max_weight)):
+                oldest, _ = self._entries.popitem(last=False)
+                self.weight -= self._weights.pop(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: Hashable) -> Any:
+        value = self._entries.pop(key, None)
+        self.weight -= self._weights.pop(key, 0)
+        return value
+
+    def pop(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Remove an entry and return its value, or default if it is not cached."""
+        with self._lock:
+            if key not in self._entries:
+                return default
+            return self._remove(key)
+
+    def clear(self) -> None:
+        """Remove every entry; the counters are kept."""
+        with self._lock:
+            self._entries.clear()
+            self._weights.clear()
+            self.weight = 0
+
+    def info(self) -> Dict[str, Any]:
+        """
+        Get usage statistics.
+
+        Returns:
+            Dictionary with hits, misses, evictions, hit_ratio (hits over
+            lookups, or None before the first lookup), size, maxsize,
+            weight and max_weight
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else None,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "weight": self.weight,
+                "max_weight": self.max_weight,
+            }
@@ -0,0 +1,239 @@
+"""
+Counters, latency histograms and gauges for the cache and API hot paths.
+"""
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds of the latency histogram buckets
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Prefix of the metric names in the Prometheus text format
+PREFIX = "biomodels_"
+
+# Built-in metrics, as name: (type, help)
+DESCRIPTIONS = {
+    "cache_hits_total": ("counter", "CacheManager.get_model lookups found in the cache"),
+    "cache_misses_total": ("counter", "CacheManager.get_model lookups not found in the cache"),
+    "upstream_requests_total": ("counter", "Requests sent to the BioModels API, by endpoint and status"),
+    "upstream_request_seconds": ("histogram", "Time until the BioModels API responded, by endpoint"),
+    "downloaded_bytes_total": ("counter", "Bytes received from the BioModels API, by endpoint"),
+    "cache_save_seconds": ("histogram", "Time taken to save and compact the cache, by backend"),
+    "search_seconds": ("histogram", "Search latency, by method and query shape"),
+    "records": ("gauge", "Models in the cache"),
+    "records_in_memory": ("gauge", "Models held in memory"),
+    "record_bytes": ("gauge", "Estimated size of the models held in memory"),
+    "negative_cache_saved_total": ("counter", "Upstream requests answered by the negative cache, by reason"),
+    "server_requests_total": ("counter", "Requests answered by the cache server, by endpoint and status"),
+    "server_request_seconds": ("histogram", "Time taken to answer cache server requests, by endpoint"),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+# Called after every timed operation with its name, labels, start (UNIX
+# time), duration in seconds and the exception it raised, if any
+Hook = Callable[[str, Dict[str, str], float, float, Optional[BaseException]], None]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        f'{key}="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for key, value in labels
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metrics:
+    """Registry of counters, histograms and gauges.
+
+    Counters and histograms are keyed by name and labels; gauges are
+    functions evaluated when a snapshot is taken. Hooks added with add_hook
+    see every operation timed with timer(), for example to record them as
+    tracing spans. All methods are safe to call from several threads.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Initialize an empty registry.
+
+        Args:
+            buckets: Upper bounds in seconds of the histogram buckets
+        """
+        self.buckets = tuple(sorted(buckets))
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        # Per name and labels: [count per bucket, sum, count]
+        self._histograms: Dict[str, Dict[Labels, List[Any]]] = {}
+        self._gauges: Dict[str, Callable[[], Optional[float]]] = {}
+        self._hooks: List[Hook] = []
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        """Add to a counter."""
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels: Any) -> None:
+        """Record a duration in a histogram."""
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram[0][i] += 1
+                    break
+            histogram[1] += seconds
+            histogram[2] += 1
+
+    def set_gauge(self, name: str, read: Callable[[], Optional[float]]) -> None:
+        """
+        Register a gauge, replacing any gauge of the same name.
+
+        Args:
+            name: Gauge name
+            read: Function returning the current value, or None to leave
+                the gauge out
+        """
+        with self._lock:
+            self._gauges[name] = read
+
+    def add_hook(self, hook: Hook) -> None:
+        """Call a function after every timed operation; exceptions it raises are logged."""
+        with self._lock:
+            self._hooks.append(hook)
+
+    def remove_hook(self, hook: Hook) -> None:
+        """Stop calling a hook added with add_hook."""
+        with self._lock:
+            self._hooks.remove(hook)
+
+    @contextmanager
+    def timer(self, name: str, **labels: Any) -> Iterator[None]:
+        """
+        Time a block into a histogram and report it to the hooks.
+
+        The duration is recorded whether or not the block raises.
+
+        Args:
+            name: Histogram name
+            **labels: Histogram labels
+        """
+        start = time.time()
+        started = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            duration = time.perf_counter() - started
+            self.observe(name, duration, **labels)
+            for hook in list(self._hooks):
+                try:
+                    hook(name, dict(labels), start, duration, error)
+                except Exception:
+                    logger.exception("Metrics hook %r failed", hook)
+
+    def value(self, name: str, **labels: Any) -> Optional[float]:
+        """
+        Get the current value of a counter or gauge, or the number of
+        observations of a histogram.
+
+        Returns:
+            The value, or None if nothing was recorded under these labels
+        """
+        key = _labels(labels)
+        with self._lock:
+            if name in self._counters:
+                return self._counters[name].get(key)
+            if name in self._histograms:
+                histogram = self._histograms[name].get(key)
+                return histogram[2] if histogram is not None else None
+            read = self._gauges.get(name)
+        return read() if read is not None and not key else None
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get every metric's current values.
+
+        Returns:
+            Dictionary mapping each metric name to:
+                - type: str - "counter", "histogram" or "gauge"
+                - help: str - Description of the metric
+                - samples: List[Dict[str, Any]] - One entry per set of
+                  labels, with "labels" and, for counters and gauges,
+                  "value", or for histograms "count", "sum" and "buckets"
+                  (cumulative counts keyed by upper bound)
+        """
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {
+                name: {key: (list(h[0]), h[1], h[2]) for key, h in series.items()}
+                for name, series in self._histograms.items()
+            }
+            gauges = dict(self._gauges)
+
+        metrics: Dict[str, Dict[str, Any]] = {}
+        for name, series in sorted(counters.items()):
+            metrics[name] = self._entry(name, "counter", [
+                {"labels": dict(key), "value": value} for key, value in sorted(series.items())])
+        for name, series in sorted(histograms.items()):
+            samples = []
+            for key, (counts, total, count) in sorted(series.items()):
+                cumulative, buckets = 0, {}
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    buckets[bound] = cumulative
+                samples.append({"labels": dict(key), "count": count, "sum": total, "buckets": buckets})
+            metrics[name] = self._entry(name, "histogram", samples)
+        for name, read in sorted(gauges.items()):
+            value = read()
+            if value is not None:
+                metrics[name] = self._entry(name, "gauge", [{"labels": {}, "value": value}])
+        return metrics
+
+    @staticmethod
+    def _entry(name: str, kind: str, samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return {"type": kind, "help": DESCRIPTIONS.get(name, ("", ""))[1], "samples": samples}
+
+    def prometheus(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            The metrics, with names prefixed by PREFIX
+        """
+        lines = []
+        for name, metric in self.snapshot().items():
+            full_name = PREFIX + name
+            if metric["help"]:
+                lines.append(f"# HELP {full_name} {metric['help']}")
+            lines.append(f"# TYPE {full_name} {metric['type']}")
+            for sample in metric["samples"]:
+                labels = _labels(sample["labels"])
+                if metric["type"] != "histogram":
+                    lines.append(f"{full_name}{_format_labels(labels)} {_format_value(sample['value'])}")
+                    continue
+                for bound, count in sample["buckets"].items():
+                    lines.append(f"{full_name}_bucket{_format_labels(labels + (('le', _format_value(bound)),))} {count}")
+                lines.append(f"{full_name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {sample['count']}")
+                lines.append(f"{full_name}_sum{_format_labels(labels)} {_format_value(sample['sum'])}")
+                lines.append(f"{full_name}_count{_format_labels(labels)} {sample['count']}")
+        return "\n".join(lines) + "\n"
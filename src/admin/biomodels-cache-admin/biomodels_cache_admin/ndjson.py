@@ -0,0 +1,113 @@
+"""
+Streaming newline-delimited JSON files of model records, optionally compressed.
+"""
+import json
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, Mapping, Optional
+from .codec import JSONCodec, get_codec
+from .fileutil import atomic_open
+from .filestore import CODECS, _compressor, _decompressor
+
+# Bytes read at a time when splitting a file into lines
+READ_SIZE = 64 * 1024
+
+
+def codec_for_path(path: str) -> Optional[str]:
+    """
+    Get the compression codec matching a file name extension.
+
+    Returns:
+        "gzip" for .gz, "xz" for .xz, "zstd" for .zst, else None
+    """
+    for codec, extension in CODECS.items():
+        if path.endswith(extension):
+            return codec
+    return None
+
+
+def _lines(f: BinaryIO) -> Iterator[bytes]:
+    """Split a binary stream into lines, read in blocks any decompressor supports."""
+    pending = b""
+    for block in iter(lambda: f.read(READ_SIZE), b""):
+        lines = (pending + block).split(b"\n")
+        pending = lines.pop()
+        yield from lines
+    if pending:
+        yield pending
+
+
+def write_ndjson(
+    path: str,
+    models: Iterable[Mapping[str, Any]],
+    codec: Optional[str] = None,
+    json_codec: Optional[JSONCodec] = None
+) -> int:
+    """
+    Write records to a file, one compact JSON object per line.
+
+    Records are encoded as they are consumed, so models can be a generator
+    and memory use does not grow with the number of records. The file is
+    replaced atomically once complete.
+
+    Args:
+        path: File path
+        models: Records to write
+        codec: "gzip", "xz" or "zstd"; defaults to codec_for_path(path)
+        json_codec: JSON codec of the records, defaults to get_codec()
+
+    Returns:
+        Number of records written
+    """
+    codec = codec or codec_for_path(path)
+    json_codec = get_codec(json_codec)
+    count = 0
+    with atomic_open(path, "wb") as raw:
+        f = _compressor(codec, raw, None) if codec else raw
+        try:
+            for model in models:
+                f.write(json_codec.dumps(model) + b"\n")
+                count += 1
+        finally:
+            if codec:
+                f.close()
+    return count
+
+
+def iter_ndjson(
+    path: str,
+    codec: Optional[str] = None,
+    json_codec: Optional[JSONCodec] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Read records from a newline-delimited JSON file one at a time.
+
+    Blank lines are skipped.
+
+    Args:
+        path: File path
+        codec: "gzip", "xz" or "zstd"; defaults to codec_for_path(path)
+        json_codec: JSON codec of the records, defaults to get_codec()
+
+    Yields:
+        Each record in file order
+
+    Raises:
+        ValueError: If a line is not a JSON object
+    """
+    codec = codec or codec_for_path(path)
+    json_codec = get_codec(json_codec)
+    with open(path, "rb") as raw:
+        f = _decompressor(codec, raw) if codec else raw
+        try:
+            for number, line in enumerate(_lines(f), 1):
+                if not line.strip():
+                    continue
+                try:
+                    model = json_codec.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Invalid JSON on line {number} of {path}: {str(e)}")
+                if not isinstance(model, dict):
+                    raise ValueError(f"Line {number} of {path} is not a JSON object")
+                yield model
+        finally:
+            if codec:
+                f.close()
@@ -0,0 +1,199 @@
+"""
+Negative cache of model IDs that were recently missing upstream or failing.
+"""
+import os
+import json
+import time
+import threading
+from typing import Any, Dict, Optional, Set
+from .fileutil import atomic_open, file_lock
+from .metrics import Metrics
+
+MISSING = "missing"
+ERROR = "error"
+
+
+class NegativeCache:
+    """Not-found and failed lookups kept in negative_cache.json next to the cache file.
+
+    Each entry holds:
+        - reason: str - "missing" for a 404, "error" for a failed request
+        - expires: float - When the entry lapses (UNIX time)
+        - error: str - Message of the failure, for "error" entries
+
+    Entries are kept for ttl seconds (missing models) or error_ttl seconds
+    (failures); a TTL of 0 disables that kind of entry. Expired entries are
+    dropped when they are looked up and when the file is saved.
+
+    Changes are written in batches by flush, merged under a file lock with
+    the entries other processes saved in the meantime.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        ttl: float = 3600.0,
+        error_ttl: float = 0.0,
+        save_interval: float = 60.0,
+        metrics: Optional[Metrics] = None
+    ):
+        """
+        Initialize the cache, loading existing entries.
+
+        Args:
+            cache_dir: Cache directory holding negative_cache.json
+            ttl: Seconds to remember that a model does not exist
+            error_ttl: Seconds to remember that a request for a model failed
+            save_interval: Least number of seconds between the saves made
+                by flush
+            metrics: Registry to count avoided requests in, as
+                negative_cache_saved_total; defaults to a new one
+        """
+        if ttl < 0 or error_ttl < 0:
+            raise ValueError("TTLs must not be negative")
+        self.path = os.path.join(cache_dir, "negative_cache.json")
+        self.lock_file = self.path + ".lock"
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.save_interval = save_interval
+        self.metrics = metrics if metrics is not None else Metrics()
+        # Upstream requests avoided by an entry
+        self.saved = 0
+        self._lock = threading.Lock()
+        # IDs added and discarded since the last save
+        self._added: Set[str] = set()
+        self._discarded: Set[str] = set()
+        # Monotonic time of the last save; none yet, so the first flush saves
+        self._saved_at = float("-inf")
+        self.entries: Dict[str, Dict[str, Any]] = self._read()
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def get(self, model_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the unexpired entry of a model, counting it as a saved request.
+
+        Returns:
+            The entry, or None if the model should be requested
+        """
+        with self._lock:
+            entry = self.entries.get(model_id)
+            if entry is None:
+                return None
+            if entry["expires"] <= time.time():
+                del self.entries[model_id]
+                return None
+            self.saved += 1
+        self.metrics.inc("negative_cache_saved_total", reason=entry["reason"])
+        return entry
+
+    def add_missing(self, model_id: str) -> bool:
+        """
+        Remember that a model was not found.
+
+        Returns:
+            True if an entry was added, False if missing entries are disabled
+        """
+        return self._add(model_id, {"reason": MISSING}, self.ttl)
+
+    def add_error(self, model_id: str, error: Exception) -> bool:
+        """
+        Remember that a request for a model failed.
+
+        Returns:
+            True if an entry was added, False if error entries are disabled
+        """
+        return self._add(model_id, {"reason": ERROR, "error": str(error)}, self.error_ttl)
+
+    def _add(self, model_id: str, entry: Dict[str, Any], ttl: float) -> bool:
+        if ttl <= 0:
+            return False
+        with self._lock:
+            self.entries[model_id] = dict(entry, expires=time.time() + ttl)
+            self._added.add(model_id)
+            self._discarded.discard(model_id)
+        return True
+
+    def discard(self, model_id: str) -> bool:
+        """
+        Forget a model, such as one that has since been found.
+
+        Returns:
+            True if the model had an entry
+        """
+        with self._lock:
+            if self.entries.pop(model_id, None) is None:
+                return False
+            self._discarded.add(model_id)
+            self._added.discard(model_id)
+            return True
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get negative cache statistics.
+
+        Returns:
+            Dictionary with the number of missing and error entries, and
+            the number of upstream requests saved
+        """
+        now = time.time()
+        with self._lock:
+            live = [entry for entry in self.entries.values() if entry["expires"] > now]
+            return {
+                "missing": sum(entry["reason"] == MISSING for entry in live),
+                "errors": sum(entry["reason"] == ERROR for entry in live),
+                "saved": self.saved,
+            }
+
+    @property
+    def dirty(self) -> bool:
+        """Whether there are changes that have not been saved."""
+        return bool(self._added or self._discarded)
+
+    def flush(self, force: bool = False) -> bool:
+        """
+        Save the changes, if any, unless the last save was less than
+        save_interval seconds ago.
+
+        Args:
+            force: Save even if the last save was recent
+
+        Returns:
+            True if the file was saved
+        """
+        if not self.dirty:
+            return False
+        if not force and time.monotonic() - self._saved_at < self.save_interval:
+            return False
+        self.save()
+        return True
+
+    def save(self) -> None:
+        """
+        Merge the changes into the file on disk and write it atomically.
+
+        The file is re-read under a lock, so entries saved by other
+        processes since it was loaded are kept, and loaded into memory.
+        Expired entries are dropped.
+        """
+        with self._lock, file_lock(self.lock_file):
+            entries = self._read()
+            for model_id in self._added:
+                if model_id in self.entries:
+                    entries[model_id] = self.entries[model_id]
+            for model_id in self._discarded:
+                entries.pop(model_id, None)
+            now = time.time()
+            self.entries = {
+                model_id: entry for model_id, entry in entries.items() if entry["expires"] > now
+            }
+            with atomic_open(self.path) as f:
+                json.dump(self.entries, f, indent=2, sort_keys=True)
+            self._added.clear()
+            self._discarded.clear()
+            self._saved_at = time.monotonic()
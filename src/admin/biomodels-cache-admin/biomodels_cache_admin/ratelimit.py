@@ -0,0 +1,96 @@
+"""
+Request rate limiting and bounded concurrency helpers for API calls.
+"""
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Iterator, Tuple, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class RateLimiter:
+    """Thread-safe token bucket limiting calls to a number per second."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            rate: Maximum sustained calls per second
+            burst: Number of calls allowed back to back before throttling
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a call is allowed."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_time = (1 - self._tokens) / self.rate
+            time.sleep(wait_time)
+
+
+def map_concurrent(
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    max_workers: int,
+    return_exceptions: bool = False
+) -> Iterator[Tuple[T, R]]:
+    """
+    Apply fn to items on a bounded thread pool, yielding results as they complete.
+
+    At most 2 * max_workers calls are in flight at once, so items can be a
+    long or lazy iterable.
+
+    Args:
+        fn: Function to apply
+        items: Items to apply fn to
+        max_workers: Number of worker threads
+        return_exceptions: Yield exceptions raised by fn in place of results
+            instead of raising them
+
+    Yields:
+        Tuples of (item, result) in completion order
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1")
+    items = iter(items)
+    pending: Dict[Future, T] = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            for item in items:
+                pending[executor.submit(fn, item)] = item
+                if len(pending) >= 2 * max_workers:
+                    break
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        if not return_exceptions:
+                            raise
+                        result = e
+                    yield item, result
+                    for next_item in items:
+                        pending[executor.submit(fn, next_item)] = next_item
+                        break
+        finally:
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,149 @@
+"""
+Compact, read-only representation of cached model records.
+"""
+import re
+import sys
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# Record fields held in slots; anything else goes in a per-record dict
+FIELDS = ("name", "title", "synopsis", "authors", "journal", "date", "citation", "url")
+
+# Date formats found in BioModels metadata, each with a code stored in the
+# lowest digit of the encoded date so the original text can be restored
+_DATE_FORMATS = (
+    (1, re.compile(r"(\d{4})-(\d{2})-(\d{2})"), "{:04d}-{:02d}-{:02d}"),
+    (2, re.compile(r"(\d{4})-(\d{2})"), "{:04d}-{:02d}"),
+    (3, re.compile(r"(\d{4})-(\d)"), "{:04d}-{:d}"),
+    (4, re.compile(r"(\d{4})-"), "{:04d}-"),
+)
+
+# One shared tuple per distinct key order
+_key_orders: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def encode_date(value: Any) -> Any:
+    """
+    Encode a model date as an integer where that can be undone exactly.
+
+    The integer is YYYYMMDD * 10 + format code, so integer division by 10
+    gives a sortable date with missing parts as zero. Integer years (code 0)
+    and the date strings in BioModels metadata are encoded; other values
+    are returned unchanged.
+
+    Args:
+        value: Date from model metadata
+
+    Returns:
+        Encoded date, or value itself if it cannot be encoded
+    """
+    if isinstance(value, int) and not isinstance(value, bool) and 0 < value < 10000:
+        return value * 100000
+    if isinstance(value, str):
+        for code, pattern, _ in _DATE_FORMATS:
+            match = pattern.fullmatch(value)
+            if match:
+                parts = [int(part) for part in match.groups()] + [0, 0]
+                year, month, day = parts[:3]
+                return ((year * 100 + month) * 100 + day) * 10 + code
+    return value
+
+
+def decode_date(value: Any) -> Any:
+    """Restore a date encoded by encode_date."""
+    if not isinstance(value, int) or isinstance(value, bool):
+        return value
+    date, code = divmod(value, 10)
+    year, rest = divmod(date, 10000)
+    month, day = divmod(rest, 100)
+    if code == 0:
+        return year
+    for date_code, _, template in _DATE_FORMATS:
+        if date_code == code:
+            return template.format(year, month, day)
+    return value
+
+
+class CompactRecord(Mapping):
+    """Read-only, dict-compatible view of a model record using less memory.
+
+    Fields live in slots instead of a per-record dict. Journal names and
+    authors are interned, so records share one copy of each string. Authors
+    are kept as a tuple, dates as integers (see encode_date), and "id" and
+    "model_id" share one value when they are equal. Reading a key gives the
+    same value as the original dict, and records compare equal to it.
+    """
+
+    __slots__ = ("_keys", "_id", "name", "title", "synopsis", "authors",
+                 "journal", "date", "citation", "url", "_extra")
+
+    def __init__(self, model: Mapping):
+        """
+        Args:
+            model: Model record to copy
+        """
+        keys = tuple(model)
+        self._keys = _key_orders.setdefault(keys, keys)
+        self._id = model.get("model_id", model.get("id"))
+        extra: Dict[str, Any] = {}
+        if "id" in model and "model_id" in model and model["id"] != model["model_id"]:
+            extra["id"] = model["id"]
+
+        for field in FIELDS:
+            value = model.get(field)
+            if field == "authors":
+                if isinstance(value, list) and all(isinstance(a, str) for a in value):
+                    value = tuple(sys.intern(a) for a in value)
+                elif field in model:
+                    extra[field] = value
+                    value = None
+            elif field == "journal" and isinstance(value, str):
+                value = sys.intern(value)
+            elif field == "date":
+                encoded = encode_date(value)
+                if isinstance(encoded, int) and encoded is value:
+                    # An integer that is not a year would be misread as encoded
+                    extra[field] = value
+                    encoded = None
+                value = encoded
+            setattr(self, field, value)
+
+        for key in keys:
+            if key not in FIELDS and key not in ("id", "model_id"):
+                extra[key] = model[key]
+        self._extra: Optional[Dict[str, Any]] = extra or None
+
+    @property
+    def date_key(self) -> Optional[int]:
+        """Sortable YYYYMMDD date, with unknown month or day as zero, or None."""
+        if isinstance(self.date, int) and not isinstance(self.date, bool):
+            return self.date // 10
+        return None
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._keys:
+            raise KeyError(key)
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        if key in ("id", "model_id"):
+            return self._id
+        if key == "authors":
+            return list(self.authors)
+        if key == "date":
+            return decode_date(self.date)
+        return getattr(self, key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._keys
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __repr__(self) -> str:
+        return f"CompactRecord({dict(self)!r})"
+
+    def __reduce__(self):
+        return (CompactRecord, (dict(self),))
@@ -0,0 +1,277 @@
+"""
+Streaming extraction of structural metadata from SBML model files.
+"""
+import os
+import glob
+import shutil
+import tempfile
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, BinaryIO, Dict, Optional, Tuple, Union
+
+from .filestore import FileStore, _open_decompressed
+
+RDF_RESOURCE = "{http://www.w3.org/1999/02/22-rdf-syntax-ns#}resource"
+
+# Downloaded model files are COMBINE archives (OMEX), which are zip files
+ZIP_MAGIC = b"PK\x03\x04"
+OMEX_MANIFEST_NS = "{http://identifiers.org/combine.specifications/omex-manifest}"
+SBML_FORMAT = "http://identifiers.org/combine.specifications/sbml"
+
+# Elements counted by extract_sbml_metadata, by the list element holding them
+_LISTED = {
+    "listOfSpecies": ("species", "specie"),
+    "listOfReactions": ("reaction",),
+    "listOfCompartments": ("compartment",),
+}
+
+# Cache record fields filled in by extract_sbml_metadata
+SBML_FIELDS = (
+    "sbml_level",
+    "sbml_version",
+    "species_count",
+    "reaction_count",
+    "compartments",
+    "annotation_uris",
+)
+
+# A file to extract from: (path, codec), where codec is None for plain files
+Source = Tuple[str, Optional[str]]
+
+
+def _split_tag(tag: str) -> Tuple[str, str]:
+    """Split an ElementTree tag into its namespace ("" if none) and local name."""
+    if tag.startswith("{"):
+        namespace, name = tag[1:].split("}", 1)
+        return namespace, name
+    return "", tag
+
+
+def _is_zip(f: BinaryIO) -> bool:
+    """Check whether a binary file starts a zip archive, without consuming it."""
+    if hasattr(f, "peek"):
+        return f.peek(len(ZIP_MAGIC))[:len(ZIP_MAGIC)] == ZIP_MAGIC
+    if f.seekable():
+        position = f.tell()
+        start = f.read(len(ZIP_MAGIC))
+        f.seek(position)
+        return start == ZIP_MAGIC
+    return False
+
+
+def _master_sbml(archive: zipfile.ZipFile) -> str:
+    """
+    Find the SBML model of a COMBINE archive.
+
+    The archive's manifest.xml names it: the master entry in SBML format, or
+    else the first SBML entry.
+
+    Raises:
+        ValueError: If the archive lists no SBML file
+    """
+    names = set(archive.namelist())
+    candidates = []
+    if "manifest.xml" in names:
+        with archive.open("manifest.xml") as f:
+            for content in ET.parse(f).getroot().iter(OMEX_MANIFEST_NS + "content"):
+                location = (content.get("location") or "").lstrip("./")
+                if content.get("format", "").startswith(SBML_FORMAT) and location in names:
+                    if content.get("master") == "true":
+                        return location
+                    candidates.append(location)
+    if candidates:
+        return candidates[0]
+    raise ValueError("Archive has no SBML model")
+
+
+def extract_sbml_metadata(source: Union[str, BinaryIO]) -> Dict[str, Any]:
+    """
+    Extract structural metadata from an SBML file in constant memory.
+
+    The file is parsed with iterparse and every element is discarded as soon
+    as it has been read, so memory use does not depend on the file size.
+    COMBINE archives (OMEX), as BioModels serves model files, are read from
+    the SBML model their manifest names. Species, reactions and compartments
+    are counted only as SBML children of their listOf elements, so
+    annotation elements of the same name are not counted.
+
+    Args:
+        source: Path or binary file object of the SBML document or archive;
+            file objects of archives must be seekable
+
+    Returns:
+        Dictionary with:
+            - sbml_level: Optional[int] - SBML level
+            - sbml_version: Optional[int] - SBML version
+            - species_count: int - Number of species
+            - reaction_count: int - Number of reactions
+            - compartments: List[str] - Compartment IDs
+            - annotation_uris: List[str] - Sorted, unique rdf:resource URIs
+              from annotations (identifiers.org / MIRIAM URNs)
+
+    Raises:
+        xml.etree.ElementTree.ParseError: If the file is not well-formed XML
+        ValueError: If an archive holds no SBML model
+    """
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            return extract_sbml_metadata(f)
+    if _is_zip(source):
+        with zipfile.ZipFile(source) as archive, archive.open(_master_sbml(archive)) as f:
+            return _extract_xml(f)
+    return _extract_xml(source)
+
+
+def _extract_xml(source: BinaryIO) -> Dict[str, Any]:
+    """Extract the metadata of extract_sbml_metadata from an SBML document."""
+    level = version = None
+    sbml_namespace = None
+    species = reactions = 0
+    compartments = []
+    uris = set()
+    stack = []
+
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            namespace, name = _split_tag(elem.tag)
+            if not stack:
+                if name == "sbml":
+                    sbml_namespace = namespace
+                    level = elem.get("level")
+                    version = elem.get("version")
+            elif namespace == sbml_namespace:
+                parent_namespace, parent = _split_tag(stack[-1].tag)
+                if parent_namespace == sbml_namespace and name in _LISTED.get(parent, ()):
+                    # SBML Level 1 Version 1 spells species "specie"
+                    if name in ("species", "specie"):
+                        species += 1
+                    elif name == "reaction":
+                        reactions += 1
+                    else:
+                        compartment_id = elem.get("id")
+                        if compartment_id:
+                            compartments.append(compartment_id)
+            resource = elem.get(RDF_RESOURCE)
+            if resource:
+                uris.add(resource)
+            stack.append(elem)
+        else:
+            stack.pop()
+            elem.clear()
+            # Detach the finished element so the tree never grows
+            if stack:
+                stack[-1].remove(elem)
+
+    return {
+        "sbml_level": int(level) if level and level.isdigit() else None,
+        "sbml_version": int(version) if version and version.isdigit() else None,
+        "species_count": species,
+        "reaction_count": reactions,
+        "compartments": compartments,
+        "annotation_uris": sorted(uris),
+    }
+
+
+def _extract_source(source: Source) -> Dict[str, Any]:
+    """Process pool worker: extract metadata from a plain or compressed file."""
+    path, codec = source
+    if codec is None:
+        return extract_sbml_metadata(path)
+    with _open_decompressed(codec, path) as f:
+        if f.seekable():
+            return extract_sbml_metadata(f)
+        # Archives need seeks the decompressor cannot do, so work on a copy
+        with tempfile.TemporaryFile() as spooled:
+            shutil.copyfileobj(f, spooled)
+            spooled.seek(0)
+            return extract_sbml_metadata(spooled)
+
+
+def sources_from_directory(directory: str, pattern: str = "*.xml") -> Dict[str, Source]:
+    """
+    Find SBML files named <model_id>.xml, such as downloaded model files.
+
+    Args:
+        directory: Directory to search
+        pattern: Glob pattern selecting the files
+
+    Returns:
+        Mapping of model ID to source
+    """
+    return {
+        os.path.splitext(os.path.basename(path))[0]: (path, None)
+        for path in sorted(glob.glob(os.path.join(directory, pattern)))
+    }
+
+
+def sources_from_store(file_store: FileStore) -> Dict[str, Source]:
+    """
+    List the files in a FileStore as extraction sources.
+
+    Args:
+        file_store: Store holding the model files
+
+    Returns:
+        Mapping of model ID to source
+    """
+    sources = {}
+    for model_id in list(file_store.manifest):
+        record = file_store.get(model_id)
+        if record is not None:
+            sources[model_id] = (file_store.object_path(record["sha256"], record["codec"]), record["codec"])
+    return sources
+
+
+def extract_into_cache(
+    cache_manager: Any,
+    sources: Dict[str, Source],
+    max_workers: Optional[int] = None,
+    batch_size: int = 100
+) -> Dict[str, Any]:
+    """
+    Extract SBML metadata on a process pool and store it on cache records.
+
+    The SBML_FIELDS are added to each cached model's record, so they can be
+    used by search filters. Files of models that are not cached are skipped.
+
+    Args:
+        cache_manager: CacheManager whose records are updated
+        sources: Mapping of model ID to source
+        max_workers: Number of worker processes, defaults to the CPU count
+        batch_size: Number of updated records saved at a time
+
+    Returns:
+        Dictionary with:
+            - extracted: int - Number of records updated
+            - skipped: int - Number of files without a cached model
+            - failed: Dict[str, str] - Error message for each file that
+              could not be parsed
+    """
+    model_ids = [model_id for model_id in sources if cache_manager._get_model(model_id) is not None]
+    summary: Dict[str, Any] = {
+        "extracted": 0,
+        "skipped": len(sources) - len(model_ids),
+        "failed": {},
+    }
+    if not model_ids:
+        return summary
+
+    batch: Dict[str, Dict[str, Any]] = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_extract_source, sources[model_id]) for model_id in model_ids]
+        for model_id, future in zip(model_ids, futures):
+            try:
+                metadata = future.result()
+            except Exception as e:
+                summary["failed"][model_id] = str(e)
+                continue
+            batch[model_id] = dict(cache_manager._get_model(model_id), **metadata)
+            if len(batch) >= batch_size:
+                cache_manager.save_models(batch)
+                summary["extracted"] += len(batch)
+                batch = {}
+    if batch:
+        cache_manager.save_models(batch)
+        summary["extracted"] += len(batch)
+    return summary
@@ -0,0 +1,269 @@
+"""
+Read-through HTTP server that mirrors the BioModels endpoints from the cache.
+
+Workers point their BioModelsAPI base_url at the server, so a whole cluster
+shares one warm cache and only its misses reach EBI.
+
+Usage:
+    python -m biomodels_cache_admin.server --cache-dir ./cache [--host 127.0.0.1] [--port 8000]
+"""
+import os
+import sys
+import gzip
+import json
+import logging
+import argparse
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+import requests  # type: ignore
+from .api import BioModelsAPI
+from .filestore import CHUNK_SIZE, FileStore
+from .freshness import content_hash
+
+logger = logging.getLogger(__name__)
+
+# Smallest JSON response worth compressing
+MIN_GZIP_SIZE = 1024
+# Query that lists every cached model, as in the BioModels search API
+MATCH_ALL = "*:*"
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Check whether an Accept-Encoding header allows a gzip response."""
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.partition(";")
+        if coding.strip().lower() in ("gzip", "*"):
+            q = params.strip()
+            try:
+                return not (q.startswith("q=") and float(q[2:]) == 0)
+            except ValueError:
+                return False
+    return False
+
+
+def etag_matches(if_none_match: Optional[str], *etags: str) -> bool:
+    """Check an If-None-Match header against the ETags of a resource, weakly."""
+    if not if_none_match:
+        return False
+    tags = {tag.strip() for tag in if_none_match.split(",")}
+    if "*" in tags:
+        return True
+    tags = {tag[2:] if tag.startswith("W/") else tag for tag in tags}
+    return any(etag in tags for etag in etags)
+
+
+class CacheRequestHandler(BaseHTTPRequestHandler):
+    """Serves one connection of a CacheServer, keeping it alive between requests."""
+
+    protocol_version = "HTTP/1.1"
+    # Seconds an idle keep-alive connection is kept open
+    timeout = 60
+    server: "CacheServer"
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        parts = url.path.strip("/").split("/")
+        if parts == ["search"]:
+            endpoint, handle = "search", lambda: self._search(parse_qs(url.query))
+        elif parts == ["metrics"]:
+            endpoint, handle = "metrics", self._metrics
+        elif len(parts) == 3 and parts[:2] == ["model", "download"]:
+            endpoint, handle = "download", lambda: self._download(parts[2])
+        elif len(parts) == 1 and parts[0]:
+            endpoint, handle = "model", lambda: self._model(parts[0])
+        else:
+            endpoint, handle = "other", lambda: self._error(HTTPStatus.NOT_FOUND, "Not found")
+
+        # Counted by _send, before the client can see the response
+        self._endpoint = endpoint
+        with self.server.api.metrics.timer("server_request_seconds", endpoint=endpoint):
+            try:
+                handle()
+            except requests.exceptions.RequestException as e:
+                logger.warning("Upstream request for %s failed: %s", self.path, e, extra={"path": self.path})
+                self._error(HTTPStatus.BAD_GATEWAY, f"Upstream request failed: {e}")
+
+    def _model(self, model_id: str) -> int:
+        """Serve a model's metadata, fetching it upstream on a cache miss."""
+        model = self.server.api.get_model(model_id)
+        if model is None:
+            return self._error(HTTPStatus.NOT_FOUND, f"Model {model_id} not found")
+        return self._send_json(model, etag=f'"{content_hash(model)}"')
+
+    def _download(self, model_id: str) -> int:
+        """Serve a model's file from the file store, downloading it on a miss."""
+        api = self.server.api
+        if api.file_store is None:
+            return self._error(HTTPStatus.NOT_IMPLEMENTED, "The server has no file store")
+        if model_id.isdigit():
+            model_id = f"BIOMD{model_id.zfill(10)}"
+        record = api.file_store.get(model_id)
+        if record is None:
+            # download_model logs failures and returns False
+            if api.download_model(model_id):
+                record = api.file_store.get(model_id)
+            if record is None:
+                return self._error(HTTPStatus.NOT_FOUND, f"File of model {model_id} not found")
+
+        etag = f'"{record["sha256"]}"'
+        gzip_etag = f'"{record["sha256"]}-gzip"'
+        # Objects stored gzip-compressed are sent as they are
+        send_gzip = record["codec"] == "gzip" and accepts_gzip(self.headers.get("Accept-Encoding"))
+        headers = {"ETag": gzip_etag if send_gzip else etag, "Vary": "Accept-Encoding"}
+        if etag_matches(self.headers.get("If-None-Match"), etag, gzip_etag):
+            return self._send(HTTPStatus.NOT_MODIFIED, headers)
+
+        headers["Content-Type"] = "application/xml"
+        if send_gzip:
+            headers["Content-Encoding"] = "gzip"
+            path = api.file_store.object_path(record["sha256"], record["codec"])
+            self._send(HTTPStatus.OK, dict(headers, **{"Content-Length": str(record["stored_size"])}))
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    self.wfile.write(chunk)
+        else:
+            self._send(HTTPStatus.OK, dict(headers, **{"Content-Length": str(record["size"])}))
+            for chunk in api.file_store.read_chunks(model_id):
+                self.wfile.write(chunk)
+        return HTTPStatus.OK
+
+    def _search(self, params: Dict[str, Any]) -> int:
+        """Serve a page of the models matching a query, like the BioModels search API."""
+        try:
+            query = params.get("query", [MATCH_ALL])[0]
+            offset = int(params.get("offset", ["0"])[0])
+            count = int(params.get("numResults", ["10"])[0])
+        except ValueError:
+            return self._error(HTTPStatus.BAD_REQUEST, "offset and numResults must be integers")
+        if offset < 0 or count < 0:
+            return self._error(HTTPStatus.BAD_REQUEST, "offset and numResults must not be negative")
+        cache_manager = self.server.api.cache_manager
+        if query == MATCH_ALL:
+            total = len(cache_manager.cache)
+            page = cache_manager.list_models(offset, count)
+        else:
+            matches = cache_manager.search_models(query)
+            total = len(matches)
+            page = matches[offset:offset + count]
+        return self._send_json({"matches": total, "models": [self._listing_entry(model) for model in page]})
+
+    def _listing_entry(self, model: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Make a search result with the lastModified that CatalogCrawler.refresh compares.
+
+        That is the upstream listing's timestamp when the server's last
+        refresh stored one, and otherwise the content hash the model's
+        ETag is made from; either changes when the model does.
+        """
+        entry = dict(model)
+        fresh = self.server.api.freshness.get(entry["model_id"]) or {}
+        listed = fresh.get("listed")
+        entry["lastModified"] = listed if listed is not None else content_hash(model)
+        return entry
+
+    def _metrics(self) -> int:
+        """Serve the server's metrics in the Prometheus text format."""
+        body = self.server.api.metrics.prometheus().encode("utf-8")
+        return self._send_body(HTTPStatus.OK, body, "text/plain; version=0.0.4; charset=utf-8")
+
+    def _error(self, status: HTTPStatus, message: str) -> int:
+        return self._send_json({"error": message}, status=status)
+
+    def _send_json(self, data: Any, status: HTTPStatus = HTTPStatus.OK, etag: Optional[str] = None) -> int:
+        body = json.dumps(data, default=dict).encode("utf-8")
+        return self._send_body(status, body, "application/json", etag)
+
+    def _send_body(self, status: HTTPStatus, body: bytes, content_type: str, etag: Optional[str] = None) -> int:
+        """Send a response body, gzip-compressed if the client accepts it."""
+        headers = {"Vary": "Accept-Encoding"}
+        if etag is not None:
+            headers["ETag"] = etag
+            if etag_matches(self.headers.get("If-None-Match"), etag):
+                return self._send(HTTPStatus.NOT_MODIFIED, headers)
+        headers["Content-Type"] = content_type
+        if len(body) >= MIN_GZIP_SIZE and accepts_gzip(self.headers.get("Accept-Encoding")):
+            body = gzip.compress(body, compresslevel=6)
+            headers["Content-Encoding"] = "gzip"
+        headers["Content-Length"] = str(len(body))
+        self._send(status, headers)
+        self.wfile.write(body)
+        return status
+
+    def _send(self, status: HTTPStatus, headers: Dict[str, str]) -> int:
+        self.server.api.metrics.inc("server_requests_total", endpoint=self._endpoint, status=int(status))
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        return status
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(format, *args, extra={"client": self.client_address[0]})
+
+
+class CacheServer(ThreadingHTTPServer):
+    """HTTP server answering BioModels API requests from a BioModelsAPI's cache.
+
+    Serves:
+        - /{model_id}: Model metadata as normalize_model returns it, with an
+          ETag of its content hash
+        - /model/download/{model_id}: The model's file from the client's
+          file store, with an ETag of its SHA-256
+        - /search?query=&offset=&numResults=: {"matches", "models"} pages
+          like the BioModels search API; "*:*" lists every cached model
+        - /metrics: The client's metrics in the Prometheus text format
+
+    Models and files that are not cached are fetched through the client
+    and cached, so concurrent misses share one upstream request. Responses
+    honour If-None-Match with 304 Not Modified, are gzip-compressed when
+    the client accepts it, and connections are kept alive. Upstream
+    failures are answered with 502 Bad Gateway.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, api: BioModelsAPI, address: Tuple[str, int] = ("127.0.0.1", 8000)):
+        """
+        Bind the server; call serve_forever() to start serving.
+
+        Args:
+            api: Client whose cache and file store are served, and which
+                fetches misses upstream
+            address: Host and port to listen on; port 0 picks a free port
+        """
+        self.api = api
+        super().__init__(address, CacheRequestHandler)
+
+    @property
+    def url(self) -> str:
+        """Base URL of the server, for BioModelsAPI.base_url."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def main():
+    """Serve a cache directory until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--cache-dir", default="cache")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--file-store", help="File store directory, defaults to <cache-dir>/files")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    file_store = FileStore(args.file_store or os.path.join(args.cache_dir, "files"))
+    server = CacheServer(BioModelsAPI(args.cache_dir, file_store=file_store), (args.host, args.port))
+    logger.info("Serving %s at %s", args.cache_dir, server.url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.api.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,315 @@
+"""
+Sharded on-disk cache layout with lazy per-shard loading.
+"""
+import os
+import json
+import hashlib
+import threading
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from .codec import JSONCodec, get_codec
+from .fileutil import atomic_open
+
+MANIFEST_FILE = "manifest.json"
+LAYOUT_VERSION = 1
+
+
+def shard_of(model_id: str, shard_count: int) -> str:
+    """
+    Get the name of the shard a model ID belongs to.
+
+    IDs are hashed rather than split by range, so shards stay balanced
+    across the BIOMD and MODEL ID spaces.
+
+    Args:
+        model_id: Model ID
+        shard_count: Number of shards in the layout
+
+    Returns:
+        Shard name, the zero-padded hex shard number
+    """
+    digest = hashlib.sha1(model_id.encode("utf-8")).digest()
+    width = len(format(shard_count - 1, "x"))
+    return format(int.from_bytes(digest[:4], "big") % shard_count, f"0{width}x")
+
+
+class ShardedStore(MutableMapping):
+    """Model records split across many small JSON files.
+
+    The directory holds manifest.json, with the shard count and the number of
+    records in each shard, and one <shard>.json file per non-empty shard.
+    Looking up a model loads only its shard, which is then kept in memory.
+    Iterating streams the shards one at a time, without keeping the ones that
+    were not already loaded. Iteration order is shard order, then insertion
+    order within each shard.
+
+    Changes are held in memory until flush() writes the changed shards and
+    the manifest.
+    """
+
+    def __init__(self, directory: str, shard_count: int = 64, codec: Optional[JSONCodec] = None):
+        """
+        Open a sharded store, creating an empty one if needed.
+
+        Args:
+            directory: Directory holding the manifest and shard files
+            shard_count: Number of shards of a new store; an existing
+                store keeps the count recorded in its manifest
+            codec: JSON codec of the shard files, defaults to the fastest
+                installed one
+
+        Raises:
+            ValueError: If the manifest has an unsupported version
+        """
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, MANIFEST_FILE)
+        self.codec = codec or get_codec()
+        self._lock = threading.RLock()
+        self._shards: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._stats: Dict[str, Optional[Tuple[int, int]]] = {}
+        self._dirty: Set[str] = set()
+
+        manifest = self._read_manifest()
+        if manifest is None:
+            if shard_count < 1:
+                raise ValueError("shard_count must be at least 1")
+            manifest = {"version": LAYOUT_VERSION, "shard_count": shard_count, "counts": {}}
+        elif manifest.get("version") != LAYOUT_VERSION:
+            raise ValueError(f"Unsupported shard layout version: {manifest.get('version')}")
+        self.shard_count: int = manifest["shard_count"]
+        self._counts: Dict[str, int] = manifest["counts"]
+
+    @staticmethod
+    def exists(directory: str) -> bool:
+        """Check whether a directory holds a sharded store."""
+        return os.path.exists(os.path.join(directory, MANIFEST_FILE))
+
+    def _read_manifest(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.manifest_path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def shard_path(self, shard: str) -> str:
+        """Get the path of a shard file."""
+        return os.path.join(self.directory, f"{shard}.json")
+
+    def _shard_names(self) -> List[str]:
+        return sorted(set(self._counts) | set(self._shards))
+
+    def _stat(self, shard: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.shard_path(shard))
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read_shard(self, shard: str) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.shard_path(shard), "rb") as f:
+                return self.codec.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _load(self, shard: str) -> Dict[str, Dict[str, Any]]:
+        """Get a shard's records, reading and keeping the shard if needed."""
+        records = self._shards.get(shard)
+        if records is None:
+            with self._lock:
+                records = self._shards.get(shard)
+                if records is None:
+                    self._stats[shard] = self._stat(shard)
+                    records = self._shards[shard] = self._read_shard(shard)
+        return records
+
+    def is_loaded(self, shard: str) -> bool:
+        """Check whether a shard is held in memory."""
+        return shard in self._shards
+
+    def __getitem__(self, model_id: str) -> Dict[str, Any]:
+        return self._load(shard_of(model_id, self.shard_count))[model_id]
+
+    def __setitem__(self, model_id: str, model: Dict[str, Any]) -> None:
+        with self._lock:
+            shard = shard_of(model_id, self.shard_count)
+            self._load(shard)[model_id] = model
+            self._dirty.add(shard)
+
+    def __delitem__(self, model_id: str) -> None:
+        with self._lock:
+            shard = shard_of(model_id, self.shard_count)
+            del self._load(shard)[model_id]
+            self._dirty.add(shard)
+
+    def __contains__(self, model_id: object) -> bool:
+        if not isinstance(model_id, str):
+            return False
+        return model_id in self._load(shard_of(model_id, self.shard_count))
+
+    def __len__(self) -> int:
+        return sum(self._count(shard) for shard in self._shard_names())
+
+    def iter_shards(self) -> Iterator[Dict[str, Dict[str, Any]]]:
+        """
+        Stream the records shard by shard.
+
+        Shards that are not in memory are read and then dropped, so a full
+        scan holds at most one extra shard at a time.
+
+        Yields:
+            The records of each shard, keyed by model ID
+        """
+        for shard in self._shard_names():
+            records = self._shards.get(shard)
+            if records is None:
+                records = self._read_shard(shard)
+            yield records
+
+    def __iter__(self) -> Iterator[str]:
+        for records in self.iter_shards():
+            yield from list(records)
+
+    def items(self):
+        return _StreamingItems(self)
+
+    def values(self):
+        return _StreamingValues(self)
+
+    def changed_on_disk(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Find records that another process changed in the loaded shards.
+
+        Yields:
+            (model_id, model) for each record whose on-disk version differs
+            from the one in memory, read from shard files that were
+            rewritten since they were loaded
+        """
+        for shard in list(self._shards):
+            stat = self._stat(shard)
+            if stat == self._stats.get(shard):
+                continue
+            records = self._shards[shard]
+            for model_id, model in self._read_shard(shard).items():
+                if records.get(model_id) != model:
+                    yield model_id, model
+
+    def _count(self, shard: str) -> int:
+        if shard in self._shards:
+            return len(self._shards[shard])
+        return self._counts.get(shard, 0)
+
+    def flush(self) -> None:
+        """Write the changed shards and the manifest atomically."""
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            for shard in sorted(self._dirty):
+                if self._shards[shard]:
+                    with atomic_open(self.shard_path(shard), "wb") as f:
+                        self.codec.dump_models(self._shards[shard], f)
+                elif os.path.exists(self.shard_path(shard)):
+                    os.remove(self.shard_path(shard))
+                self._stats[shard] = self._stat(shard)
+            # Counts of shards this store never loaded may have been changed
+            # by another process, so take them from the current manifest
+            manifest = self._read_manifest()
+            if manifest is not None:
+                self._counts.update(manifest["counts"])
+            self._counts = {
+                shard: self._count(shard) for shard in self._shard_names() if self._count(shard)
+            }
+            with atomic_open(self.manifest_path) as f:
+                json.dump({
+                    "version": LAYOUT_VERSION,
+                    "shard_count": self.shard_count,
+                    "counts": self._counts,
+                }, f, indent=2, sort_keys=True)
+            self._dirty = set()
+
+    def replace(self, models: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Replace every record in the store; call flush() to write them.
+
+        Args:
+            models: Mapping of model ID to model data
+        """
+        with self._lock:
+            # Every existing shard must be rewritten or removed
+            self._dirty = set(self._shard_names())
+            self._shards = {shard: {} for shard in self._dirty}
+            for model_id, model in models.items():
+                self[model_id] = model
+
+
+class _StreamingItems:
+    """items() view of a ShardedStore that reads shards as it goes."""
+
+    def __init__(self, store: ShardedStore):
+        self._store = store
+
+    def __iter__(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for records in self._store.iter_shards():
+            yield from list(records.items())
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+
+class _StreamingValues:
+    """values() view of a ShardedStore that reads shards as it goes."""
+
+    def __init__(self, store: ShardedStore):
+        self._store = store
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for records in self._store.iter_shards():
+            yield from list(records.values())
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+
+def shard_cache(cache_file: str, directory: str, shard_count: int = 64) -> ShardedStore:
+    """
+    Convert a single-file cache into a sharded store.
+
+    Args:
+        cache_file: Path of the biomodels_cache.json file
+        directory: Directory of the new store
+        shard_count: Number of shards
+
+    Returns:
+        The written store
+
+    Raises:
+        ValueError: If the directory already holds a sharded store
+    """
+    if ShardedStore.exists(directory):
+        raise ValueError(f"{directory} already holds a sharded cache")
+    store = ShardedStore(directory, shard_count=shard_count)
+    with open(cache_file, "rb") as f:
+        models = store.codec.load(f)
+    store.replace(models)
+    store.flush()
+    return store
+
+
+def unshard_cache(directory: str, cache_file: str) -> int:
+    """
+    Convert a sharded store back into a single cache file.
+
+    Shards do not keep the order models were added in, which the
+    single-file cache does, so records are written in model ID order.
+
+    Args:
+        directory: Directory of the sharded store
+        cache_file: Path of the biomodels_cache.json file to write
+
+    Returns:
+        Number of models written
+    """
+    store = ShardedStore(directory)
+    models = dict(sorted(store.items()))
+    with atomic_open(cache_file, "wb") as f:
+        store.codec.dump_models(models, f)
+    return len(models)
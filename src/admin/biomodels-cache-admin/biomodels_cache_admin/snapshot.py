@@ -0,0 +1,261 @@
+"""
+Memory-mapped binary snapshots of the cache for fast, read-mostly startup.
+
+A snapshot file is laid out as:
+
+    header    magic (8 bytes), format version (u32), record count (u32)
+    index     one entry per record, sorted by model ID:
+              ID offset (u64), ID length (u32), record offset (u64)
+    IDs       UTF-8 model IDs, back to back
+    records   u32 length followed by the record encoded as compact JSON
+
+All integers are little-endian. Opening a snapshot maps the file and reads
+only the header; a lookup binary searches the index and decodes one record.
+Processes that open the same snapshot share its pages through the OS cache.
+"""
+import os
+import mmap
+import struct
+import threading
+from collections.abc import Mapping, MutableMapping
+from typing import Any, Dict, Iterable, Iterator, Optional, Set, Tuple
+from .codec import JSONCodec, get_codec
+from .fileutil import atomic_open
+
+MAGIC = b"BMCSNAP\x00"
+VERSION = 1
+HEADER = struct.Struct("<8sII")
+ENTRY = struct.Struct("<QIQ")
+LENGTH = struct.Struct("<I")
+
+
+def write_snapshot(
+    models: Iterable[Tuple[str, Dict[str, Any]]],
+    path: str,
+    codec: Optional[JSONCodec] = None
+) -> int:
+    """
+    Write records to a snapshot file atomically.
+
+    Args:
+        models: (model_id, model) pairs, such as a cache's items()
+        path: Snapshot file path
+        codec: JSON codec of the records, defaults to get_codec()
+
+    Returns:
+        Number of records written
+    """
+    codec = get_codec(codec)
+    encoded = sorted((model_id.encode("utf-8"), codec.dumps(model)) for model_id, model in models)
+    count = len(encoded)
+    ids_offset = HEADER.size + count * ENTRY.size
+    records_offset = ids_offset + sum(len(model_id) for model_id, _ in encoded)
+
+    with atomic_open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, count))
+        id_pos, record_pos = ids_offset, records_offset
+        for model_id, record in encoded:
+            f.write(ENTRY.pack(id_pos, len(model_id), record_pos))
+            id_pos += len(model_id)
+            record_pos += LENGTH.size + len(record)
+        for model_id, _ in encoded:
+            f.write(model_id)
+        for _, record in encoded:
+            f.write(LENGTH.pack(len(record)))
+            f.write(record)
+    return count
+
+
+class MmapSnapshot(Mapping):
+    """Read-only mapping of model ID to model over a memory-mapped snapshot.
+
+    Iteration is in model ID order.
+    """
+
+    def __init__(self, path: str, codec: Optional[JSONCodec] = None):
+        """
+        Map a snapshot file.
+
+        Args:
+            path: Snapshot file path
+            codec: JSON codec of the records, defaults to get_codec()
+
+        Raises:
+            ValueError: If the file is not a snapshot or has another version
+        """
+        self.path = path
+        self.codec = get_codec(codec)
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < HEADER.size:
+            self.close()
+            raise ValueError(f"{path} is not a cache snapshot")
+        magic, version, self._count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a cache snapshot")
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"Unsupported snapshot version: {version}")
+
+    def _entry(self, position: int) -> Tuple[bytes, int]:
+        """Get the ID and record offset of the index entry at a position."""
+        id_offset, id_length, record_offset = ENTRY.unpack_from(
+            self._mmap, HEADER.size + position * ENTRY.size)
+        return self._mmap[id_offset:id_offset + id_length], record_offset
+
+    def _find(self, model_id: bytes) -> Optional[int]:
+        """Binary search the index for a model ID, returning its record offset."""
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            entry_id, record_offset = self._entry(middle)
+            if entry_id < model_id:
+                low = middle + 1
+            elif entry_id > model_id:
+                high = middle
+            else:
+                return record_offset
+        return None
+
+    def _record(self, record_offset: int) -> Dict[str, Any]:
+        (length,) = LENGTH.unpack_from(self._mmap, record_offset)
+        start = record_offset + LENGTH.size
+        return self.codec.loads(self._mmap[start:start + length])
+
+    def __getitem__(self, model_id: str) -> Dict[str, Any]:
+        record_offset = self._find(model_id.encode("utf-8")) if isinstance(model_id, str) else None
+        if record_offset is None:
+            raise KeyError(model_id)
+        return self._record(record_offset)
+
+    def __contains__(self, model_id: object) -> bool:
+        return isinstance(model_id, str) and self._find(model_id.encode("utf-8")) is not None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[str]:
+        for position in range(self._count):
+            yield self._entry(position)[0].decode("utf-8")
+
+    def items(self):
+        for model_id, record_offset in map(self._entry, range(self._count)):
+            yield model_id.decode("utf-8"), self._record(record_offset)
+
+    def values(self):
+        for position in range(self._count):
+            yield self._record(self._entry(position)[1])
+
+    def close(self) -> None:
+        """Unmap the file."""
+        self._mmap.close()
+
+
+class SnapshotStore(MutableMapping):
+    """A snapshot with an in-memory overlay of the changes made since it was written.
+
+    Reads fall through to the snapshot for models that were not changed.
+    Iteration lists the snapshot's models in ID order, followed by models
+    added since.
+    """
+
+    def __init__(self, path: str, codec: Optional[JSONCodec] = None):
+        """
+        Args:
+            path: Snapshot file path; a missing file is an empty snapshot
+            codec: JSON codec of the records, defaults to get_codec()
+        """
+        self.path = path
+        self.codec = get_codec(codec)
+        self._lock = threading.RLock()
+        self._overlay: Dict[str, Dict[str, Any]] = {}
+        self._deleted: Set[str] = set()
+        self.snapshot: Optional[MmapSnapshot] = None
+        # Number of items() iterations in progress; a snapshot they still
+        # read is left for garbage collection to unmap instead of closed
+        self._readers = 0
+        self.reload()
+
+    def reload(self) -> None:
+        """Map the current snapshot file and drop the overlay."""
+        with self._lock:
+            old = self.snapshot
+            self.snapshot = MmapSnapshot(self.path, self.codec) if os.path.exists(self.path) else None
+            self._overlay = {}
+            self._deleted = set()
+            if old is not None and not self._readers:
+                old.close()
+
+    def __getitem__(self, model_id: str) -> Dict[str, Any]:
+        if model_id in self._overlay:
+            return self._overlay[model_id]
+        if model_id in self._deleted or self.snapshot is None:
+            raise KeyError(model_id)
+        return self.snapshot[model_id]
+
+    def __setitem__(self, model_id: str, model: Dict[str, Any]) -> None:
+        with self._lock:
+            self._overlay[model_id] = model
+            self._deleted.discard(model_id)
+
+    def __delitem__(self, model_id: str) -> None:
+        with self._lock:
+            if model_id not in self:
+                raise KeyError(model_id)
+            self._overlay.pop(model_id, None)
+            self._deleted.add(model_id)
+
+    def __contains__(self, model_id: object) -> bool:
+        if model_id in self._overlay:
+            return True
+        if model_id in self._deleted or self.snapshot is None:
+            return False
+        return model_id in self.snapshot
+
+    def __len__(self) -> int:
+        if not self._overlay and not self._deleted:
+            return len(self.snapshot) if self.snapshot is not None else 0
+        return sum(1 for _ in self)
+
+    def __iter__(self) -> Iterator[str]:
+        if self.snapshot is not None:
+            for model_id in self.snapshot:
+                if model_id not in self._deleted:
+                    yield model_id
+        for model_id in list(self._overlay):
+            if self.snapshot is None or model_id not in self.snapshot:
+                yield model_id
+
+    def items(self):
+        # Decode the snapshot in one pass instead of a binary search per
+        # model, yielding records as they are decoded
+        with self._lock:
+            snapshot, overlay, deleted = self.snapshot, dict(self._overlay), set(self._deleted)
+            self._readers += 1
+        try:
+            if snapshot is not None:
+                for model_id, model in snapshot.items():
+                    if model_id not in deleted:
+                        yield model_id, overlay.get(model_id, model)
+            for model_id, model in overlay.items():
+                if snapshot is None or model_id not in snapshot:
+                    yield model_id, model
+        finally:
+            with self._lock:
+                self._readers -= 1
+
+    def values(self):
+        for _, model in self.items():
+            yield model
+
+    def replace(self, models: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Replace every record; the snapshot file is unchanged until it is rewritten.
+
+        Args:
+            models: Mapping of model ID to model data
+        """
+        with self._lock:
+            self._overlay = dict(models)
+            self._deleted = set(self.snapshot or ()) - set(self._overlay)
@@ -0,0 +1,144 @@
+"""
+Thread synchronization helpers: a read-write lock and single-flight calls.
+"""
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, TypeVar
+
+R = TypeVar("R")
+
+
+class RWLock:
+    """Lock that lets many readers in at once, or one writer.
+
+    Waiting writers block new readers, so a steady stream of searches
+    cannot starve a write. Both sides are reentrant: a thread holding the
+    read lock may read again, and the writer may read or write again.
+    A reader cannot upgrade to the write lock.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer: Optional[int] = None
+        self._writes = 0
+        self._waiting_writers = 0
+        self._local = threading.local()
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        """Hold the lock for reading."""
+        me = threading.get_ident()
+        depth = getattr(self._local, "reads", 0)
+        if depth or self._writer == me:
+            # Already inside, so waiting for writers would deadlock
+            self._local.reads = depth + 1
+            try:
+                yield
+            finally:
+                self._local.reads = depth
+            return
+        with self._cond:
+            while self._writer is not None or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+        self._local.reads = 1
+        try:
+            yield
+        finally:
+            self._local.reads = 0
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        """Hold the lock for writing.
+
+        Raises:
+            RuntimeError: If the thread holds the read lock
+        """
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer != me:
+                if getattr(self._local, "reads", 0):
+                    raise RuntimeError("Cannot upgrade a read lock to a write lock")
+                self._waiting_writers += 1
+                try:
+                    while self._writer is not None or self._readers:
+                        self._cond.wait()
+                finally:
+                    self._waiting_writers -= 1
+                self._writer = me
+            self._writes += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writes -= 1
+                if not self._writes:
+                    self._writer = None
+                    self._cond.notify_all()
+
+
+class _Flight:
+    """A call in progress and, once it finishes, its outcome."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key into one.
+
+    The first caller for a key runs the function; callers arriving while
+    it runs wait for it and get the same result or exception. Once the
+    call finishes the key is forgotten, so later calls run again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], R]) -> R:
+        """
+        Run fn, or wait for the call already running for key.
+
+        Args:
+            key: Identifies calls that may share one result
+            fn: Function to call
+
+        Returns:
+            The result of the one call for key
+
+        Raises:
+            Exception: Whatever that call raised
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = fn()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def in_flight(self) -> int:
+        """Get the number of keys with a call in progress."""
+        with self._lock:
+            return len(self._flights)
@@ -0,0 +1,110 @@
+"""
+Append-only journal of cache writes kept next to the cache snapshot.
+"""
+import os
+import json
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, Optional, Tuple
+from .codec import JSONCodec, get_codec
+
+# Bytes read at a time when looking for the end of a torn final line
+TAIL_BLOCK_SIZE = 64 * 1024
+
+
+class CacheJournal:
+    """Write-ahead log of model records.
+
+    Each line is a JSON object holding one model written since the snapshot
+    was last saved. Replaying the journal over the snapshot restores the
+    latest state, and compaction folds it back into the snapshot.
+    """
+
+    def __init__(self, path: str, codec: Optional[JSONCodec] = None):
+        """
+        Initialize the journal.
+
+        Args:
+            path: Path to the journal file
+            codec: JSON codec of the records, defaults to get_codec()
+        """
+        self.path = path
+        self.codec = get_codec(codec)
+        self.entries = 0
+
+    def append(self, model_id: str, model: Dict[str, Any]) -> None:
+        """
+        Append a model record to the journal.
+
+        Args:
+            model_id: Model ID the record is stored under
+            model: Model data
+        """
+        self.extend([(model_id, model)])
+
+    def extend(self, records: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        """
+        Append several model records to the journal in one write.
+
+        Args:
+            records: Tuples of (model_id, model)
+        """
+        lines = [
+            self.codec.dumps({"model_id": model_id, "model": model}) + b"\n"
+            for model_id, model in records
+        ]
+        if not lines:
+            return
+        with open(self.path, "a+b") as f:
+            self._trim_torn_tail(f)
+            f.write(b"".join(lines))
+        self.entries += len(lines)
+
+    @staticmethod
+    def _trim_torn_tail(f: BinaryIO) -> None:
+        """Cut off a final line left unterminated by a writer that died mid-append."""
+        end = f.seek(0, os.SEEK_END)
+        if end == 0:
+            return
+        f.seek(end - 1)
+        if f.read(1) == b"\n":
+            return
+        # Search backwards for the end of the last complete line
+        position = end
+        while position > 0:
+            start = max(0, position - TAIL_BLOCK_SIZE)
+            f.seek(start)
+            newline = f.read(position - start).rfind(b"\n")
+            if newline != -1:
+                f.truncate(start + newline + 1)
+                return
+            position = start
+        f.truncate(0)
+
+    def replay(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Read the journal records in the order they were written.
+
+        A torn final line, left by a writer that died mid-append, is skipped;
+        the next append cuts it off.
+
+        Yields:
+            Tuples of (model_id, model)
+        """
+        self.entries = 0
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    entry = self.codec.loads(line)
+                    model_id = entry["model_id"]
+                    model = entry["model"]
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    continue
+                self.entries += 1
+                yield model_id, model
+
+    def truncate(self) -> None:
+        """Discard all journal records, once they are in the snapshot."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.entries = 0
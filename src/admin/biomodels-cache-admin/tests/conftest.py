@@ -0,0 +1,109 @@
+import pytest
+import json
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubBioModels:
+    """Local stand-in for the BioModels REST API, served over real HTTP."""
+
+    def __init__(self):
+        self.models = {}
+        self.files = {}
+        self.requests = []
+        self.connections = set()
+        self.delay = 0.0
+        self.lock = threading.Lock()
+
+    def add_model(self, model_id, **fields):
+        model = {
+            "id": model_id,
+            "name": f"Model {model_id}",
+            "publication": {
+                "title": f"Title {model_id}",
+                "authors": [{"name": "Author 1"}],
+                "synopsis": "Synopsis",
+                "date": "2020-01-01",
+                "journal": "Test Journal",
+            },
+        }
+        model.update(fields)
+        self.models[model_id] = model
+        return model
+
+    def handler(self, request):
+        """Return (status, headers, body) for a request; override per test."""
+        path = request.path.split("?")[0]
+        if path.startswith("/model/download/"):
+            model_id = path.rsplit("/", 1)[-1]
+            if model_id in self.files:
+                etag = '"' + hashlib.sha1(self.files[model_id]).hexdigest() + '"'
+                if request.headers.get("If-None-Match") == etag:
+                    return 304, {"ETag": etag}, b""
+                return 200, {"Content-Type": "application/xml", "ETag": etag}, self.files[model_id]
+            return 404, {}, b""
+        model_id = path.lstrip("/")
+        if model_id in self.models:
+            return 200, {"Content-Type": "application/json"}, json.dumps(self.models[model_id]).encode()
+        return 404, {}, b""
+
+
+@pytest.fixture
+def temp_cache_dir(tmp_path):
+    """Cache directory of a test, as a string."""
+    return str(tmp_path)
+
+
+@pytest.fixture
+def model_defaults():
+    """Fields of the records made by make_model; override in a module to change them."""
+    return {"synopsis": "", "authors": ["Author"], "date": "2020-01-01", "journal": "J"}
+
+
+@pytest.fixture
+def make_model(model_defaults):
+    """Return a factory of normalized cache records, numbered like BIOMD0000000001."""
+    def make_model(number, **fields):
+        model_id = f"BIOMD{number:010d}"
+        model = {"id": model_id, "model_id": model_id, "name": f"Model {number}", "title": f"Title {number}"}
+        model.update(model_defaults)
+        model.update(fields)
+        return model
+    return make_model
+
+
+@pytest.fixture
+def stub_server():
+    """Run a StubBioModels server on localhost and yield (stub, base_url)."""
+    stub = StubBioModels()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            with stub.lock:
+                stub.requests.append((self.path, dict(self.headers)))
+                stub.connections.add(self.client_address)
+            if stub.delay:
+                threading.Event().wait(stub.delay)
+            status, headers, body = stub.handler(self)
+            self.send_response(status)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield stub, f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -3,6 +3,8 @@ from unittest.mock import patch, MagicMock
 import requests
 import os
 import json
+import threading
+import time
 from biomodels_cache_admin.api import BioModelsAPI, normalize_model
 
 @pytest.fixture
@@ -67,7 +69,7 @@ def test_normalize_model():
     assert normalized["journal"] == "Test Journal"
 
 def test_get_model_numeric_id(mock_model_response, temp_cache_dir):
-    with patch('requests.get', return_value=mock_model_response):
+    with patch('requests.Session.get', return_value=mock_model_response):
         api = BioModelsAPI(cache_dir=temp_cache_dir)
         model = api.get_model("1")
         
@@ -77,7 +79,7 @@ def test_get_model_numeric_id(mock_model_response, temp_cache_dir):
         assert model["authors"] == ["Author 1"]
 
 def test_get_model_full_id(mock_model_response, temp_cache_dir):
-    with patch('requests.get', return_value=mock_model_response):
+    with patch('requests.Session.get', return_value=mock_model_response):
         api = BioModelsAPI(cache_dir=temp_cache_dir)
         model = api.get_model("BIOMD0000000001")
         
@@ -90,19 +92,19 @@ def test_get_model_not_found(temp_cache_dir):
     mock_response.status_code = 404
     mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError("404 Not Found", response=mock_response)
     
-    with patch('requests.get', return_value=mock_response):
+    with patch('requests.Session.get', return_value=mock_response):
         api = BioModelsAPI(cache_dir=temp_cache_dir)
         model = api.get_model("999999")
         assert model is None
 
 def test_get_model_network_error(temp_cache_dir):
-    with patch('requests.get', side_effect=requests.exceptions.RequestException("Network error")):
+    with patch('requests.Session.get', side_effect=requests.exceptions.RequestException("Network error")):
         api = BioModelsAPI(cache_dir=temp_cache_dir)
         with pytest.raises(requests.exceptions.RequestException):
             api.get_model("1")
 
 def test_export_models_to_json(mock_model_response, temp_cache_dir):
-    with patch('requests.get', return_value=mock_model_response):
+    with patch('requests.Session.get', return_value=mock_model_response):
         api = BioModelsAPI(cache_dir=temp_cache_dir)
         export_path = os.path.join(temp_cache_dir, "exported_models.json")
         
@@ -135,7 +137,7 @@ def test_import_models_from_json(temp_cache_dir):
     assert imported_models[0]["name"] == "Test Model 1"
 
 def test_search_cached_models(mock_model_response, temp_cache_dir):
-    with patch('requests.get', return_value=mock_model_response):
+    with patch('requests.Session.get', return_value=mock_model_response):
         api = BioModelsAPI(cache_dir=temp_cache_dir)
         # First get a model to cache it
         api.get_model("1")
@@ -143,4 +145,194 @@ def test_search_cached_models(mock_model_response, temp_cache_dir):
         # Now search for it
         results = api.search_cached_models("Test")
         assert len(results) == 1
-        assert results[0]["name"] == "Test Model 1" 
\ No newline at end of file
+        assert results[0]["name"] == "Test Model 1" 
+
+
+def test_get_models_batch(stub_server, temp_cache_dir):
+    stub, base_url = stub_server
+    model_ids = [f"BIOMD{i:010d}" for i in range(1, 21)]
+    for model_id in model_ids:
+        stub.add_model(model_id)
+    stub.delay = 0.02
+    
+    api = BioModelsAPI(cache_dir=temp_cache_dir, max_workers=4)
+    api.base_url = base_url
+    results = dict(api.get_models(model_ids + ["BIOMD0000099999"]))
+    
+    assert sorted(results) == sorted(model_ids + ["BIOMD0000099999"])
+    assert results["BIOMD0000099999"] is None
+    assert results["BIOMD0000000007"]["title"] == "Title BIOMD0000000007"
+    assert len(api.cache_manager.cache) == 20
+    # Pooled keep-alive connections are reused across requests
+    assert len(stub.connections) <= 4
+    
+    # Cached models are not requested again
+    stub.requests.clear()
+    assert len(dict(api.get_models(model_ids))) == 20
+    assert stub.requests == []
+
+def test_get_models_return_exceptions(temp_cache_dir):
+    with patch('requests.Session.get', side_effect=requests.exceptions.RequestException("Network error")):
+        api = BioModelsAPI(cache_dir=temp_cache_dir)
+        results = dict(api.get_models(["1", "2"], return_exceptions=True))
+        assert all(isinstance(e, requests.exceptions.RequestException) for e in results.values())
+        
+        with pytest.raises(requests.exceptions.RequestException):
+            list(api.get_models(["1", "2"]))
+
+def test_get_models_rate_limit(stub_server, temp_cache_dir):
+    stub, base_url = stub_server
+    for i in range(1, 6):
+        stub.add_model(f"BIOMD{i:010d}")
+    
+    api = BioModelsAPI(cache_dir=temp_cache_dir, max_workers=5, rate_limit=20)
+    api.base_url = base_url
+    start = time.monotonic()
+    assert len(list(api.get_models([str(i) for i in range(1, 6)]))) == 5
+    # Five requests at 20 per second take at least 0.2 seconds
+    assert time.monotonic() - start >= 0.19
+
+def test_download_models_batch(stub_server, temp_cache_dir):
+    stub, base_url = stub_server
+    stub.files["BIOMD0000000001"] = b"<sbml>1</sbml>"
+    stub.files["BIOMD0000000002"] = b"<sbml>2</sbml>"
+    
+    api = BioModelsAPI(cache_dir=temp_cache_dir)
+    api.base_url = base_url
+    out_dir = os.path.join(temp_cache_dir, "files")
+    results = dict(api.download_models(["BIOMD0000000001", "BIOMD0000000002", "BIOMD0000000003"], out_dir))
+    
+    assert results == {"BIOMD0000000001": True, "BIOMD0000000002": True, "BIOMD0000000003": False}
+    with open(os.path.join(out_dir, "BIOMD0000000002.xml"), "rb") as f:
+        assert f.read() == b"<sbml>2</sbml>"
+
+def test_get_model_fill_updates_filter_index(mock_model_response, temp_cache_dir):
+    with patch('requests.Session.get', return_value=mock_model_response):
+        api = BioModelsAPI(cache_dir=temp_cache_dir)
+        assert api.cache_manager.search_models("", {"authors": ["author 1"]}) == []
+        api.get_model("1")
+        results = api.cache_manager.search_models("", {"authors": ["author 1"]})
+        assert [m["model_id"] for m in results] == ["BIOMD0000000001"]
+
+def test_concurrent_misses_share_one_request(stub_server, temp_cache_dir):
+    stub, base_url = stub_server
+    stub.add_model("BIOMD0000000001")
+    stub.add_model("BIOMD0000000002")
+    stub.delay = 0.2
+    
+    api = BioModelsAPI(cache_dir=temp_cache_dir, max_workers=8)
+    api.base_url = base_url
+    api.get_model("2")
+    stub.requests.clear()
+    
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(api.get_model("1"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    # Lookups and searches of cached models don't wait for the fetch
+    time.sleep(0.05)
+    start = time.monotonic()
+    assert api.get_model("2")["model_id"] == "BIOMD0000000002"
+    assert len(api.cache_manager.search_models("model")) == 1
+    assert time.monotonic() - start < 0.1
+    for thread in threads:
+        thread.join()
+    
+    assert len(results) == 8
+    assert all(result == results[0] for result in results)
+    assert [path for path, _ in stub.requests] == ["/BIOMD0000000001"]
+    assert api.cache_manager.get_model("1") == results[0]
+
+def test_missing_models_are_negatively_cached(stub_server, temp_cache_dir):
+    stub, base_url = stub_server
+    stub.add_model("BIOMD0000000001")
+    api = BioModelsAPI(cache_dir=temp_cache_dir)
+    api.base_url = base_url
+    
+    assert api.get_model("99999") is None
+    assert api.get_model("99999") is None
+    assert dict(api.get_models(["99999", "1"]))["99999"] is None
+    assert [path for path, _ in stub.requests] == ["/BIOMD0000099999", "/BIOMD0000000001"]
+    assert api.negative_cache.stats() == {"missing": 1, "errors": 0, "saved": 2}
+    
+    # Persisted for the next client, and forgotten once the model appears
+    stub.add_model("BIOMD0000099999")
+    other = BioModelsAPI(cache_dir=temp_cache_dir)
+    other.base_url = base_url
+    assert other.get_model("99999") is None
+    other.negative_cache.discard("BIOMD0000099999")
+    assert other.get_model("99999")["model_id"] == "BIOMD0000099999"
+
+def test_failed_requests_cached_only_with_error_ttl(stub_server, temp_cache_dir):
+    stub, base_url = stub_server
+    stub.handler = lambda request: (503, {}, b"")
+    
+    api = BioModelsAPI(cache_dir=temp_cache_dir)
+    api.base_url = base_url
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.HTTPError):
+            api.get_model("1")
+    assert len(stub.requests) == 2
+    
+    stub.requests.clear()
+    api = BioModelsAPI(cache_dir=temp_cache_dir, error_ttl=60)
+    api.base_url = base_url
+    for _ in range(3):
+        with pytest.raises(requests.exceptions.RequestException):
+            api.get_model("1")
+    assert len(stub.requests) == 1
+    assert api.negative_cache.stats()["saved"] == 2
+
+def test_ndjson_export_fetches_missing_and_import_merges(stub_server, temp_cache_dir, tmp_path):
+    stub, base_url = stub_server
+    for i in range(1, 6):
+        stub.add_model(f"BIOMD{i:010d}")
+    api = BioModelsAPI(cache_dir=temp_cache_dir, max_workers=4)
+    api.base_url = base_url
+    api.get_model("1")
+    stub.requests.clear()
+    
+    export_path = str(tmp_path / "models.ndjson.gz")
+    model_ids = (f"BIOMD{i:010d}" for i in range(1, 7))
+    assert api.export_models_ndjson(export_path, model_ids) == 5
+    assert sorted(path for path, _ in stub.requests) == [f"/BIOMD{i:010d}" for i in range(2, 7)]
+    
+    other = BioModelsAPI(cache_dir=str(tmp_path / "other"))
+    other.cache_manager.save_model("BIOMD0000000001", dict(api.get_model("1"), name="Stale"))
+    assert other.import_models_ndjson(export_path) == {"inserted": 4, "updated": 1, "skipped": 0}
+    assert other.cache_manager.get_model("1") == api.get_model("1")
+    assert len(other.cache_manager.cache) == 5
+
+def test_metrics_and_logging(stub_server, temp_cache_dir, caplog):
+    stub, base_url = stub_server
+    body = stub.add_model("BIOMD0000000001")
+    stub.files["BIOMD0000000001"] = b"<sbml/>" * 10
+    
+    api = BioModelsAPI(cache_dir=temp_cache_dir)
+    api.base_url = base_url
+    with caplog.at_level("DEBUG", logger="biomodels_cache_admin.api"):
+        api.get_model("1")
+        api.get_model("1")
+        api.get_model("2")
+        assert api.download_model("BIOMD0000000001", os.path.join(temp_cache_dir, "1.xml"))
+    
+    metrics = api.metrics
+    assert api.cache_manager.metrics is metrics
+    # The re-check inside the shared fetch is not counted as another miss
+    assert metrics.value("cache_misses_total") == 2
+    assert metrics.value("cache_hits_total") == 1
+    assert metrics.value("upstream_requests_total", endpoint="model", status="200") == 1
+    assert metrics.value("upstream_requests_total", endpoint="model", status="404") == 1
+    assert metrics.value("upstream_request_seconds", endpoint="model") == 2
+    assert metrics.value("downloaded_bytes_total", endpoint="model") == len(json.dumps(body))
+    assert metrics.value("downloaded_bytes_total", endpoint="download") == 70
+    
+    found = [r for r in caplog.records if r.getMessage() == "Model BIOMD0000000001 found in cache"]
+    assert len(found) == 1 and found[0].model_id == "BIOMD0000000001"
+
+def test_upstream_errors_counted(temp_cache_dir):
+    with patch('requests.Session.get', side_effect=requests.exceptions.ConnectionError("down")):
+        api = BioModelsAPI(cache_dir=temp_cache_dir)
+        with pytest.raises(requests.exceptions.RequestException):
+            api.get_model("1")
+    assert api.metrics.value("upstream_requests_total", endpoint="model", status="error") == 1
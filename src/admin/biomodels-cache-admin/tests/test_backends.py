@@ -0,0 +1,154 @@
+import pytest
+import os
+import json
+import sqlite3
+from biomodels_cache_admin.cache import CacheManager
+from biomodels_cache_admin import backends
+from biomodels_cache_admin.backends import JSONBackend, SQLiteBackend
+
+@pytest.fixture
+def sqlite_cache(temp_cache_dir, make_model):
+    cache_manager = CacheManager(temp_cache_dir, backend="sqlite")
+    cache_manager.update_cache([
+        make_model(1, name="Cell Cycle", authors=["John Smith"], journal="Nature"),
+        make_model(2, title="Glycolysis in yeast", authors=["Jane Doe"], journal="Science"),
+        make_model(3, synopsis="A model of the CELL CYCLE", authors=["John Smith", "Jane Doe"],
+                   journal="Nature", date="2022-05-01"),
+    ])
+    return cache_manager
+
+def test_default_backend_is_json(temp_cache_dir):
+    cache_manager = CacheManager(temp_cache_dir)
+    assert isinstance(cache_manager.backend, JSONBackend)
+    assert not os.path.exists(os.path.join(temp_cache_dir, "biomodels_cache.sqlite3"))
+
+def test_unknown_backend(temp_cache_dir):
+    with pytest.raises(ValueError):
+        CacheManager(temp_cache_dir, backend="redis")
+
+def test_sqlite_backend_is_detected_and_persistent(sqlite_cache, temp_cache_dir):
+    assert not os.path.exists(os.path.join(temp_cache_dir, "biomodels_cache.json"))
+    reopened = CacheManager(temp_cache_dir)
+    assert reopened.backend.name == "sqlite"
+    assert list(reopened.cache) == ["BIOMD0000000001", "BIOMD0000000002", "BIOMD0000000003"]
+    assert reopened.get_model("2")["title"] == "Glycolysis in yeast"
+    assert reopened.get_model("99") is None
+
+def test_sqlite_uses_wal(sqlite_cache):
+    mode = sqlite_cache.backend.query("PRAGMA journal_mode")[0][0]
+    assert mode == "wal"
+
+def test_sqlite_search_matches_json_backend(sqlite_cache, temp_cache_dir, tmp_path):
+    json_cache = CacheManager(str(tmp_path / "json"))
+    json_cache.update_cache(list(sqlite_cache.cache.values()))
+    
+    queries = [
+        ("cell cycle", None),
+        ("cycle", {"authors": ["john smith"]}),
+        ("", {"journals": ["NATURE"]}),
+        ("model", {"authors": ["Jane Doe"], "journals": ["nature"]}),
+        ("ly", None),
+        ("glycolysis", {"dateRange": {"start": "2021-01-01", "end": "2023-01-01"}}),
+        ('quote"d', None),
+    ]
+    for query, filters in queries:
+        assert sqlite_cache.search_models(query, filters) == json_cache.search_models(query, filters)
+    assert [m["id"] for m in sqlite_cache.search_models("cell cycle")] == [
+        "BIOMD0000000001", "BIOMD0000000003"]
+
+def test_sqlite_full_text_search_narrows_candidates(sqlite_cache):
+    if not sqlite_cache.backend.fts:
+        pytest.skip("SQLite built without FTS5 trigram tokenizer")
+    candidates = sqlite_cache.backend.search_candidates("glycolysis")
+    assert [m["id"] for m in candidates] == ["BIOMD0000000002"]
+
+def test_sqlite_save_models_skips_journal(sqlite_cache, temp_cache_dir, make_model):
+    sqlite_cache.save_models({"BIOMD0000000004": make_model(4)})
+    assert sqlite_cache.journal.entries == 0
+    assert not os.path.exists(sqlite_cache.journal.path)
+    # Visible to another process's connection without compaction
+    conn = sqlite3.connect(os.path.join(temp_cache_dir, "biomodels_cache.sqlite3"))
+    assert conn.execute("SELECT COUNT(*) FROM models").fetchone()[0] == 4
+    conn.close()
+
+def test_sqlite_update_replaces_in_place(sqlite_cache, make_model):
+    sqlite_cache.save_model("BIOMD0000000001", make_model(1, name="Renamed"))
+    assert sqlite_cache.get_model("1")["name"] == "Renamed"
+    assert list(sqlite_cache.cache)[0] == "BIOMD0000000001"
+    assert sqlite_cache.search_models("cell cycle") == [sqlite_cache.get_model("3")]
+    assert sqlite_cache.search_models("renamed") == [sqlite_cache.get_model("1")]
+
+def test_sqlite_update_cache_is_transactional(sqlite_cache, make_model):
+    def fail(idx, total):
+        if idx == 2:
+            raise RuntimeError("interrupted")
+    with pytest.raises(RuntimeError):
+        sqlite_cache.update_cache([make_model(10), make_model(11)], progress_callback=fail)
+    assert sqlite_cache.get_model("10") is None
+    assert len(sqlite_cache.cache) == 3
+
+def test_sqlite_import_export(sqlite_cache, tmp_path, make_model):
+    import_file = str(tmp_path / "import.json")
+    with open(import_file, "w") as f:
+        json.dump({"BIOMD0000000009": make_model(9)}, f)
+    sqlite_cache.import_json(import_file)
+    assert list(sqlite_cache.cache) == ["BIOMD0000000009"]
+    assert sqlite_cache.search_models("model 9") == [make_model(9)]
+    
+    export_file = str(tmp_path / "export.json")
+    sqlite_cache.export_json(export_file)
+    with open(export_file) as f:
+        assert json.load(f) == {"BIOMD0000000009": make_model(9)}
+
+def test_sqlite_iteration_fetches_rows_in_batches(sqlite_cache, monkeypatch, make_model):
+    sqlite_cache.update_cache([make_model(n) for n in range(4, 8)])
+    model_ids = list(sqlite_cache.cache)
+    monkeypatch.setattr(backends, "FETCH_SIZE", 2)
+    def fetch_all(sql, params=()):
+        raise AssertionError("iteration must not fetch every row at once")
+    monkeypatch.setattr(sqlite_cache.backend, "query", fetch_all)
+    values = sqlite_cache.cache.values()
+    assert next(values)["id"] == "BIOMD0000000001"
+    assert [m["id"] for m in values] == [f"BIOMD{n:010d}" for n in range(2, 8)]
+    assert [model_id for model_id, _ in sqlite_cache.cache.items()] == model_ids
+
+def test_custom_backend_instance(temp_cache_dir, tmp_path, make_model):
+    backend = SQLiteBackend(str(tmp_path / "other.sqlite3"))
+    cache_manager = CacheManager(temp_cache_dir, backend=backend)
+    cache_manager.update_cache([make_model(1)])
+    assert cache_manager.backend is backend
+    assert os.path.exists(str(tmp_path / "other.sqlite3"))
+
+def test_sqlite_search_cache_sees_other_connections(sqlite_cache, temp_cache_dir, make_model):
+    cache_manager = CacheManager(temp_cache_dir, backend="sqlite", search_cache_size=16)
+    assert len(cache_manager.search_models("model 4")) == 0
+    assert len(cache_manager.search_models("model 4")) == 0
+    assert cache_manager.search_cache_info()["hits"] == 1
+    
+    other = CacheManager(temp_cache_dir, backend="sqlite")
+    other.save_model("BIOMD0000000004", make_model(4))
+    assert [m["id"] for m in cache_manager.search_models("model 4")] == ["BIOMD0000000004"]
+
+def test_sqlite_lazy_indexes_see_other_connections(sqlite_cache, temp_cache_dir, make_model):
+    assert sqlite_cache.search_ranked("BIOMD")["total"] == 3
+    assert sqlite_cache.search_ranked("cell", filters={"journals": ["Nature"]})["total"] == 2
+    
+    other = CacheManager(temp_cache_dir, backend="sqlite")
+    other.save_model("BIOMD0000000004", make_model(4, name="Cell Size", journal="Nature"))
+    assert sqlite_cache.search_ranked("BIOMD")["total"] == 4
+    assert sqlite_cache.search_ranked("cell", filters={"journals": ["Nature"]})["total"] == 3
+    assert len(sqlite_cache.search_models("cell", filters={"journals": ["Nature"]})) == 3
+    
+    # Writes made here keep the indexes current
+    sqlite_cache.save_model("BIOMD0000000005", make_model(5, name="Cell Death", journal="Nature"))
+    assert sqlite_cache.search_ranked("cell", filters={"journals": ["Nature"]})["total"] == 4
+
+def test_sqlite_rollback_invalidates_search_cache(sqlite_cache, make_model):
+    seen = []
+    def search(idx, total):
+        seen.append(len(sqlite_cache.search_models("model 10")))
+        raise RuntimeError("interrupted")
+    with pytest.raises(RuntimeError):
+        sqlite_cache.update_cache([make_model(10)], progress_callback=search)
+    assert seen == [1]
+    assert sqlite_cache.search_models("model 10") == []
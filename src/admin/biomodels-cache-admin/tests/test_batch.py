@@ -0,0 +1,67 @@
+import pytest
+import sys
+import subprocess
+from biomodels_cache_admin import batch
+from biomodels_cache_admin.cache import CacheManager
+
+@pytest.fixture
+def model_defaults(model_defaults):
+    return dict(model_defaults, authors=["John Smith"], journal="Nature")
+
+@pytest.fixture(params=["numpy", "pure"])
+def numpy_mode(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(batch, "_load_numpy", lambda: None)
+    return request.param
+
+@pytest.fixture
+def cache_manager(temp_cache_dir, make_model):
+    cache_manager = CacheManager(temp_cache_dir)
+    cache_manager.update_cache([
+        make_model(1, name="Cell Cycle", synopsis="Mitotic oscillator", date="2001-03-15"),
+        make_model(2, title="Glycolysis in yeast", authors=["Jane Doe"], journal="Science"),
+        make_model(3, synopsis="A model of the CELL CYCLE and glycolysis", authors=["John Smith", "Jane Doe"],
+                   date="2022-05-01"),
+        make_model(4, name="Calcium", synopsis="Oscillations of calcium", journal="Cell", date="1999-12-31"),
+    ])
+    return cache_manager
+
+QUERIES = ["cell", "Cycle", "glycolysis", "OSC", "model", "", "ca", "zz", "cell cycle", "e\x00m", "of the",
+           " ", "cle and", "ll  cy", "lls\tgl"]
+FILTERS = [
+    None,
+    {"authors": ["jane doe"]},
+    {"journals": ["NATURE", "cell"]},
+    {"dateRange": {"start": "2000-01-01", "end": "2021-12-31"}},
+    {"authors": ["John Smith"], "dateRange": {"start": "1990-01-01", "end": "2030-01-01"}},
+]
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_search_many_matches_search_models(cache_manager, numpy_mode, filters):
+    results = cache_manager.search_many(QUERIES, filters)
+    assert list(results) == QUERIES
+    for query in QUERIES:
+        assert results[query] == [m["id"] for m in cache_manager.search_models(query, filters)]
+
+def test_search_many_sees_updates(cache_manager, make_model):
+    assert cache_manager.search_many(["calcium"]) == {"calcium": ["BIOMD0000000004"]}
+    cache_manager.save_model("BIOMD0000000005", make_model(5, title="Calcium waves"))
+    assert cache_manager.search_many(["calcium"]) == {"calcium": ["BIOMD0000000004", "BIOMD0000000005"]}
+
+def test_search_many_rejects_unparseable_dates(cache_manager, numpy_mode, make_model):
+    cache_manager.save_model("BIOMD0000000005", make_model(5, name="Undated", date="2013-"))
+    date_range = {"dateRange": {"start": "2000-01-01", "end": "2030-01-01"}}
+    with pytest.raises(ValueError):
+        cache_manager.search_many(["calcium", "undated"], date_range)
+    # As with search_models, only models matching the query are checked
+    assert cache_manager.search_many(["calcium"], date_range) == {"calcium": []}
+    assert cache_manager.search_many(["undated"], dict(date_range, journals=["Cell"])) == {"undated": []}
+    with pytest.raises(ValueError):
+        cache_manager.search_many(["x"], {"dateRange": {"start": "2000", "end": "2030-01-01"}})
+
+def test_importing_the_package_does_not_load_numpy():
+    code = "import sys, biomodels_cache_admin.cache; print('numpy' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
@@ -0,0 +1,101 @@
+import pytest
+import os
+from biomodels_cache_admin.bounded import BoundedRecords, record_size
+from biomodels_cache_admin.cache import CacheManager
+
+@pytest.fixture
+def models(make_model):
+    return [
+        make_model(i, synopsis="A model of the cell cycle" if i % 2 else "", journal="Nature" if i % 3 else "Cell")
+        for i in range(1, 51)
+    ]
+
+@pytest.fixture(params=["sqlite", "snapshot"])
+def bounded_cache(request, temp_cache_dir, tmp_path, models):
+    if request.param == "snapshot":
+        source = CacheManager(str(tmp_path / "source"))
+        source.update_cache(models)
+        source.export_snapshot(os.path.join(temp_cache_dir, "biomodels_cache.snapshot"))
+        return CacheManager(temp_cache_dir, backend="snapshot", max_records=10)
+    cache_manager = CacheManager(temp_cache_dir, backend="sqlite", max_records=10)
+    cache_manager.update_cache(models)
+    return cache_manager
+
+def test_bounded_mode_keeps_semantics(bounded_cache, tmp_path, models):
+    unbounded = CacheManager(str(tmp_path / "unbounded"))
+    unbounded.update_cache(models)
+    for number in range(1, 52):
+        assert bounded_cache.get_model(str(number)) == unbounded.get_model(str(number))
+    for query, filters in [("cell cycle", None), ("model 1", {"journals": ["cell"]}), ("", None)]:
+        assert bounded_cache.search_models(query, filters) == unbounded.search_models(query, filters)
+    assert len(bounded_cache.cache) == 50
+    assert list(bounded_cache.cache) == list(unbounded.cache)
+
+def test_bounded_mode_evicts_and_rereads(bounded_cache, models):
+    for number in range(1, 51):
+        bounded_cache.get_model(str(number))
+    info = bounded_cache.memory_info()
+    assert info["records"] == 10
+    assert info["evictions"] == 40
+    assert info["misses"] == 50
+    
+    # The ten most recent lookups are served from memory
+    for number in range(41, 51):
+        bounded_cache.get_model(str(number))
+    assert bounded_cache.get_model("1") == models[0]
+    info = bounded_cache.memory_info()
+    assert (info["hits"], info["misses"]) == (10, 51)
+    assert info["hit_ratio"] == pytest.approx(10 / 61)
+
+def test_bounded_mode_writes_through(bounded_cache, make_model):
+    bounded_cache.get_model("1")
+    bounded_cache.save_model("BIOMD0000000001", make_model(1, name="Renamed"))
+    assert bounded_cache.get_model("1")["name"] == "Renamed"
+    bounded_cache.compact()
+    reopened = CacheManager(bounded_cache.cache_dir, backend=bounded_cache.backend.name, max_records=5)
+    assert reopened.get_model("1")["name"] == "Renamed"
+
+def test_bounded_mode_does_not_memoize_searches(bounded_cache):
+    for query in ("cell cycle", "model", ""):
+        assert bounded_cache.search_models(query)
+    assert bounded_cache.search_cache_info()["size"] == 0
+    assert bounded_cache.memory_info()["records"] <= 10
+
+def test_byte_budget(temp_cache_dir, models):
+    budget = 5 * record_size(models[0])
+    cache_manager = CacheManager(temp_cache_dir, backend="sqlite", max_bytes=budget)
+    cache_manager.update_cache(models)
+    for number in range(1, 51):
+        cache_manager.get_model(str(number))
+    info = cache_manager.memory_info()
+    assert 0 < info["bytes"] <= budget
+    assert 3 <= info["records"] <= 6
+    assert info["evictions"] == 50 - info["records"]
+
+def test_sqlite_changes_from_other_connections_are_seen(temp_cache_dir, models, make_model):
+    cache_manager = CacheManager(temp_cache_dir, backend="sqlite", max_records=10)
+    cache_manager.update_cache(models[:3])
+    assert cache_manager.get_model("1")["name"] == "Model 1"
+    other = CacheManager(temp_cache_dir, backend="sqlite")
+    other.save_model("BIOMD0000000001", make_model(1, name="Changed elsewhere"))
+    assert cache_manager.get_model("1")["name"] == "Changed elsewhere"
+
+def test_rollback_empties_memory(temp_cache_dir, models, make_model):
+    cache_manager = CacheManager(temp_cache_dir, backend="sqlite", max_records=10)
+    cache_manager.update_cache(models[:3])
+    
+    def fail(idx, total):
+        # Reads inside the transaction see the uncommitted model
+        assert cache_manager.get_model("99")["name"] == "Model 99"
+        raise RuntimeError("interrupted")
+    
+    with pytest.raises(RuntimeError):
+        cache_manager.update_cache([make_model(99)], progress_callback=fail)
+    assert cache_manager.get_model("99") is None
+
+def test_bounded_mode_needs_random_access_backend(temp_cache_dir):
+    with pytest.raises(ValueError):
+        CacheManager(temp_cache_dir, max_records=10)
+    with pytest.raises(ValueError):
+        BoundedRecords({})
+    assert CacheManager(temp_cache_dir).memory_info() is None
@@ -1,6 +1,7 @@
 import pytest
 import os
 import json
+import threading
 from datetime import datetime
 from biomodels_cache_admin.cache import CacheManager
 
@@ -186,4 +187,298 @@ def test_search_models_case_insensitive(temp_cache_dir, sample_cache_data):
     
     # Test case-insensitive search
     results = cache_manager.search_models("test")
-    assert len(results) == 2 
\ No newline at end of file
+    assert len(results) == 2 
+
+
+@pytest.fixture
+def ranked_cache_data():
+    models = {}
+    for i in range(1, 31):
+        model_id = f"BIOMD{i:010d}"
+        models[model_id] = {
+            "id": model_id,
+            "name": f"Model {i}",
+            "title": "Glycolysis in yeast" if i % 3 == 0 else "Cell cycle",
+            "authors": ["Goldbeter A"] if i % 2 else ["Tyson JJ"],
+            "synopsis": "Oscillations " * (i % 4 + 1),
+            "citation": None,
+            "date": "2020-01-01",
+            "journal": "Test Journal",
+        }
+    return models
+
+def test_search_ranked_relevance(temp_cache_dir, ranked_cache_data):
+    cache_manager = CacheManager(temp_cache_dir)
+    cache_manager.cache = ranked_cache_data
+    
+    results = cache_manager.search_ranked("glycolysis", page_size=100)
+    assert results["total"] == 10
+    assert all("Glycolysis" in m["title"] for m in results["results"])
+    assert results["next_cursor"] is None
+    
+    # Title matches outrank synopsis-only matches
+    cache_manager.put_model("BIOMD0000000099", dict(
+        ranked_cache_data["BIOMD0000000001"],
+        id="BIOMD0000000099", title="Other", synopsis="mentions glycolysis once"))
+    results = cache_manager.search_ranked("glycolysis", page_size=100)
+    assert results["total"] == 11
+    assert results["results"][-1]["id"] == "BIOMD0000000099"
+
+def test_search_ranked_exact_id_first(temp_cache_dir, ranked_cache_data):
+    cache_manager = CacheManager(temp_cache_dir)
+    cache_manager.cache = ranked_cache_data
+    
+    results = cache_manager.search_ranked("5")
+    assert results["results"][0]["id"] == "BIOMD0000000005"
+    
+    results = cache_manager.search_ranked("bIOMD0000000012")
+    assert results["results"][0]["id"] == "BIOMD0000000012"
+
+def test_search_ranked_pagination(temp_cache_dir, ranked_cache_data):
+    cache_manager = CacheManager(temp_cache_dir)
+    cache_manager.cache = ranked_cache_data
+    
+    everything = cache_manager.search_ranked("cycle oscillations", page_size=100)["results"]
+    assert len(everything) == 30
+    
+    pages = []
+    response = cache_manager.search_ranked("cycle oscillations", page_size=7)
+    while True:
+        assert response["total"] == 30
+        pages.extend(response["results"])
+        if response["next_cursor"] is None:
+            break
+        response = cache_manager.search_ranked(
+            "cycle oscillations", page_size=7, cursor=response["next_cursor"])
+    assert pages == everything
+    assert cache_manager.search_ranked("cycle oscillations", page=2, page_size=7)["results"] == everything[7:14]
+
+def test_search_ranked_filters_and_invalid_cursor(temp_cache_dir, ranked_cache_data):
+    cache_manager = CacheManager(temp_cache_dir)
+    cache_manager.cache = ranked_cache_data
+    
+    results = cache_manager.search_ranked("glycolysis", filters={"authors": ["tyson jj"]})
+    assert results["total"] == 5
+    assert all(m["authors"] == ["Tyson JJ"] for m in results["results"])
+    
+    cursor = cache_manager.search_ranked("cycle", page_size=5)["next_cursor"]
+    with pytest.raises(ValueError):
+        cache_manager.search_ranked("glycolysis", page_size=5, cursor=cursor)
+    with pytest.raises(ValueError):
+        cache_manager.search_ranked("cycle", cursor="not-a-cursor")
+
+def brute_force_search(models, query, filters):
+    """search_models without any index, as it worked before indexes existed."""
+    return [m for m in models.values()
+            if CacheManager._matches_query(m, query.lower())
+            and CacheManager._check_filters(m, CacheManager._prepare_filters(filters))]
+
+def test_filter_index_matches_scan(temp_cache_dir, ranked_cache_data):
+    for i, model in enumerate(ranked_cache_data.values()):
+        model["date"] = f"20{10 + i % 10}-0{1 + i % 9}-15"
+        model["journal"] = ["Nature", "Science", "Cell"][i % 3]
+    cache_manager = CacheManager(temp_cache_dir, use_index=True)
+    cache_manager.cache = ranked_cache_data
+    
+    filter_sets = [
+        {"authors": ["tyson jj"]},
+        {"journals": ["NATURE", "cell"]},
+        {"dateRange": {"start": "2012-01-01", "end": "2015-12-31"}},
+        {"authors": ["Goldbeter A"], "journals": ["Science"],
+         "dateRange": {"start": "2010-01-01", "end": "2016-06-30"}},
+        {"authors": ["Nobody"]},
+    ]
+    for filters in filter_sets:
+        for query in ("", "cycle", "glycolysis", "model 1"):
+            assert cache_manager.search_models(query, filters) == \
+                brute_force_search(ranked_cache_data, query, filters)
+    
+    ranked = cache_manager.search_ranked("cycle", filters={"journals": ["cell"]}, page_size=100)
+    assert sorted(m["id"] for m in ranked["results"]) == sorted(
+        m["id"] for m in brute_force_search(ranked_cache_data, "cycle", {"journals": ["cell"]}))
+
+def test_filter_index_stays_consistent(temp_cache_dir, sample_cache_data, tmp_path):
+    cache_manager = CacheManager(temp_cache_dir)
+    cache_manager.update_cache(list(sample_cache_data.values()))
+    assert len(cache_manager.search_models("", {"journals": ["test journal 1"]})) == 1
+    
+    # Updates after the index is built
+    cache_manager.update_cache([dict(sample_cache_data["BIOMD0000000001"], id="BIOMD0000000003")])
+    cache_manager.save_model("BIOMD0000000002", dict(sample_cache_data["BIOMD0000000002"], journal="Test Journal 1"))
+    assert [m["id"] for m in cache_manager.search_models("", {"journals": ["test journal 1"]})] == [
+        "BIOMD0000000001", "BIOMD0000000002", "BIOMD0000000003"]
+    assert cache_manager.search_models("", {"journals": ["test journal 2"]}) == []
+    
+    import_file = str(tmp_path / "import.json")
+    with open(import_file, "w") as f:
+        json.dump({"BIOMD0000000002": sample_cache_data["BIOMD0000000002"]}, f)
+    cache_manager.import_json(import_file)
+    assert cache_manager.search_models("", {"journals": ["test journal 1"]}) == []
+    assert len(cache_manager.search_models("", {"authors": ["author 2"]})) == 1
+
+def test_date_filter_still_rejects_unparseable_model_dates(temp_cache_dir, sample_cache_data):
+    sample_cache_data["BIOMD0000000002"]["date"] = "2021-06"
+    cache_manager = CacheManager(temp_cache_dir)
+    cache_manager.cache = sample_cache_data
+    with pytest.raises(ValueError):
+        cache_manager.search_models("", {"dateRange": {"start": "2019-01-01", "end": "2019-12-31"}})
+    # Models excluded by another filter are never checked
+    assert cache_manager.search_models("", {
+        "journals": ["test journal 1"],
+        "dateRange": {"start": "2019-01-01", "end": "2020-12-31"},
+    }) == [sample_cache_data["BIOMD0000000001"]]
+
+
+def test_search_results_are_memoized(temp_cache_dir, sample_cache_data):
+    cache_manager = CacheManager(temp_cache_dir, search_cache_size=16)
+    cache_manager.update_cache(list(sample_cache_data.values()))
+    filters = {"journals": ["Test Journal 1"]}
+    first = cache_manager.search_models("Test", filters)
+    assert cache_manager.search_models("TEST", {"journals": ["Test Journal 1"]}) == first
+    info = cache_manager.search_cache_info()
+    assert (info["hits"], info["misses"], info["size"]) == (1, 1, 1)
+    
+    # Callers may change the returned list without affecting the cache
+    first.clear()
+    assert len(cache_manager.search_models("test", filters)) == 1
+
+def test_search_cache_invalidated_by_every_mutation(temp_cache_dir, sample_cache_data, tmp_path):
+    cache_manager = CacheManager(temp_cache_dir, search_cache_size=16)
+    cache_manager.update_cache([sample_cache_data["BIOMD0000000001"]])
+    assert len(cache_manager.search_models("test")) == 1
+    generation = cache_manager.generation
+    
+    cache_manager.update_cache([sample_cache_data["BIOMD0000000002"]])
+    assert cache_manager.generation > generation
+    assert len(cache_manager.search_models("test")) == 2
+    
+    cache_manager.save_model("BIOMD0000000003", dict(sample_cache_data["BIOMD0000000001"], id="BIOMD0000000003"))
+    assert len(cache_manager.search_models("test")) == 3
+    
+    import_file = str(tmp_path / "import.json")
+    with open(import_file, "w") as f:
+        json.dump({"BIOMD0000000002": sample_cache_data["BIOMD0000000002"]}, f)
+    cache_manager.import_json(import_file)
+    assert len(cache_manager.search_models("test")) == 1
+    assert cache_manager.search_cache_info()["hits"] == 0
+
+def test_search_cache_is_off_by_default(temp_cache_dir, sample_cache_data):
+    cache_manager = CacheManager(temp_cache_dir)
+    cache_manager.cache["BIOMD0000000001"] = sample_cache_data["BIOMD0000000001"]
+    assert len(cache_manager.search_models("test")) == 1
+    # Writes through the cache mapping are seen by the next search
+    cache_manager.cache["BIOMD0000000002"] = sample_cache_data["BIOMD0000000002"]
+    assert len(cache_manager.search_models("test")) == 2
+    assert cache_manager.search_cache_info()["size"] == 0
+
+def test_search_cache_can_be_disabled(temp_cache_dir, sample_cache_data):
+    cache_manager = CacheManager(temp_cache_dir, search_cache_size=0)
+    cache_manager.update_cache(list(sample_cache_data.values()))
+    cache_manager.search_models("test")
+    cache_manager.search_models("test")
+    assert cache_manager.search_cache_info()["size"] == 0
+    assert cache_manager.search_cache_info()["hits"] == 0
+
+def test_searches_run_safely_alongside_writes(temp_cache_dir, sample_cache_data):
+    cache_manager = CacheManager(temp_cache_dir, search_cache_size=0)
+    cache_manager.update_cache(list(sample_cache_data.values()))
+    template = sample_cache_data["BIOMD0000000001"]
+    errors = []
+    
+    def writer(offset):
+        try:
+            for i in range(200):
+                model_id = f"BIOMD{offset + i:010d}"
+                cache_manager.put_model(model_id, dict(template, id=model_id))
+        except Exception as e:
+            errors.append(e)
+    
+    def searcher():
+        try:
+            for _ in range(100):
+                cache_manager.search_models("test")
+                cache_manager.search_models("test", {"journals": ["test journal 1"]})
+                cache_manager.search_ranked("model")
+        except Exception as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=writer, args=(n * 1000,)) for n in range(1, 4)]
+    threads += [threading.Thread(target=searcher) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(cache_manager.search_models("test", {"journals": ["test journal 1"]})) == 601
+
+def test_ndjson_export_and_upsert(temp_cache_dir, sample_cache_data, tmp_path):
+    source = CacheManager(str(tmp_path / "source"))
+    source.update_cache(list(sample_cache_data.values()))
+    export_file = str(tmp_path / "models.ndjson.gz")
+    assert source.export_ndjson(export_file) == 2
+    
+    cache_manager = CacheManager(temp_cache_dir, compact_threshold=1)
+    cache_manager.save_model("BIOMD0000000002", dict(sample_cache_data["BIOMD0000000002"], name="Old"))
+    saves = []
+    save = cache_manager.backend.save
+    cache_manager.backend.save = lambda models: (saves.append(1), save(models))
+    assert cache_manager.import_ndjson(export_file, batch_size=1) == {"inserted": 1, "updated": 1, "skipped": 0}
+    # Batches are journaled and the cache file is written once
+    assert len(saves) == 1
+    assert dict(cache_manager.cache) == sample_cache_data
+    
+    assert cache_manager.import_ndjson(export_file) == {"inserted": 0, "updated": 0, "skipped": 2}
+    assert len(saves) == 1
+    with open(os.path.join(temp_cache_dir, "biomodels_cache.json")) as f:
+        assert json.load(f) == sample_cache_data
+
+def test_upsert_requires_ids(temp_cache_dir):
+    cache_manager = CacheManager(temp_cache_dir)
+    with pytest.raises(ValueError):
+        cache_manager.upsert_models([{"name": "No ID"}])
+
+def test_metrics(temp_cache_dir, sample_cache_data):
+    cache_manager = CacheManager(temp_cache_dir)
+    cache_manager.update_cache(list(sample_cache_data.values()))
+    metrics = cache_manager.metrics
+    assert metrics.value("cache_save_seconds", backend="json") == 2
+    
+    cache_manager.get_model("1")
+    cache_manager.get_model("BIOMD0000000002")
+    cache_manager.get_model("99")
+    assert metrics.value("cache_hits_total") == 2
+    assert metrics.value("cache_misses_total") == 1
+    
+    cache_manager.search_models("test")
+    cache_manager.search_models("test model", {"journals": ["Test Journal 1"], "unknown": 1})
+    cache_manager.search_many(["test"])
+    cache_manager.search_ranked("")
+    assert metrics.value("search_seconds", method="search_models", terms="one", filters="none") == 1
+    assert metrics.value("search_seconds", method="search_models", terms="many", filters="journals") == 1
+    assert metrics.value("search_seconds", method="search_many", terms="batch", filters="none") == 1
+    assert metrics.value("search_seconds", method="search_ranked", terms="none", filters="none") == 1
+    
+    assert metrics.value("records") == 2
+    assert metrics.value("records_in_memory") == 2
+    size = metrics.value("record_bytes")
+    assert size > 0
+    cache_manager.save_model("BIOMD0000000003", dict(sample_cache_data["BIOMD0000000001"], id="BIOMD0000000003"))
+    assert metrics.value("records_in_memory") == 3
+    assert metrics.value("record_bytes") > size
+    assert "biomodels_cache_hits_total 2\n" in metrics.prometheus()
+
+def test_metrics_bounded_memory(temp_cache_dir, sample_cache_data):
+    cache_manager = CacheManager(temp_cache_dir, backend="sqlite", max_records=1)
+    cache_manager.update_cache(list(sample_cache_data.values()))
+    assert cache_manager.metrics.value("records") == 2
+    assert cache_manager.metrics.value("records_in_memory") == 0
+    cache_manager.get_model("1")
+    assert cache_manager.metrics.value("records_in_memory") == 1
+    assert cache_manager.metrics.value("record_bytes") > 0
+
+def test_list_models(temp_cache_dir, sample_cache_data):
+    cache_manager = CacheManager(temp_cache_dir)
+    cache_manager.update_cache(list(sample_cache_data.values()))
+    assert cache_manager.list_models() == list(sample_cache_data.values())
+    assert cache_manager.list_models(1, 5) == [sample_cache_data["BIOMD0000000002"]]
+    assert cache_manager.list_models(0, 0) == []
@@ -0,0 +1,133 @@
+import pytest
+import io
+import os
+import json
+from biomodels_cache_admin import codec as codec_module
+from biomodels_cache_admin.cache import CacheManager
+from biomodels_cache_admin.codec import CODECS, JSONCodec, available_codecs, get_codec
+from biomodels_cache_admin.records import CompactRecord
+
+@pytest.fixture
+def model_defaults(model_defaults):
+    return dict(model_defaults, authors=["José Smith"], journal="Nature", title="Ca²⁺ oscillations",
+                citation=None, url="http://identifiers.org/pubmed/1")
+
+@pytest.fixture(params=list(CODECS))
+def codec(request):
+    if request.param not in available_codecs():
+        pytest.skip(f"{request.param} is not installed")
+    return get_codec(request.param)
+
+def test_round_trip(codec, make_model):
+    models = {model["id"]: model for model in (make_model(1), make_model(2, species_count=3))}
+    compact = codec.dumps(models)
+    pretty = codec.dumps(models, pretty=True)
+    assert b"\n" not in compact and b'\n  "BIOMD0000000001"' in pretty
+    # Non-ASCII text is kept as UTF-8
+    assert "Ca²⁺".encode("utf-8") in compact and "Ca²⁺".encode("utf-8") in pretty
+    assert codec.loads(compact) == codec.loads(pretty) == models
+    assert json.loads(compact) == models
+    assert codec.loads(compact.decode("utf-8")) == models
+
+def test_dump_models_one_record_per_line(codec, make_model):
+    models = {model["id"]: model for model in (make_model(1), make_model(2))}
+    f = io.BytesIO()
+    codec.dump_models(models, f)
+    lines = f.getvalue().splitlines()
+    assert lines[0] == b"{" and lines[-1] == b"}" and len(lines) == 4
+    assert lines[1].startswith(b'"BIOMD0000000001":{')
+    assert json.loads(f.getvalue()) == models
+
+    empty = io.BytesIO()
+    codec.dump_models({}, empty)
+    assert json.loads(empty.getvalue()) == {}
+
+def test_codecs_write_identical_bytes(codec, make_model):
+    models = {model["id"]: model for model in (
+        make_model(1), make_model(2, species_count=3, synopsis="Line\n\"quoted\"\t\u2028\x1f ü/"))}
+    reference = JSONCodec()
+    assert codec.dumps(models) == reference.dumps(models)
+    assert codec.dumps(models, pretty=True) == reference.dumps(models, pretty=True)
+    f, g = io.BytesIO(), io.BytesIO()
+    codec.dump_models(models, f)
+    reference.dump_models(models, g)
+    assert f.getvalue() == g.getvalue()
+
+def test_compact_records_and_errors(codec, make_model):
+    model = make_model(1)
+    assert codec.loads(codec.dumps({"a": CompactRecord(model)})) == {"a": model}
+    with pytest.raises(json.JSONDecodeError):
+        codec.loads(b'{"a": ')
+    with pytest.raises(json.JSONDecodeError):
+        codec.loads(b'{"a": "\xff"}')
+
+def test_get_codec(monkeypatch):
+    assert available_codecs()[-1] == "json"
+    assert get_codec().name == available_codecs()[0]
+    codec = JSONCodec()
+    assert get_codec(codec) is codec
+    with pytest.raises(ValueError):
+        get_codec("yaml")
+    monkeypatch.setattr(codec_module, "orjson", None)
+    monkeypatch.setattr(codec_module, "msgspec", None)
+    assert available_codecs() == ["json"]
+    assert get_codec().name == "json"
+    with pytest.raises(ValueError):
+        get_codec("orjson")
+
+def test_cache_files_are_compact(temp_cache_dir, codec, make_model):
+    models = [make_model(i) for i in range(1, 4)]
+    cache_manager = CacheManager(temp_cache_dir, json_codec=codec)
+    cache_manager.update_cache(models)
+    cache_file = os.path.join(temp_cache_dir, "biomodels_cache.json")
+    with open(cache_file, "rb") as f:
+        assert len(f.read().splitlines()) == 5
+
+    # Readable by the other codecs
+    for name in available_codecs():
+        assert dict(CacheManager(temp_cache_dir, json_codec=name).cache) == {m["id"]: m for m in models}
+
+    export_file = os.path.join(temp_cache_dir, "export.json")
+    cache_manager.export_json(export_file)
+    with open(export_file, "rb") as f:
+        assert f.read().startswith(b'{\n  "BIOMD0000000001": {\n    "id"')
+    cache_manager.export_json(export_file, pretty=False)
+    with open(export_file, "rb") as f, open(cache_file, "rb") as g:
+        assert f.read() == g.read()
+
+class RecordingCodec(JSONCodec):
+    """Standard library codec that counts the records it encodes and decodes."""
+    
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+    
+    def dumps(self, obj, pretty=False):
+        self.calls += 1
+        return super().dumps(obj, pretty)
+    
+    def loads(self, data):
+        self.calls += 1
+        return super().loads(data)
+
+def test_journal_ndjson_and_snapshot_use_the_codec(temp_cache_dir, tmp_path, make_model):
+    codec = RecordingCodec()
+    cache_manager = CacheManager(temp_cache_dir, json_codec=codec)
+    cache_manager.update_cache([make_model(1)])
+    
+    calls = codec.calls
+    cache_manager.save_model("BIOMD0000000002", make_model(2))
+    assert list(cache_manager.journal.replay()) == [("BIOMD0000000002", make_model(2))]
+    assert codec.calls == calls + 2
+    
+    calls = codec.calls
+    ndjson_file = str(tmp_path / "models.ndjson")
+    assert cache_manager.export_ndjson(ndjson_file) == 2
+    cache_manager.import_ndjson(ndjson_file)
+    assert codec.calls == calls + 4
+    
+    calls = codec.calls
+    cache_manager.export_snapshot()
+    snapshot_cache = CacheManager(temp_cache_dir, backend="snapshot", json_codec=codec)
+    assert snapshot_cache.get_model("2") == make_model(2)
+    assert codec.calls == calls + 3
@@ -0,0 +1,96 @@
+import pytest
+import os
+import json
+from urllib.parse import parse_qs, urlparse
+from biomodels_cache_admin.api import BioModelsAPI
+from biomodels_cache_admin.crawler import CatalogCrawler
+
+@pytest.fixture
+def catalog(stub_server):
+    stub, base_url = stub_server
+    for i in range(1, 26):
+        stub.add_model(f"BIOMD{i:010d}")
+    # Listed but not retrievable
+    listing = sorted(stub.models) + ["BIOMD0000000999"]
+    
+    default_handler = stub.handler
+    
+    def handler(request):
+        url = urlparse(request.path)
+        if url.path == "/search":
+            params = parse_qs(url.query)
+            offset = int(params["offset"][0])
+            count = int(params["numResults"][0])
+            page = [{"id": model_id} for model_id in listing[offset:offset + count]]
+            body = json.dumps({"matches": len(listing), "models": page}).encode()
+            return 200, {"Content-Type": "application/json"}, body
+        return default_handler(request)
+    
+    stub.handler = handler
+    return stub, base_url
+
+def make_crawler(base_url, cache_dir, **kwargs):
+    api = BioModelsAPI(cache_dir=cache_dir, max_workers=4)
+    api.base_url = base_url
+    return CatalogCrawler(api, page_size=10, **kwargs)
+
+def test_crawl_full_catalog(catalog, temp_cache_dir):
+    stub, base_url = catalog
+    crawler = make_crawler(base_url, temp_cache_dir)
+    progress = []
+    
+    summary = crawler.crawl(lambda current, total: progress.append((current, total)))
+    
+    assert summary == {"total": 26, "fetched": 25, "skipped": 0, "missing": 1, "failed": [], "complete": True}
+    assert progress == [(10, 26), (20, 26), (26, 26)]
+    assert not os.path.exists(crawler.checkpoint_path)
+    # The crawl ends compacted into the cache file
+    with open(crawler.cache_manager.cache_file) as f:
+        cached = json.load(f)
+    assert len(cached) == 25
+    assert cached["BIOMD0000000003"]["title"] == "Title BIOMD0000000003"
+
+def test_crawl_resumes_from_checkpoint(catalog, temp_cache_dir):
+    stub, base_url = catalog
+    crawler = make_crawler(base_url, temp_cache_dir)
+    
+    summary = crawler.crawl(max_pages=2)
+    assert not summary["complete"]
+    assert summary["fetched"] == 20
+    assert crawler.load_checkpoint()["offset"] == 20
+    # No third page is requested
+    assert len([path for path, _ in stub.requests if path.startswith("/search")]) == 2
+    with pytest.raises(ValueError):
+        crawler.crawl(max_pages=0)
+    
+    # A new process picks up where the first one stopped
+    stub.requests.clear()
+    resumed = make_crawler(base_url, temp_cache_dir)
+    assert len(resumed.cache_manager.cache) == 20
+    summary = resumed.crawl()
+    
+    assert summary["complete"]
+    assert summary["fetched"] == 25
+    fetched = [path for path, _ in stub.requests if not path.startswith("/search")]
+    assert sorted(fetched) == [f"/BIOMD{i:010d}" for i in range(21, 26)] + ["/BIOMD0000000999"]
+
+def test_crawl_skips_cached_and_records_failures(catalog, temp_cache_dir):
+    stub, base_url = catalog
+    crawler = make_crawler(base_url, temp_cache_dir)
+    crawler.crawl()
+    
+    default_handler = stub.handler
+    
+    def failing(request):
+        if request.path == "/BIOMD0000000999":
+            return 500, {}, b""
+        return default_handler(request)
+    
+    stub.handler = failing
+    crawler = make_crawler(base_url, temp_cache_dir)
+    summary = crawler.crawl()
+    assert summary["skipped"] == 25
+    # Checking for cached models is not counted as cache hits
+    assert crawler.api.metrics.value("cache_hits_total") is None
+    assert summary["fetched"] == 0
+    assert summary["failed"] == ["BIOMD0000000999"]
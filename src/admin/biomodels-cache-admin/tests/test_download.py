@@ -0,0 +1,124 @@
+import pytest
+import os
+import re
+import hashlib
+from biomodels_cache_admin.api import BioModelsAPI
+from biomodels_cache_admin.download import DownloadManifest, sha256_file
+
+CONTENT = b"<sbml>" + b"<species/>" * 50000 + b"</sbml>"
+
+@pytest.fixture
+def range_server(stub_server):
+    """Stub API serving one model file with ETag, If-None-Match, Range and If-Range support."""
+    stub, base_url = stub_server
+    stub.files["BIOMD0000000001"] = CONTENT
+    stub.etag = '"v1"'
+    
+    def handler(request):
+        model_id = request.path.rsplit("/", 1)[-1]
+        if model_id not in stub.files:
+            return 404, {}, b""
+        body = stub.files[model_id]
+        headers = {"ETag": stub.etag}
+        if request.headers.get("If-None-Match") == stub.etag:
+            return 304, headers, b""
+        match = re.match(r"bytes=(\d+)-$", request.headers.get("Range", ""))
+        if match and request.headers.get("If-Range", stub.etag) == stub.etag:
+            start = int(match.group(1))
+            if start >= len(body):
+                return 416, headers, b""
+            headers["Content-Range"] = f"bytes {start}-{len(body) - 1}/{len(body)}"
+            return 206, headers, body[start:]
+        return 200, headers, body
+    
+    stub.handler = handler
+    return stub, base_url
+
+def make_api(base_url, cache_dir):
+    api = BioModelsAPI(cache_dir=cache_dir)
+    api.base_url = base_url
+    return api
+
+def test_sha256_file(temp_cache_dir):
+    path = os.path.join(temp_cache_dir, "file")
+    with open(path, "wb") as f:
+        f.write(CONTENT)
+    assert sha256_file(path) == hashlib.sha256(CONTENT).hexdigest()
+
+def test_download_records_hash_and_skips_matching_file(range_server, temp_cache_dir):
+    stub, base_url = range_server
+    api = make_api(base_url, temp_cache_dir)
+    filepath = os.path.join(temp_cache_dir, "BIOMD0000000001.xml")
+    
+    assert api.download_model("BIOMD0000000001", filepath)
+    with open(filepath, "rb") as f:
+        assert f.read() == CONTENT
+    assert not os.path.exists(filepath + ".part")
+    record = DownloadManifest(temp_cache_dir).get("BIOMD0000000001")
+    assert record["sha256"] == hashlib.sha256(CONTENT).hexdigest()
+    assert record["size"] == len(CONTENT)
+    
+    # Revalidated with a conditional request, not downloaded again
+    stub.requests.clear()
+    api = make_api(base_url, temp_cache_dir)
+    assert api.download_model("BIOMD0000000001", filepath)
+    assert [headers["If-None-Match"] for _, headers in stub.requests] == [stub.etag]
+    assert not api.metrics.value("downloaded_bytes_total", endpoint="download")
+    
+    # Downloaded again once it changes upstream
+    stub.files["BIOMD0000000001"] = CONTENT + b"\n"
+    stub.etag = '"v2"'
+    assert make_api(base_url, temp_cache_dir).download_model("BIOMD0000000001", filepath)
+    with open(filepath, "rb") as f:
+        assert f.read() == CONTENT + b"\n"
+    assert DownloadManifest(temp_cache_dir).get("BIOMD0000000001")["etag"] == '"v2"'
+
+def test_download_resumes_partial_file(range_server, temp_cache_dir):
+    stub, base_url = range_server
+    api = make_api(base_url, temp_cache_dir)
+    filepath = os.path.join(temp_cache_dir, "BIOMD0000000001.xml")
+    
+    # Simulate a transfer that died after the first 100 kB
+    with open(filepath + ".part", "wb") as f:
+        f.write(CONTENT[:100000])
+    api.downloads.update("BIOMD0000000001", partial={"etag": stub.etag, "last_modified": None})
+    
+    assert api.download_model("BIOMD0000000001", filepath)
+    assert stub.requests[-1][1]["Range"] == "bytes=100000-"
+    with open(filepath, "rb") as f:
+        assert f.read() == CONTENT
+
+def test_download_restarts_when_file_changed(range_server, temp_cache_dir):
+    stub, base_url = range_server
+    api = make_api(base_url, temp_cache_dir)
+    filepath = os.path.join(temp_cache_dir, "BIOMD0000000001.xml")
+    
+    with open(filepath + ".part", "wb") as f:
+        f.write(b"stale bytes from the old revision")
+    api.downloads.update("BIOMD0000000001", partial={"etag": '"v0"', "last_modified": None})
+    
+    assert api.download_model("BIOMD0000000001", filepath)
+    with open(filepath, "rb") as f:
+        assert f.read() == CONTENT
+
+def test_download_rejects_hash_mismatch(range_server, temp_cache_dir):
+    stub, base_url = range_server
+    api = make_api(base_url, temp_cache_dir)
+    filepath = os.path.join(temp_cache_dir, "BIOMD0000000001.xml")
+    
+    assert not api.download_model("BIOMD0000000001", filepath, expected_sha256="0" * 64)
+    assert not os.path.exists(filepath)
+    assert not os.path.exists(filepath + ".part")
+    
+    # A manifest hash is enforced while the ETag is unchanged, unless
+    # verification is turned off
+    api.downloads.update("BIOMD0000000001", sha256="0" * 64, etag=stub.etag)
+    assert not api.download_model("BIOMD0000000001", filepath)
+    assert list(api.download_models(["BIOMD0000000001"], temp_cache_dir)) == [("BIOMD0000000001", False)]
+    assert api.download_model("BIOMD0000000001", filepath, verify=False)
+    assert api.downloads.get("BIOMD0000000001")["sha256"] == hashlib.sha256(CONTENT).hexdigest()
+    
+    # and discarded once the file changes upstream
+    api.downloads.update("BIOMD0000000001", sha256="0" * 64)
+    stub.etag = '"v2"'
+    assert list(api.download_models(["BIOMD0000000001"], temp_cache_dir)) == [("BIOMD0000000001", True)]
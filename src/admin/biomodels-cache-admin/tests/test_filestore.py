@@ -0,0 +1,111 @@
+import pytest
+import gc
+import os
+import warnings
+import hashlib
+from biomodels_cache_admin.api import BioModelsAPI
+from biomodels_cache_admin.filestore import FileStore
+
+REAL_CACHE_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "..", "..", "cache")
+
+CONTENT = b"<sbml>" + b"<species id='s1' compartment='c'/>" * 2000 + b"</sbml>"
+
+@pytest.fixture
+def store_dir(tmp_path):
+    return str(tmp_path / "files")
+
+@pytest.mark.parametrize("codec", ["gzip", "xz"])
+def test_round_trip(store_dir, codec):
+    store = FileStore(store_dir, codec=codec)
+    sha256 = store.put_stream("BIOMD0000000001", [CONTENT[:1000], CONTENT[1000:]])
+    
+    assert sha256 == hashlib.sha256(CONTENT).hexdigest()
+    record = store.get("BIOMD0000000001")
+    assert record["size"] == len(CONTENT)
+    assert record["codec"] == codec
+    assert record["stored_size"] < len(CONTENT) / 10
+    assert b"".join(store.read_chunks("BIOMD0000000001", chunk_size=4096)) == CONTENT
+    with store.open("BIOMD0000000001") as f:
+        assert f.read(6) == b"<sbml>"
+
+@pytest.mark.parametrize("codec", ["gzip", "xz"])
+def test_reads_close_the_object_file(store_dir, codec):
+    store = FileStore(store_dir, codec=codec)
+    store.put_stream("BIOMD0000000001", [CONTENT])
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always", ResourceWarning)
+        assert b"".join(store.read_chunks("BIOMD0000000001")) == CONTENT
+        gc.collect()
+    assert not [w for w in caught if issubclass(w.category, ResourceWarning)]
+
+def test_zstd_codec(store_dir):
+    pytest.importorskip("zstandard")
+    store = FileStore(store_dir, codec="zstd")
+    store.put_stream("BIOMD0000000001", [CONTENT])
+    assert b"".join(store.read_chunks("BIOMD0000000001")) == CONTENT
+
+def test_unknown_codec(store_dir):
+    with pytest.raises(ValueError):
+        FileStore(store_dir, codec="rar")
+
+def test_identical_files_stored_once(store_dir):
+    store = FileStore(store_dir)
+    store.put_stream("BIOMD0000000001", [CONTENT])
+    store.put_stream("BIOMD0000000002", [CONTENT])
+    
+    objects = [name for _, _, names in os.walk(store.objects_dir) for name in names]
+    assert len(objects) == 1
+    
+    # Manifest survives a reload
+    reloaded = FileStore(store_dir)
+    assert reloaded.get("BIOMD0000000002")["sha256"] == reloaded.get("BIOMD0000000001")["sha256"]
+    with pytest.raises(KeyError):
+        reloaded.open("BIOMD0000000003")
+
+def test_gc_removes_unreferenced_objects(store_dir):
+    store = FileStore(store_dir)
+    store.put_stream("BIOMD0000000001", [CONTENT])
+    store.put_stream("BIOMD0000000001", [CONTENT + b"<!-- revision 2 -->"])
+    
+    assert store.gc() == 1
+    assert b"".join(store.read_chunks("BIOMD0000000001")).endswith(b"revision 2 -->")
+    store.remove("BIOMD0000000001")
+    assert store.gc() == 1
+    assert len(store) == 0
+
+def test_import_and_export(store_dir, tmp_path):
+    if not os.path.exists(os.path.join(REAL_CACHE_DIR, "BIOMD0000000413.xml")):
+        pytest.skip("cached XML files not available")
+    store = FileStore(store_dir)
+    assert store.import_directory(REAL_CACHE_DIR) >= 1
+    
+    record = store.get("BIOMD0000000413")
+    assert record["stored_size"] < record["size"] / 3
+    out = str(tmp_path / "out.xml")
+    store.export("BIOMD0000000413", out)
+    with open(out, "rb") as f, open(os.path.join(REAL_CACHE_DIR, "BIOMD0000000413.xml"), "rb") as g:
+        assert f.read() == g.read()
+
+def test_download_into_store(stub_server, tmp_path, store_dir):
+    stub, base_url = stub_server
+    stub.files["BIOMD0000000001"] = CONTENT
+    stub.files["BIOMD0000000002"] = CONTENT
+    
+    api = BioModelsAPI(cache_dir=str(tmp_path), file_store=FileStore(store_dir))
+    api.base_url = base_url
+    assert dict(api.download_models(["BIOMD0000000001", "BIOMD0000000002"])) == {
+        "BIOMD0000000001": True, "BIOMD0000000002": True}
+    assert b"".join(api.file_store.read_chunks("BIOMD0000000002")) == CONTENT
+    assert os.listdir(api.file_store.tmp_dir) == []
+    
+    # Already stored with the recorded hash, so only revalidated
+    stub.requests.clear()
+    assert api.download_model("BIOMD0000000001")
+    assert [headers.get("If-None-Match") for _, headers in stub.requests] == [api.downloads.get("BIOMD0000000001")["etag"]]
+    
+    # Replaced once it changes upstream
+    stub.files["BIOMD0000000001"] = CONTENT + b"<!-- v2 -->"
+    assert api.download_model("BIOMD0000000001")
+    assert b"".join(api.file_store.read_chunks("BIOMD0000000001")) == CONTENT + b"<!-- v2 -->"
+    
+    assert not BioModelsAPI(cache_dir=str(tmp_path)).download_model("BIOMD0000000001")
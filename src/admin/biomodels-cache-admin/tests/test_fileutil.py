@@ -0,0 +1,104 @@
+import pytest
+import os
+import json
+import threading
+import time
+from biomodels_cache_admin.cache import CacheManager
+from biomodels_cache_admin.fileutil import atomic_open, file_lock, keep_backup
+
+def test_atomic_open_replaces_file(temp_cache_dir):
+    path = os.path.join(temp_cache_dir, "data.json")
+    with atomic_open(path) as f:
+        f.write("new")
+    with open(path) as f:
+        assert f.read() == "new"
+    assert os.listdir(temp_cache_dir) == ["data.json"]
+
+def test_atomic_open_keeps_old_file_on_error(temp_cache_dir):
+    path = os.path.join(temp_cache_dir, "data.json")
+    with open(path, "w") as f:
+        f.write("old")
+    
+    with pytest.raises(RuntimeError):
+        with atomic_open(path) as f:
+            f.write("partial")
+            raise RuntimeError("killed mid-dump")
+    
+    with open(path) as f:
+        assert f.read() == "old"
+    assert os.listdir(temp_cache_dir) == ["data.json"]
+
+def test_keep_backup(temp_cache_dir):
+    path = os.path.join(temp_cache_dir, "data.json")
+    backup = path + ".bak"
+    keep_backup(path, backup)
+    assert not os.path.exists(backup)
+    
+    with open(path, "w") as f:
+        f.write("v1")
+    keep_backup(path, backup)
+    with atomic_open(path) as f:
+        f.write("v2")
+    with open(backup) as f:
+        assert f.read() == "v1"
+
+def test_file_lock_is_exclusive(temp_cache_dir):
+    lock = os.path.join(temp_cache_dir, "test.lock")
+    events = []
+    
+    def worker(name):
+        with file_lock(lock):
+            events.append(f"{name} start")
+            time.sleep(0.05)
+            events.append(f"{name} end")
+    
+    threads = [threading.Thread(target=worker, args=(str(i),)) for i in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    
+    for i in range(0, len(events), 2):
+        assert events[i].split()[0] == events[i + 1].split()[0]
+
+def test_corrupt_cache_is_not_wiped(temp_cache_dir, make_model):
+    cache_manager = CacheManager(temp_cache_dir)
+    cache_manager.update_cache([make_model(1)])
+    cache_manager.update_cache([make_model(2)])
+    
+    # Simulate a truncated cache file
+    with open(cache_manager.cache_file, "w") as f:
+        f.write('{"BIOMD0000000001": {"id"')
+    
+    with pytest.warns(UserWarning):
+        reader = CacheManager(temp_cache_dir)
+    # Falls back to the last good snapshot, which predates the second update
+    assert list(reader.cache) == ["BIOMD0000000001"]
+    with open(reader.cache_file) as f:
+        assert f.read() == '{"BIOMD0000000001": {"id"'
+
+def test_cache_with_invalid_utf8_falls_back_to_backup(temp_cache_dir, make_model):
+    cache_manager = CacheManager(temp_cache_dir, json_codec="json")
+    cache_manager.update_cache([make_model(1)])
+    cache_manager.update_cache([make_model(2)])
+    with open(cache_manager.cache_file, "wb") as f:
+        f.write(b'{"BIOMD0000000001": {"name": "\xff"}}')
+    
+    with pytest.warns(UserWarning):
+        reader = CacheManager(temp_cache_dir, json_codec="json")
+    assert list(reader.cache) == ["BIOMD0000000001"]
+
+def test_concurrent_managers_merge_on_save(temp_cache_dir, make_model):
+    first = CacheManager(temp_cache_dir)
+    second = CacheManager(temp_cache_dir)
+    
+    first.update_cache([make_model(1)])
+    second.update_cache([make_model(2)])
+    second.save_model("BIOMD0000000003", make_model(3))
+    first.save_model("BIOMD0000000004", make_model(4))
+    first.compact()
+    
+    with open(first.cache_file) as f:
+        saved = json.load(f)
+    assert sorted(saved) == [f"BIOMD{i:010d}" for i in range(1, 5)]
+    assert sorted(CacheManager(temp_cache_dir).cache) == sorted(saved)
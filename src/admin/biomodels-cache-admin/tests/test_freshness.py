@@ -0,0 +1,106 @@
+import pytest
+import json
+import hashlib
+from urllib.parse import urlparse
+from biomodels_cache_admin.api import BioModelsAPI
+from biomodels_cache_admin.crawler import CatalogCrawler
+from biomodels_cache_admin.freshness import FreshnessStore, content_hash
+
+@pytest.fixture
+def etag_server(stub_server):
+    """Stub API that sends ETags, honours If-None-Match and lists lastModified."""
+    stub, base_url = stub_server
+    for i in range(1, 6):
+        stub.add_model(f"BIOMD{i:010d}")
+    stub.modified = {model_id: 1000 for model_id in stub.models}
+    
+    def handler(request):
+        path = urlparse(request.path).path
+        if path == "/search":
+            models = [{"id": m, "lastModified": stub.modified[m]} for m in sorted(stub.models)]
+            return 200, {}, json.dumps({"matches": len(models), "models": models}).encode()
+        model_id = path.lstrip("/")
+        if model_id not in stub.models:
+            return 404, {}, b""
+        body = json.dumps(stub.models[model_id]).encode()
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        if request.headers.get("If-None-Match") == etag:
+            return 304, {"ETag": etag}, b""
+        return 200, {"ETag": etag}, body
+    
+    stub.handler = handler
+    return stub, base_url
+
+def make_api(base_url, cache_dir):
+    api = BioModelsAPI(cache_dir=cache_dir, max_workers=2)
+    api.base_url = base_url
+    return api
+
+def model_requests(stub):
+    return [path for path, _ in stub.requests if not path.startswith("/search")]
+
+def test_content_hash_ignores_key_order():
+    assert content_hash({"a": 1, "b": [1, 2]}) == content_hash({"b": [1, 2], "a": 1})
+    assert content_hash({"a": 1}) != content_hash({"a": 2})
+
+def test_refresh_uses_conditional_requests(etag_server, temp_cache_dir):
+    stub, base_url = etag_server
+    api = make_api(base_url, temp_cache_dir)
+    list(api.get_models(sorted(stub.models)))
+    
+    # First refresh has no validators yet, but nothing changed
+    summary = api.refresh_models()
+    assert sorted(summary["unchanged"]) == sorted(stub.models)
+    assert summary["updated"] == []
+    
+    # Second refresh sends If-None-Match and gets 304s
+    stub.models["BIOMD0000000002"]["name"] = "Renamed"
+    stub.requests.clear()
+    api = make_api(base_url, temp_cache_dir)
+    summary = api.refresh_models()
+    assert summary["updated"] == ["BIOMD0000000002"]
+    assert len(summary["unchanged"]) == 4
+    assert all("If-None-Match" in headers for _, headers in stub.requests)
+    assert api.cache_manager.get_model("2")["name"] == "Renamed"
+    
+    stored = FreshnessStore(temp_cache_dir).get("BIOMD0000000002")
+    assert stored["content_hash"] == content_hash(api.cache_manager.get_model("2"))
+
+def test_refresh_reports_missing_and_failed(etag_server, temp_cache_dir):
+    stub, base_url = etag_server
+    api = make_api(base_url, temp_cache_dir)
+    list(api.get_models(sorted(stub.models)))
+    del stub.models["BIOMD0000000005"]
+    
+    default_handler = stub.handler
+    stub.handler = lambda request: (500, {}, b"") if request.path == "/BIOMD0000000004" else default_handler(request)
+    
+    summary = api.refresh_models()
+    assert summary["missing"] == ["BIOMD0000000005"]
+    assert summary["failed"] == ["BIOMD0000000004"]
+    # Missing models are reported but stay cached
+    assert api.cache_manager.get_model("5") is not None
+
+def test_crawler_refresh_uses_listing_timestamps(etag_server, temp_cache_dir):
+    stub, base_url = etag_server
+    api = make_api(base_url, temp_cache_dir)
+    crawler = CatalogCrawler(api, page_size=2)
+    
+    # New models are fetched by the first refresh
+    summary = crawler.refresh()
+    assert sorted(summary["updated"]) == sorted(stub.models)
+    
+    # Nothing is requested when no listing timestamp changed
+    stub.requests.clear()
+    summary = crawler.refresh()
+    assert len(summary["unchanged"]) == 5
+    assert model_requests(stub) == []
+    
+    stub.add_model("BIOMD0000000006")
+    stub.modified["BIOMD0000000006"] = 1000
+    stub.models["BIOMD0000000003"]["name"] = "Renamed"
+    stub.modified["BIOMD0000000003"] = 2000
+    stub.requests.clear()
+    summary = crawler.refresh()
+    assert sorted(summary["updated"]) == ["BIOMD0000000003", "BIOMD0000000006"]
+    assert sorted(model_requests(stub)) == ["/BIOMD0000000003", "/BIOMD0000000006"]
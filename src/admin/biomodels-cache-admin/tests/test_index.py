@@ -0,0 +1,126 @@
+import pytest
+import os
+import json
+from biomodels_cache_admin.cache import CacheManager
+from biomodels_cache_admin.index import FilterIndex, NGramIndex, date_ordinal
+
+REAL_CACHE = os.path.join(os.path.dirname(__file__), "..", "..", "..", "..", "cache", "biomodels_cache.json")
+
+@pytest.fixture
+def models():
+    return {
+        "BIOMD0000000001": {
+            "name": "Glycolysis Model",
+            "title": "Yeast glycolytic oscillations",
+            "synopsis": "A model of glycolysis in yeast",
+        },
+        "BIOMD0000000002": {
+            "name": "Cell Cycle",
+            "title": "Mitotic oscillator",
+            "synopsis": "Cyclin and cdc2 kinase",
+        },
+    }
+
+def test_candidates(models):
+    index = NGramIndex()
+    index.build(models)
+    
+    assert index.candidates("GLYCO") == ["BIOMD0000000001"]
+    assert index.candidates("oscillat") == ["BIOMD0000000001", "BIOMD0000000002"]
+    assert index.candidates("nonexistent") == []
+
+def test_short_query_not_indexed(models):
+    index = NGramIndex()
+    index.build(models)
+    
+    # Queries shorter than n cannot be narrowed by the index
+    assert index.candidates("ce") is None
+    assert index.candidates("") is None
+
+def test_remove_and_replace(models):
+    index = NGramIndex()
+    index.build(models)
+    
+    old = models["BIOMD0000000001"]
+    new = dict(old, name="Renamed", title="Renamed", synopsis="Renamed")
+    index.remove("BIOMD0000000001", old)
+    index.add("BIOMD0000000001", new)
+    
+    assert index.candidates("glyco") == []
+    assert index.candidates("renamed") == ["BIOMD0000000001"]
+    # Replaced models keep their original position
+    index.add("BIOMD0000000002", dict(models["BIOMD0000000002"], name="Renamed"))
+    assert index.candidates("renamed") == ["BIOMD0000000001", "BIOMD0000000002"]
+
+def test_indexed_search_matches_scan(tmp_path):
+    if not os.path.exists(REAL_CACHE):
+        pytest.skip("cache/biomodels_cache.json not available")
+    with open(REAL_CACHE, "r") as f:
+        data = json.load(f)
+    
+    scan = CacheManager(str(tmp_path / "scan"))
+    scan.cache = data
+    indexed = CacheManager(str(tmp_path / "indexed"), use_index=True)
+    indexed.cache = data
+    
+    for query in ["", "a", "ca", "calcium", "Glycolysis", "cell cycle", "MAPK", "zzzz", "in vitro"]:
+        assert indexed.search_models(query) == scan.search_models(query)
+
+def test_index_updated_on_writes(tmp_path):
+    cache_manager = CacheManager(str(tmp_path), use_index=True)
+    model = {
+        "id": "BIOMD0000000003",
+        "name": "Calcium spikes",
+        "title": "Calcium",
+        "synopsis": "Spiking",
+        "authors": [],
+        "date": "2020-01-01",
+        "journal": "J",
+    }
+    cache_manager.update_cache([model])
+    assert [m["id"] for m in cache_manager.search_models("calcium")] == ["BIOMD0000000003"]
+    
+    cache_manager.put_model("BIOMD0000000003", dict(model, name="Renamed", title="Renamed"))
+    assert cache_manager.search_models("calcium") == []
+    
+    export_path = os.path.join(str(tmp_path), "export.json")
+    with open(export_path, "w") as f:
+        json.dump({"BIOMD0000000004": dict(model, id="BIOMD0000000004")}, f)
+    cache_manager.import_json(export_path)
+    assert [m["id"] for m in cache_manager.search_models("calcium")] == ["BIOMD0000000004"]
+
+def test_filter_index_candidates():
+    index = FilterIndex()
+    index.build({
+        "A": {"authors": ["John Smith", "Jane Doe"], "journal": "Nature", "date": "2020-01-01"},
+        "B": {"authors": ["jane doe"], "journal": "Science", "date": "2021-06-15"},
+        "C": {"authors": [], "journal": "NATURE", "date": "1996-11"},
+    })
+    assert index.candidates({}) is None
+    assert index.candidates({"authors": ["JANE DOE"]}) == {"A", "B"}
+    assert index.candidates({"journals": ["nature", "Cell"]}) == {"A", "C"}
+    assert index.candidates({"authors": ["Jane Doe"], "journals": ["Nature"]}) == {"A"}
+    
+    # Unparseable dates stay candidates, so the filter can report them
+    date_range = (date_ordinal("2021-01-01"), date_ordinal("2021-12-31"))
+    assert index.candidates({}, date_range) == {"B", "C"}
+    date_range = (date_ordinal("2020-01-01"), date_ordinal("2020-01-01"))
+    assert index.candidates({"journals": ["science"]}, date_range) == set()
+    
+    index.remove("A", {"authors": ["John Smith", "Jane Doe"], "journal": "Nature", "date": "2020-01-01"})
+    index.add("A", {"authors": ["John Smith"], "journal": "Cell", "date": "2022-01-01"})
+    assert index.candidates({"authors": ["jane doe"]}) == {"B"}
+    assert index.candidates({"journals": ["cell"]}) == {"A"}
+    assert index.candidates({}, date_range) == {"C"}
+
+
+def test_filter_index_build_matches_incremental_adds():
+    models = {f"M{i}": {"authors": [], "journal": "J", "date": f"{2000 + i % 7}-0{1 + i % 9}-01"} for i in range(50)}
+    built, added = FilterIndex(), FilterIndex()
+    built.build(models)
+    for model_id, model in models.items():
+        added.add(model_id, model)
+    for year in range(1999, 2008):
+        date_range = (date_ordinal(f"{year}-01-01"), date_ordinal(f"{year}-06-30"))
+        assert built.candidates({}, date_range) == added.candidates({}, date_range)
+    assert built.candidates({}, (date_ordinal("2003-01-01"), date_ordinal("2003-12-31")))
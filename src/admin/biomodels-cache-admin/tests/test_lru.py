@@ -0,0 +1,60 @@
+import pytest
+import threading
+from biomodels_cache_admin.lru import LRUCache
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.get("b") is None
+    assert cache.info() == {"hits": 3, "misses": 1, "evictions": 1, "hit_ratio": 0.75,
+                            "size": 2, "maxsize": 2, "weight": 0, "max_weight": None}
+
+def test_lru_weight_budget():
+    cache = LRUCache(None, max_weight=10, weigh=len)
+    cache.put("a", "xxxx")
+    cache.put("b", "xxxx")
+    cache.put("a", "xxx")
+    assert cache.weight == 7
+    cache.put("c", "xxxxx")
+    assert "b" not in cache and cache.weight == 8
+    # Values over the budget are not cached, and replace an older copy
+    cache.put("a", "x" * 11)
+    assert "a" not in cache and cache.weight == 5
+    assert cache.pop("c") == "xxxxx" and cache.weight == 0
+    assert cache.info()["evictions"] == 1
+    with pytest.raises(ValueError):
+        LRUCache(max_weight=10)
+
+def test_lru_clear_and_disabled():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.clear()
+    assert len(cache) == 0
+    
+    disabled = LRUCache(0)
+    disabled.put("a", 1)
+    assert disabled.get("a", "missing") == "missing"
+    with pytest.raises(ValueError):
+        LRUCache(-1)
+
+def test_lru_concurrent_use():
+    cache = LRUCache(50)
+    
+    def worker(offset):
+        for i in range(1000):
+            cache.put((offset + i) % 100, i)
+            cache.get(i % 100)
+    
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    info = cache.info()
+    assert info["size"] == 50
+    assert info["hits"] + info["misses"] == 8000
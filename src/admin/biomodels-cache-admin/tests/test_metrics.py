@@ -0,0 +1,77 @@
+import pytest
+from biomodels_cache_admin.metrics import Metrics
+
+def test_counters_and_gauges():
+    metrics = Metrics()
+    metrics.inc("cache_hits_total")
+    metrics.inc("cache_hits_total", 2)
+    metrics.inc("upstream_requests_total", endpoint="model", status=200)
+    metrics.set_gauge("records", lambda: 7)
+    metrics.set_gauge("record_bytes", lambda: None)
+
+    assert metrics.value("cache_hits_total") == 3
+    assert metrics.value("upstream_requests_total", endpoint="model", status="200") == 1
+    assert metrics.value("upstream_requests_total", endpoint="download", status="200") is None
+    assert metrics.value("records") == 7
+
+    snapshot = metrics.snapshot()
+    assert snapshot["upstream_requests_total"]["type"] == "counter"
+    assert snapshot["upstream_requests_total"]["samples"] == [
+        {"labels": {"endpoint": "model", "status": "200"}, "value": 1}]
+    assert snapshot["records"]["samples"] == [{"labels": {}, "value": 7}]
+    # Gauges without a value are left out
+    assert "record_bytes" not in snapshot
+
+def test_histogram_buckets():
+    metrics = Metrics(buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.5, 0.7, 3.0):
+        metrics.observe("search_seconds", seconds, method="search_models")
+
+    sample = metrics.snapshot()["search_seconds"]["samples"][0]
+    assert sample["count"] == 4
+    assert sample["sum"] == pytest.approx(4.25)
+    # Cumulative counts; the fourth observation is only in +Inf
+    assert sample["buckets"] == {0.1: 1, 1.0: 3}
+
+def test_timer_calls_hooks():
+    metrics = Metrics()
+    spans = []
+    hook = lambda *span: spans.append(span)
+    metrics.add_hook(hook)
+    metrics.add_hook(lambda *span: 1 / 0)
+
+    with metrics.timer("cache_save_seconds", backend="json"):
+        pass
+    with pytest.raises(KeyError):
+        with metrics.timer("cache_save_seconds", backend="json"):
+            raise KeyError("x")
+
+    # Durations are recorded for failures too, and a failing hook is only logged
+    assert metrics.value("cache_save_seconds", backend="json") == 2
+    name, labels, start, duration, error = spans[1]
+    assert (name, labels) == ("cache_save_seconds", {"backend": "json"})
+    assert start > 0 and duration >= 0
+    assert isinstance(error, KeyError) and spans[0][4] is None
+
+    metrics.remove_hook(hook)
+    with metrics.timer("cache_save_seconds", backend="json"):
+        pass
+    assert len(spans) == 2
+
+def test_prometheus_format():
+    metrics = Metrics(buckets=(0.5,))
+    metrics.inc("downloaded_bytes_total", 1234567, endpoint="download")
+    metrics.inc("upstream_requests_total", endpoint='a"b', status="error")
+    metrics.observe("search_seconds", 0.25, method="search_models", terms="one")
+    metrics.set_gauge("records", lambda: 3)
+
+    text = metrics.prometheus()
+    assert "# TYPE biomodels_downloaded_bytes_total counter\n" in text
+    assert 'biomodels_downloaded_bytes_total{endpoint="download"} 1234567\n' in text
+    assert 'biomodels_upstream_requests_total{endpoint="a\\"b",status="error"} 1\n' in text
+    assert "# HELP biomodels_search_seconds Search latency, by method and query shape\n" in text
+    assert 'biomodels_search_seconds_bucket{method="search_models",terms="one",le="0.5"} 1\n' in text
+    assert 'biomodels_search_seconds_bucket{method="search_models",terms="one",le="+Inf"} 1\n' in text
+    assert 'biomodels_search_seconds_sum{method="search_models",terms="one"} 0.25\n' in text
+    assert 'biomodels_search_seconds_count{method="search_models",terms="one"} 1\n' in text
+    assert "biomodels_records 3\n" in text
@@ -0,0 +1,47 @@
+import pytest
+import os
+import gzip
+from biomodels_cache_admin import filestore
+from biomodels_cache_admin.ndjson import codec_for_path, iter_ndjson, write_ndjson
+
+def models(count):
+    for i in range(count):
+        yield {"model_id": f"BIOMD{i:010d}", "name": f"Model {i}", "authors": ["Author"]}
+
+@pytest.mark.parametrize("name", ["models.ndjson", "models.ndjson.gz", "models.ndjson.xz", "models.ndjson.zst"])
+def test_round_trip(temp_cache_dir, name):
+    if name.endswith(".zst") and filestore.zstandard is None:
+        pytest.skip("zstandard is not installed")
+    path = os.path.join(temp_cache_dir, name)
+    assert write_ndjson(path, models(100)) == 100
+    assert list(iter_ndjson(path)) == list(models(100))
+
+def test_one_record_per_line(temp_cache_dir):
+    path = os.path.join(temp_cache_dir, "models.ndjson.gz")
+    write_ndjson(path, models(3))
+    with gzip.open(path, "rt") as f:
+        lines = f.read().splitlines()
+    assert len(lines) == 3
+    assert lines[0] == '{"model_id":"BIOMD0000000000","name":"Model 0","authors":["Author"]}'
+    assert codec_for_path(path) == "gzip"
+    assert codec_for_path("models.ndjson") is None
+
+def test_invalid_lines(temp_cache_dir):
+    path = os.path.join(temp_cache_dir, "models.ndjson")
+    with open(path, "w") as f:
+        f.write('{"model_id": "BIOMD0000000001"}\n\n[1, 2]\n')
+    records = iter_ndjson(path)
+    assert next(records) == {"model_id": "BIOMD0000000001"}
+    with pytest.raises(ValueError, match="Line 3"):
+        next(records)
+
+def test_failed_write_leaves_no_file(temp_cache_dir):
+    path = os.path.join(temp_cache_dir, "models.ndjson.gz")
+    
+    def failing():
+        yield from models(2)
+        raise RuntimeError("interrupted")
+    
+    with pytest.raises(RuntimeError):
+        write_ndjson(path, failing())
+    assert os.listdir(temp_cache_dir) == []
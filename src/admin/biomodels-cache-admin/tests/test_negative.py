@@ -0,0 +1,84 @@
+import pytest
+import os
+import json
+import time
+from biomodels_cache_admin.negative import NegativeCache
+
+def test_entries_expire(temp_cache_dir):
+    negative = NegativeCache(temp_cache_dir, ttl=0.05, error_ttl=60)
+    assert negative.add_missing("BIOMD0000099999")
+    assert negative.add_error("BIOMD0000000001", RuntimeError("timeout"))
+    assert negative.get("BIOMD0000099999")["reason"] == "missing"
+    assert negative.get("BIOMD0000000001") == {
+        "reason": "error", "error": "timeout", "expires": negative.entries["BIOMD0000000001"]["expires"]}
+    assert negative.stats() == {"missing": 1, "errors": 1, "saved": 2}
+    
+    time.sleep(0.06)
+    assert negative.get("BIOMD0000099999") is None
+    assert negative.stats() == {"missing": 0, "errors": 1, "saved": 2}
+
+def test_disabled_kinds_are_not_recorded(temp_cache_dir):
+    negative = NegativeCache(temp_cache_dir, ttl=0)
+    assert not negative.add_missing("BIOMD0000099999")
+    assert not negative.add_error("BIOMD0000099999", RuntimeError("timeout"))
+    assert negative.get("BIOMD0000099999") is None
+    with pytest.raises(ValueError):
+        NegativeCache(temp_cache_dir, ttl=-1)
+
+def test_persisted_without_expired_entries(temp_cache_dir):
+    negative = NegativeCache(temp_cache_dir)
+    negative.add_missing("BIOMD0000099999")
+    negative.add_missing("BIOMD0000099998")
+    negative.entries["BIOMD0000099998"]["expires"] = time.time() - 1
+    negative.save()
+    with open(os.path.join(temp_cache_dir, "negative_cache.json")) as f:
+        assert list(json.load(f)) == ["BIOMD0000099999"]
+    
+    reloaded = NegativeCache(temp_cache_dir)
+    assert reloaded.get("BIOMD0000099999")["reason"] == "missing"
+    assert reloaded.discard("BIOMD0000099999")
+    assert not reloaded.discard("BIOMD0000099999")
+
+def test_corrupt_file_is_ignored(temp_cache_dir):
+    with open(os.path.join(temp_cache_dir, "negative_cache.json"), "w") as f:
+        f.write("{not json")
+    assert NegativeCache(temp_cache_dir).entries == {}
+
+def test_flush_saves_in_batches(temp_cache_dir):
+    negative = NegativeCache(temp_cache_dir, save_interval=60)
+    path = os.path.join(temp_cache_dir, "negative_cache.json")
+    negative.add_missing("BIOMD0000099999")
+    assert negative.flush()
+    negative.add_missing("BIOMD0000099998")
+    negative.discard("BIOMD0000099999")
+    assert not negative.flush()
+    with open(path) as f:
+        assert list(json.load(f)) == ["BIOMD0000099999"]
+    
+    assert negative.flush(force=True)
+    assert not negative.flush(force=True)
+    with open(path) as f:
+        assert list(json.load(f)) == ["BIOMD0000099998"]
+
+def test_save_merges_other_processes(temp_cache_dir):
+    first = NegativeCache(temp_cache_dir)
+    first.add_missing("BIOMD0000099999")
+    first.save()
+    second = NegativeCache(temp_cache_dir)
+    first.add_missing("BIOMD0000099998")
+    first.save()
+    second.add_missing("BIOMD0000099997")
+    second.discard("BIOMD0000099999")
+    second.save()
+    assert sorted(second.entries) == ["BIOMD0000099997", "BIOMD0000099998"]
+    assert sorted(NegativeCache(temp_cache_dir).entries) == ["BIOMD0000099997", "BIOMD0000099998"]
+
+def test_saved_requests_are_counted(temp_cache_dir):
+    negative = NegativeCache(temp_cache_dir, error_ttl=60)
+    negative.add_missing("BIOMD0000099999")
+    negative.add_error("BIOMD0000000001", RuntimeError("timeout"))
+    negative.get("BIOMD0000099999")
+    negative.get("BIOMD0000099999")
+    negative.get("BIOMD0000000001")
+    assert negative.metrics.value("negative_cache_saved_total", reason="missing") == 2
+    assert negative.metrics.value("negative_cache_saved_total", reason="error") == 1
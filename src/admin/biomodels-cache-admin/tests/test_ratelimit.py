@@ -0,0 +1,49 @@
+import pytest
+import threading
+import time
+from biomodels_cache_admin.ratelimit import RateLimiter, map_concurrent
+
+def test_rate_limiter_throttles():
+    limiter = RateLimiter(rate=50, burst=2)
+    start = time.monotonic()
+    for _ in range(7):
+        limiter.acquire()
+    # Two calls pass immediately, the other five wait 1/50 s each
+    assert time.monotonic() - start >= 0.09
+
+def test_rate_limiter_invalid():
+    with pytest.raises(ValueError):
+        RateLimiter(rate=0)
+    with pytest.raises(ValueError):
+        RateLimiter(rate=1, burst=0)
+
+def test_map_concurrent_bounded():
+    active = []
+    peak = [0]
+    lock = threading.Lock()
+    
+    def work(i):
+        with lock:
+            active.append(i)
+            peak[0] = max(peak[0], len(active))
+        time.sleep(0.01)
+        with lock:
+            active.remove(i)
+        return i * i
+    
+    results = dict(map_concurrent(work, range(50), max_workers=3))
+    assert results == {i: i * i for i in range(50)}
+    assert peak[0] <= 3
+
+def test_map_concurrent_exceptions():
+    def work(i):
+        if i == 3:
+            raise KeyError(i)
+        return i
+    
+    results = dict(map_concurrent(work, range(5), max_workers=2, return_exceptions=True))
+    assert isinstance(results[3], KeyError)
+    assert results[4] == 4
+    
+    with pytest.raises(KeyError):
+        list(map_concurrent(work, range(5), max_workers=2))
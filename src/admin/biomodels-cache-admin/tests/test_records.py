@@ -0,0 +1,76 @@
+import pytest
+import json
+import pickle
+from biomodels_cache_admin.cache import CacheManager
+from biomodels_cache_admin.records import CompactRecord, decode_date, encode_date
+
+@pytest.fixture
+def model_defaults(model_defaults):
+    return dict(model_defaults, authors=["John Smith"], journal="Nature", citation=None,
+                url="http://identifiers.org/pubmed/1")
+
+@pytest.mark.parametrize("date", [1996, "2013-01", "2017-5", "2013-", "2020-01-31", "unknown", None, 123456, ""])
+def test_dates_round_trip(date, make_model):
+    assert decode_date(encode_date(date)) == date
+    record = CompactRecord(make_model(1, date=date))
+    assert record["date"] == date
+    assert type(record["date"]) is type(date)
+
+def test_date_key_sorts_by_date(make_model):
+    keys = [CompactRecord(make_model(1, date=d)).date_key for d in (1996, "1996-11", "2001-3", "2001-03-15")]
+    assert keys == sorted(keys)
+    assert CompactRecord(make_model(1, date="unknown")).date_key is None
+
+def test_record_is_dict_compatible(make_model):
+    model = make_model(1, species_count=3, authors=["A", "B"])
+    record = CompactRecord(model)
+    assert record == model and model == record
+    assert dict(record) == model
+    assert list(record) == list(model)
+    assert record["id"] == record["model_id"] == "BIOMD0000000001"
+    assert record["authors"] == ["A", "B"]
+    assert record.get("missing") is None
+    assert "species_count" in record and "missing" not in record
+    with pytest.raises(KeyError):
+        record["missing"]
+    with pytest.raises(TypeError):
+        record["name"] = "x"
+    assert pickle.loads(pickle.dumps(record)) == model
+    assert json.loads(json.dumps(record, default=dict)) == model
+
+def test_unusual_values_are_kept(make_model):
+    model = make_model(1, authors=None, id="OTHER")
+    record = CompactRecord(model)
+    assert record == model
+    assert record["id"] == "OTHER"
+
+def test_strings_are_shared(make_model):
+    first = CompactRecord(make_model(1, journal="".join(["Nat", "ure"]), authors=["".join(["J", "S"])]))
+    second = CompactRecord(make_model(2, journal="".join(["Nat", "ure"]), authors=["".join(["J", "S"])]))
+    assert first.journal is second.journal
+    assert first.authors[0] is second.authors[0]
+    assert first._keys is second._keys
+
+def test_compact_cache(temp_cache_dir, tmp_path, make_model):
+    cache_manager = CacheManager(temp_cache_dir, compact_records=True)
+    cache_manager.update_cache([make_model(1, name="Cell cycle"), make_model(2)])
+    cache_manager.save_model("BIOMD0000000003", make_model(3))
+    
+    assert isinstance(cache_manager.get_model("1"), CompactRecord)
+    assert cache_manager.get_model("3") == make_model(3)
+    assert cache_manager.search_models("cell", {"authors": ["john smith"], "journals": ["nature"],
+                                               "dateRange": {"start": "2019-01-01", "end": "2021-01-01"}}) \
+        == [make_model(1, name="Cell cycle")]
+    
+    cache_manager.compact()
+    reopened = CacheManager(temp_cache_dir)
+    assert reopened.cache == {m["id"]: m for m in (make_model(1, name="Cell cycle"), make_model(2), make_model(3))}
+    
+    export_file = str(tmp_path / "export.json")
+    cache_manager.export_json(export_file)
+    with open(export_file) as f:
+        assert len(json.load(f)) == 3
+
+def test_compact_records_needs_json_backend(temp_cache_dir):
+    with pytest.raises(ValueError):
+        CacheManager(temp_cache_dir, backend="sqlite", compact_records=True)
@@ -0,0 +1,138 @@
+import pytest
+import io
+import os
+import zipfile
+import xml.etree.ElementTree as ET
+from biomodels_cache_admin.cache import CacheManager
+from biomodels_cache_admin.filestore import FileStore
+from biomodels_cache_admin.sbml import (
+    extract_into_cache,
+    extract_sbml_metadata,
+    sources_from_directory,
+    sources_from_store,
+)
+
+SBML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<sbml xmlns="http://www.sbml.org/sbml/level2/version4" level="2" version="4">
+  <model id="m">
+    <annotation>
+      <rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" xmlns:bqbiol="http://biomodels.net/biology-qualifiers/">
+        <rdf:Description rdf:about="#m">
+          <bqbiol:isVersionOf><rdf:Bag>
+            <rdf:li rdf:resource="http://identifiers.org/GO:0006096"/>
+            <rdf:li rdf:resource="urn:miriam:kegg.pathway:sce00010"/>
+          </rdf:Bag></bqbiol:isVersionOf>
+        </rdf:Description>
+      </rdf:RDF>
+    </annotation>
+    <listOfCompartments>
+      <compartment id="cytosol"/>
+      <compartment id="nucleus"/>
+    </listOfCompartments>
+    <listOfSpecies>
+      <species id="glc" compartment="cytosol"/>
+      <species id="atp" compartment="cytosol"/>
+      <species id="adp" compartment="cytosol"/>
+    </listOfSpecies>
+    <listOfReactions>
+      <reaction id="hk">
+        <listOfReactants><speciesReference species="glc"/></listOfReactants>
+      </reaction>
+    </listOfReactions>
+  </model>
+</sbml>
+"""
+
+MANIFEST = b"""<?xml version="1.0" encoding="UTF-8"?>
+<omexManifest xmlns="http://identifiers.org/combine.specifications/omex-manifest">
+  <content location="./model_old.xml" format="http://identifiers.org/combine.specifications/sbml" master="false"/>
+  <content location="./model.xml" format="http://identifiers.org/combine.specifications/sbml" master="true"/>
+  <content location="./notes.txt" format="http://purl.org/NET/mediatypes/text/plain" master="false"/>
+</omexManifest>
+"""
+
+def make_omex():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("manifest.xml", MANIFEST)
+        archive.writestr("model_old.xml", b"<sbml/>")
+        archive.writestr("model.xml", SBML)
+        archive.writestr("notes.txt", b"notes")
+    return buffer.getvalue()
+
+def test_extract_sbml_metadata():
+    metadata = extract_sbml_metadata(io.BytesIO(SBML))
+    assert metadata == {
+        "sbml_level": 2,
+        "sbml_version": 4,
+        "species_count": 3,
+        "reaction_count": 1,
+        "compartments": ["cytosol", "nucleus"],
+        "annotation_uris": ["http://identifiers.org/GO:0006096", "urn:miriam:kegg.pathway:sce00010"],
+    }
+
+def test_extract_from_omex_archive(tmp_path):
+    path = str(tmp_path / "BIOMD0000000001.xml")
+    with open(path, "wb") as f:
+        f.write(make_omex())
+    assert extract_sbml_metadata(path) == extract_sbml_metadata(io.BytesIO(SBML))
+    
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("notes.txt", b"notes")
+    with pytest.raises(ValueError):
+        extract_sbml_metadata(io.BytesIO(buffer.getvalue()))
+
+def test_annotation_elements_are_not_counted():
+    annotated = SBML.replace(b"""<species id="glc" compartment="cytosol"/>""", b"""<species id="glc" compartment="cytosol">
+        <annotation><celldesigner:extension xmlns:celldesigner="http://www.sbml.org/2001/ns/celldesigner">
+          <celldesigner:listOfSpecies><celldesigner:species id="s1"/></celldesigner:listOfSpecies>
+          <celldesigner:species id="s2"/>
+        </celldesigner:extension></annotation>
+      </species>""")
+    metadata = extract_sbml_metadata(io.BytesIO(annotated))
+    assert metadata["species_count"] == 3
+
+def test_extract_invalid_xml():
+    with pytest.raises(ET.ParseError):
+        extract_sbml_metadata(io.BytesIO(b"<sbml><model>"))
+
+def test_extract_into_cache_and_filter(temp_cache_dir, make_model):
+    files_dir = os.path.join(temp_cache_dir, "files")
+    os.makedirs(files_dir)
+    with open(os.path.join(files_dir, "BIOMD0000000001.xml"), "wb") as f:
+        f.write(SBML)
+    with open(os.path.join(files_dir, "BIOMD0000000002.xml"), "wb") as f:
+        f.write(b"not xml")
+    with open(os.path.join(files_dir, "BIOMD0000000009.xml"), "wb") as f:
+        f.write(SBML)
+    
+    cache_manager = CacheManager(temp_cache_dir)
+    cache_manager.update_cache([make_model(1), make_model(2), make_model(3)])
+    summary = extract_into_cache(cache_manager, sources_from_directory(files_dir), max_workers=2)
+    
+    assert summary["extracted"] == 1
+    assert summary["skipped"] == 1
+    assert list(summary["failed"]) == ["BIOMD0000000002"]
+    assert cache_manager.get_model("1")["species_count"] == 3
+    
+    assert [m["id"] for m in cache_manager.search_models("", {"speciesCount": {"min": 2}})] == ["BIOMD0000000001"]
+    assert cache_manager.search_models("", {"speciesCount": {"max": 2}}) == []
+    assert len(cache_manager.search_models("", {"reactionCount": {"min": 1, "max": 1}, "sbmlLevels": [2]})) == 1
+    assert len(cache_manager.search_models("", {"annotations": ["GO:0006096"]})) == 1
+    assert cache_manager.search_models("", {"annotations": ["GO:0000001"]}) == []
+    
+    # Metadata is persisted with the records
+    assert CacheManager(temp_cache_dir).get_model("1")["compartments"] == ["cytosol", "nucleus"]
+
+def test_extract_from_compressed_store(temp_cache_dir, make_model):
+    store = FileStore(os.path.join(temp_cache_dir, "files"), codec="xz")
+    store.put_stream("BIOMD0000000001", [SBML])
+    store.put_stream("BIOMD0000000002", [make_omex()])
+    cache_manager = CacheManager(temp_cache_dir)
+    cache_manager.update_cache([make_model(1), make_model(2)])
+    
+    summary = extract_into_cache(cache_manager, sources_from_store(store), max_workers=1)
+    assert summary["extracted"] == 2
+    assert cache_manager.get_model("1")["reaction_count"] == 1
+    assert cache_manager.get_model("2")["species_count"] == 3
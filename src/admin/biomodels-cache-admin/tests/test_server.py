@@ -0,0 +1,154 @@
+import pytest
+import os
+import gzip
+import threading
+import http.client
+import requests
+from biomodels_cache_admin.api import BioModelsAPI
+from biomodels_cache_admin.crawler import CatalogCrawler
+from biomodels_cache_admin.filestore import FileStore
+from biomodels_cache_admin.server import CacheServer, accepts_gzip, etag_matches
+
+@pytest.fixture
+def cache_server(stub_server, tmp_path):
+    """Run a CacheServer whose misses go to the stub; yield (stub, server)."""
+    stub, base_url = stub_server
+    api = BioModelsAPI(cache_dir=str(tmp_path / "server"), file_store=FileStore(str(tmp_path / "files")))
+    api.base_url = base_url
+    server = CacheServer(api, ("127.0.0.1", 0))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield stub, server
+    server.shutdown()
+    server.server_close()
+
+def test_model_read_through(cache_server, temp_cache_dir):
+    stub, server = cache_server
+    stub.add_model("BIOMD0000000001")
+
+    worker = BioModelsAPI(cache_dir=temp_cache_dir)
+    worker.base_url = server.url
+    model = worker.get_model("1")
+    assert model["title"] == "Title BIOMD0000000001"
+    assert len(stub.requests) == 1
+
+    # Served from the server's cache from then on
+    response = requests.get(f"{server.url}/BIOMD0000000001")
+    assert response.json() == model
+    assert worker.get_model("2") is None
+    assert requests.get(f"{server.url}/BIOMD0000000002").status_code == 404
+    assert [path for path, _ in stub.requests] == ["/BIOMD0000000001", "/BIOMD0000000002"]
+    assert server.api.metrics.value("server_requests_total", endpoint="model", status="200") == 2
+    assert server.api.metrics.value("server_requests_total", endpoint="model", status="404") == 2
+
+def test_model_etag_and_gzip(cache_server):
+    stub, server = cache_server
+    stub.add_model("BIOMD0000000001", synopsis="x" * 2000)
+
+    response = requests.get(f"{server.url}/BIOMD0000000001")
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.json()["synopsis"] == "x" * 2000
+    etag = response.headers["ETag"]
+
+    response = requests.get(f"{server.url}/BIOMD0000000001", headers={"If-None-Match": etag})
+    assert response.status_code == 304 and response.content == b""
+    response = requests.get(f"{server.url}/BIOMD0000000001", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in response.headers
+    assert len(response.content) == int(response.headers["Content-Length"])
+
+def test_refresh_through_server(cache_server, temp_cache_dir):
+    stub, server = cache_server
+    stub.add_model("BIOMD0000000001")
+    worker = BioModelsAPI(cache_dir=temp_cache_dir)
+    worker.base_url = server.url
+    assert worker.refresh_model("BIOMD0000000001") == "updated"
+    # The ETag sent back by the worker matches, so nothing is resent
+    assert worker.refresh_model("BIOMD0000000001") == "unchanged"
+    assert server.api.metrics.value("server_requests_total", endpoint="model", status="304") == 1
+
+def test_refresh_listing_through_server(cache_server, temp_cache_dir):
+    stub, server = cache_server
+    for i in range(1, 4):
+        stub.add_model(f"BIOMD{i:010d}")
+        server.api.get_model(str(i))
+    server.api.freshness.set("BIOMD0000000001", {"listed": 1600000000000})
+    entries = requests.get(f"{server.url}/search", params={"query": "*:*"}).json()["models"]
+    assert entries[0]["lastModified"] == 1600000000000
+    assert all(entry["lastModified"] for entry in entries)
+
+    worker = BioModelsAPI(cache_dir=temp_cache_dir)
+    worker.base_url = server.url
+    crawler = CatalogCrawler(worker, page_size=2)
+    assert sorted(crawler.refresh()["updated"]) == ["BIOMD0000000001", "BIOMD0000000002", "BIOMD0000000003"]
+    # Unchanged listings are not requested again
+    requests_before = server.api.metrics.value("server_requests_total", endpoint="model", status="200")
+    assert crawler.refresh()["updated"] == []
+    assert server.api.metrics.value("server_requests_total", endpoint="model", status="200") == requests_before
+    assert server.api.metrics.value("server_requests_total", endpoint="model", status="304") is None
+
+def test_download_read_through(cache_server, temp_cache_dir):
+    stub, server = cache_server
+    stub.files["BIOMD0000000001"] = b"<sbml>" + b"x" * 5000 + b"</sbml>"
+
+    worker = BioModelsAPI(cache_dir=temp_cache_dir)
+    worker.base_url = server.url
+    path = os.path.join(temp_cache_dir, "1.xml")
+    assert worker.download_model("BIOMD0000000001", path)
+    with open(path, "rb") as f:
+        assert f.read() == stub.files["BIOMD0000000001"]
+    assert "BIOMD0000000001" in server.api.file_store
+
+    # Sent as stored, gzip-compressed, without another upstream request
+    stub.requests.clear()
+    connection = http.client.HTTPConnection(*server.server_address)
+    connection.request("GET", "/model/download/BIOMD0000000001", headers={"Accept-Encoding": "gzip"})
+    response = connection.getresponse()
+    assert response.getheader("Content-Encoding") == "gzip"
+    assert gzip.decompress(response.read()) == stub.files["BIOMD0000000001"]
+    etag = response.getheader("ETag")
+    # On the same keep-alive connection
+    connection.request("GET", "/model/download/BIOMD0000000001", headers={"If-None-Match": etag})
+    response = connection.getresponse()
+    assert response.status == 304
+    response.read()
+    connection.request("GET", "/model/download/1")
+    response = connection.getresponse()
+    assert response.getheader("Content-Encoding") is None
+    assert response.read() == stub.files["BIOMD0000000001"]
+    connection.request("GET", "/model/download/BIOMD0000000002")
+    assert connection.getresponse().status == 404
+    connection.close()
+    assert stub.requests == [("/model/download/BIOMD0000000002", stub.requests[0][1])]
+
+def test_crawl_through_server(cache_server, temp_cache_dir):
+    stub, server = cache_server
+    for i in range(1, 6):
+        stub.add_model(f"BIOMD{i:010d}")
+        server.api.get_model(str(i))
+
+    worker = BioModelsAPI(cache_dir=temp_cache_dir)
+    worker.base_url = server.url
+    result = CatalogCrawler(worker, page_size=2).crawl()
+    assert result["fetched"] == 5 and result["complete"]
+    assert dict(worker.cache_manager.cache) == dict(server.api.cache_manager.cache)
+
+    response = requests.get(f"{server.url}/search", params={"query": "title biomd0000000003"})
+    assert response.json()["matches"] == 1
+    assert requests.get(f"{server.url}/search", params={"offset": "x"}).status_code == 400
+    assert "biomodels_server_requests_total" in requests.get(f"{server.url}/metrics").text
+
+def test_upstream_failure(cache_server):
+    stub, server = cache_server
+    stub.handler = lambda request: (500, {}, b"")
+    response = requests.get(f"{server.url}/BIOMD0000000001")
+    assert response.status_code == 502
+    assert "error" in response.json()
+
+def test_header_helpers():
+    assert accepts_gzip("gzip, deflate")
+    assert accepts_gzip("br;q=1.0, *;q=0.5")
+    assert not accepts_gzip("gzip;q=0")
+    assert not accepts_gzip(None)
+    assert etag_matches('W/"a", "b"', '"a"')
+    assert etag_matches("*", '"a"')
+    assert not etag_matches('"b"', '"a"')
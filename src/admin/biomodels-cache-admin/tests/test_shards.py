@@ -0,0 +1,110 @@
+import pytest
+import os
+import json
+from biomodels_cache_admin.cache import CacheManager
+from biomodels_cache_admin.shards import ShardedStore, shard_cache, shard_of, unshard_cache
+
+@pytest.fixture
+def write_single_file_cache(make_model):
+    def write(cache_dir, count):
+        models = {m["id"]: m for m in (make_model(n) for n in range(1, count + 1))}
+        with open(os.path.join(cache_dir, "biomodels_cache.json"), "w") as f:
+            json.dump(models, f)
+        return models
+    return write
+
+def test_shard_of_is_stable_and_in_range():
+    assert shard_of("BIOMD0000000001", 64) == shard_of("BIOMD0000000001", 64)
+    assert all(0 <= int(shard_of(f"BIOMD{n:010d}", 64), 16) < 64 for n in range(200))
+    assert len(shard_of("BIOMD0000000001", 256)) == 2
+
+def test_lookup_loads_only_one_shard(temp_cache_dir, write_single_file_cache):
+    models = write_single_file_cache(temp_cache_dir, 100)
+    shard_cache(os.path.join(temp_cache_dir, "biomodels_cache.json"),
+                os.path.join(temp_cache_dir, "shards"), shard_count=16)
+    
+    cache_manager = CacheManager(temp_cache_dir)
+    assert cache_manager.backend.name == "sharded"
+    store = cache_manager.cache
+    assert len(store) == 100
+    assert not any(store.is_loaded(format(n, "x")) for n in range(16))
+    
+    assert cache_manager.get_model("42") == models["BIOMD0000000042"]
+    loaded = [format(n, "x") for n in range(16) if store.is_loaded(format(n, "x"))]
+    assert loaded == [shard_of("BIOMD0000000042", 16)]
+    
+    # Full scans stream without keeping the shards
+    assert len(cache_manager.search_models("model")) == 100
+    assert sum(store.is_loaded(format(n, "x")) for n in range(16)) == 1
+
+def test_sharded_writes_persist(temp_cache_dir, make_model):
+    cache_manager = CacheManager(temp_cache_dir, backend="sharded", shard_count=8, compact_threshold=2)
+    assert os.path.exists(os.path.join(temp_cache_dir, "shards", "manifest.json"))
+    assert not os.path.exists(os.path.join(temp_cache_dir, "biomodels_cache.json"))
+    
+    cache_manager.update_cache([make_model(1), make_model(2)])
+    cache_manager.save_model("BIOMD0000000003", make_model(3))
+    # Journaled but not yet compacted
+    assert CacheManager(temp_cache_dir).get_model("3") == make_model(3)
+    cache_manager.save_model("BIOMD0000000004", make_model(4))
+    assert cache_manager.journal.entries == 0
+    
+    reopened = CacheManager(temp_cache_dir)
+    assert len(reopened.cache) == 4
+    assert sorted(reopened.cache) == [f"BIOMD{n:010d}" for n in range(1, 5)]
+
+def test_sharded_save_merges_other_writers(temp_cache_dir, make_model):
+    first = CacheManager(temp_cache_dir, backend="sharded", shard_count=1)
+    first.update_cache([make_model(1)])
+    second = CacheManager(temp_cache_dir)
+    
+    second.get_model("1")
+    first.put_model("BIOMD0000000002", make_model(2))
+    first.compact()
+    second.put_model("BIOMD0000000003", make_model(3))
+    second.compact()
+    
+    assert sorted(CacheManager(temp_cache_dir).cache) == [
+        "BIOMD0000000001", "BIOMD0000000002", "BIOMD0000000003"]
+
+def test_sharded_import_and_export(temp_cache_dir, tmp_path, make_model):
+    cache_manager = CacheManager(temp_cache_dir, backend="sharded", shard_count=4)
+    cache_manager.update_cache([make_model(1), make_model(2)])
+    
+    import_file = str(tmp_path / "import.json")
+    with open(import_file, "w") as f:
+        json.dump({"BIOMD0000000009": make_model(9)}, f)
+    cache_manager.import_json(import_file)
+    assert list(cache_manager.cache) == ["BIOMD0000000009"]
+    assert list(CacheManager(temp_cache_dir).cache) == ["BIOMD0000000009"]
+    
+    export_file = str(tmp_path / "export.json")
+    cache_manager.export_json(export_file)
+    with open(export_file) as f:
+        assert json.load(f) == {"BIOMD0000000009": make_model(9)}
+
+def test_convert_round_trip(temp_cache_dir, tmp_path, write_single_file_cache):
+    models = write_single_file_cache(temp_cache_dir, 30)
+    cache_file = os.path.join(temp_cache_dir, "biomodels_cache.json")
+    shard_dir = str(tmp_path / "shards")
+    
+    store = shard_cache(cache_file, shard_dir, shard_count=8)
+    assert len(store) == 30
+    assert len(os.listdir(shard_dir)) <= 9
+    with pytest.raises(ValueError):
+        shard_cache(cache_file, shard_dir)
+    
+    output = str(tmp_path / "roundtrip.json")
+    assert unshard_cache(shard_dir, output) == 30
+    with open(output) as f:
+        assert list(json.load(f).items()) == list(models.items())
+
+def test_unknown_layout(temp_cache_dir):
+    with pytest.raises(ValueError):
+        CacheManager(temp_cache_dir, backend="parquet")
+
+def test_unsupported_manifest_version(temp_cache_dir):
+    with open(os.path.join(temp_cache_dir, "manifest.json"), "w") as f:
+        json.dump({"version": 99, "shard_count": 4, "counts": {}}, f)
+    with pytest.raises(ValueError):
+        ShardedStore(temp_cache_dir)
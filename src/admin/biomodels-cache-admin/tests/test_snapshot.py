@@ -0,0 +1,117 @@
+import pytest
+import os
+import json
+from biomodels_cache_admin.cache import CacheManager
+from biomodels_cache_admin.snapshot import HEADER, MmapSnapshot, SnapshotStore, write_snapshot
+
+REAL_CACHE_FILE = os.path.join(os.path.dirname(__file__), "..", "..", "..", "..",
+                               "cache", "biomodels_cache.json")
+
+def test_write_and_read_snapshot(tmp_path, make_model):
+    models = {m["id"]: m for m in (make_model(n) for n in (5, 1, 3))}
+    models["MODEL1006230000"] = make_model(9, name="Ünïcode")
+    path = str(tmp_path / "cache.snapshot")
+    assert write_snapshot(models.items(), path) == 4
+    
+    snapshot = MmapSnapshot(path)
+    assert len(snapshot) == 4
+    assert list(snapshot) == ["BIOMD0000000001", "BIOMD0000000003", "BIOMD0000000005", "MODEL1006230000"]
+    assert snapshot["BIOMD0000000003"] == models["BIOMD0000000003"]
+    assert snapshot["MODEL1006230000"]["name"] == "Ünïcode"
+    assert "BIOMD0000000002" not in snapshot
+    assert "BIOMD0000000000" not in snapshot and "ZZZ" not in snapshot
+    with pytest.raises(KeyError):
+        snapshot["BIOMD0000000004"]
+    assert dict(snapshot.items()) == models
+    snapshot.close()
+
+def test_empty_snapshot(tmp_path):
+    path = str(tmp_path / "empty.snapshot")
+    write_snapshot([], path)
+    assert os.path.getsize(path) == HEADER.size
+    snapshot = MmapSnapshot(path)
+    assert len(snapshot) == 0
+    assert "BIOMD0000000001" not in snapshot
+    snapshot.close()
+
+def test_rejects_other_files(tmp_path, make_model):
+    path = str(tmp_path / "cache.json")
+    with open(path, "w") as f:
+        json.dump({"BIOMD0000000001": make_model(1)}, f)
+    with pytest.raises(ValueError):
+        MmapSnapshot(path)
+
+def test_store_overlay(tmp_path, make_model):
+    path = str(tmp_path / "cache.snapshot")
+    write_snapshot([(m["id"], m) for m in (make_model(1), make_model(2))], path)
+    store = SnapshotStore(path)
+    store["BIOMD0000000002"] = make_model(2, name="Changed")
+    store["BIOMD0000000003"] = make_model(3)
+    del store["BIOMD0000000001"]
+    
+    assert list(store) == ["BIOMD0000000002", "BIOMD0000000003"]
+    assert len(store) == 2
+    assert store["BIOMD0000000002"]["name"] == "Changed"
+    assert [model_id for model_id, _ in store.items()] == list(store)
+    
+    store.replace({"BIOMD0000000002": make_model(2), "BIOMD0000000007": make_model(7)})
+    assert list(store) == ["BIOMD0000000002", "BIOMD0000000007"]
+
+def test_snapshot_backend(temp_cache_dir, make_model):
+    json_cache = CacheManager(temp_cache_dir)
+    json_cache.update_cache([make_model(1, name="Cell cycle"), make_model(2)])
+    assert json_cache.export_snapshot() == 2
+    
+    cache_manager = CacheManager(temp_cache_dir, backend="snapshot", compact_threshold=2)
+    assert cache_manager.get_model("1")["name"] == "Cell cycle"
+    assert cache_manager.search_models("cell") == [json_cache.get_model("1")]
+    
+    cache_manager.save_model("BIOMD0000000003", make_model(3))
+    assert CacheManager(temp_cache_dir, backend="snapshot").get_model("3") == make_model(3)
+    cache_manager.save_model("BIOMD0000000004", make_model(4))
+    # Compaction rewrote the snapshot
+    assert cache_manager.journal.entries == 0
+    assert len(MmapSnapshot(cache_manager.snapshot_file)) == 4
+    # The JSON file is not touched by the snapshot backend
+    assert CacheManager(temp_cache_dir).get_model("3") is None
+
+def test_snapshot_backend_keeps_json_journal(temp_cache_dir, make_model):
+    json_cache = CacheManager(temp_cache_dir)
+    json_cache.update_cache([make_model(1)])
+    json_cache.export_snapshot()
+    json_cache.save_model("BIOMD0000000002", make_model(2))
+    
+    snapshot_cache = CacheManager(temp_cache_dir, backend="snapshot")
+    assert snapshot_cache.journal.path != json_cache.journal.path
+    assert snapshot_cache.get_model("2") is None
+    snapshot_cache.compact()
+    
+    json_cache.compact()
+    assert CacheManager(temp_cache_dir).get_model("2") == make_model(2)
+
+def test_snapshot_items_survive_compaction(temp_cache_dir, make_model):
+    json_cache = CacheManager(temp_cache_dir)
+    json_cache.update_cache([make_model(n) for n in range(1, 6)])
+    json_cache.export_snapshot()
+    cache_manager = CacheManager(temp_cache_dir, backend="snapshot")
+    cache_manager.save_model("BIOMD0000000006", make_model(6))
+    
+    items = cache_manager.cache.items()
+    assert next(items) == ("BIOMD0000000001", make_model(1))
+    # Rewriting the snapshot does not unmap the one being read
+    cache_manager.compact()
+    assert [model_id for model_id, _ in items] == [f"BIOMD{n:010d}" for n in range(2, 7)]
+    assert len(list(cache_manager.cache.values())) == 6
+
+def test_snapshot_of_real_cache(tmp_path):
+    if not os.path.exists(REAL_CACHE_FILE):
+        pytest.skip("real cache file not available")
+    with open(REAL_CACHE_FILE) as f:
+        models = json.load(f)
+    path = str(tmp_path / "real.snapshot")
+    write_snapshot(models.items(), path)
+    snapshot = MmapSnapshot(path)
+    assert len(snapshot) == len(models)
+    for model_id in list(models)[::97]:
+        assert snapshot[model_id] == models[model_id]
+    snapshot.close()
@@ -0,0 +1,130 @@
+import pytest
+import threading
+import time
+from biomodels_cache_admin.sync import RWLock, SingleFlight
+
+def test_rwlock_readers_share_writers_exclude():
+    lock = RWLock()
+    inside = []
+    both_in = threading.Barrier(2, timeout=5)
+    
+    def reader():
+        with lock.read():
+            inside.append(1)
+            both_in.wait()
+    
+    threads = [threading.Thread(target=reader) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(inside) == 2
+    
+    events = []
+    
+    def blocked_reader():
+        with lock.read():
+            events.append("read")
+    
+    with lock.write():
+        thread = threading.Thread(target=blocked_reader)
+        thread.start()
+        time.sleep(0.05)
+        events.append("write done")
+    thread.join(5)
+    assert events == ["write done", "read"]
+
+def test_rwlock_is_reentrant():
+    lock = RWLock()
+    with lock.write():
+        with lock.write():
+            with lock.read():
+                pass
+    with lock.read():
+        with lock.read():
+            with pytest.raises(RuntimeError):
+                with lock.write():
+                    pass
+    # The lock is free again
+    with lock.write():
+        pass
+
+def test_rwlock_waiting_writer_blocks_new_readers():
+    lock = RWLock()
+    order = []
+    reading = threading.Event()
+    
+    def writer():
+        with lock.write():
+            order.append("write")
+    
+    def late_reader():
+        with lock.read():
+            order.append("late read")
+    
+    with lock.read():
+        writer_thread = threading.Thread(target=writer)
+        writer_thread.start()
+        time.sleep(0.05)
+        reader_thread = threading.Thread(target=late_reader)
+        reader_thread.start()
+        time.sleep(0.05)
+        order.append("first read")
+    writer_thread.join(5)
+    reader_thread.join(5)
+    assert order == ["first read", "write", "late read"]
+
+def test_single_flight_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+    
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return "result"
+    
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("key", slow))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while not calls:
+        time.sleep(0.01)
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert calls == [1]
+    assert results == ["result"] * 5
+    assert flight.in_flight() == 0
+    # Later calls run again
+    assert flight.do("key", lambda: "again") == "again"
+
+def test_single_flight_shares_exceptions():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    
+    def failing():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("upstream down")
+    
+    errors = []
+    
+    def call():
+        try:
+            flight.do("key", failing)
+        except RuntimeError as e:
+            errors.append(str(e))
+    
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=call)
+    follower.start()
+    time.sleep(0.05)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+    assert errors == ["upstream down"] * 2
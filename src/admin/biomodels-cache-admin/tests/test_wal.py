@@ -0,0 +1,89 @@
+import os
+import json
+from biomodels_cache_admin.cache import CacheManager
+from biomodels_cache_admin.wal import CacheJournal
+
+def test_journal_append_and_replay(temp_cache_dir, make_model):
+    journal = CacheJournal(os.path.join(temp_cache_dir, "test.journal"))
+    journal.append("BIOMD0000000001", make_model(1))
+    journal.append("BIOMD0000000002", make_model(2))
+    assert journal.entries == 2
+    
+    replayed = list(CacheJournal(journal.path).replay())
+    assert replayed == [("BIOMD0000000001", make_model(1)), ("BIOMD0000000002", make_model(2))]
+    
+    journal.truncate()
+    assert not os.path.exists(journal.path)
+    assert list(journal.replay()) == []
+
+def test_journal_skips_torn_line(temp_cache_dir, make_model):
+    journal = CacheJournal(os.path.join(temp_cache_dir, "test.journal"))
+    journal.append("BIOMD0000000001", make_model(1))
+    with open(journal.path, "a") as f:
+        f.write('{"model_id": "BIOMD00000')
+    
+    assert [model_id for model_id, _ in journal.replay()] == ["BIOMD0000000001"]
+    assert journal.entries == 1
+
+def test_append_after_torn_line_survives(temp_cache_dir, make_model):
+    cache_manager = CacheManager(temp_cache_dir)
+    cache_manager.save_model("BIOMD0000000001", make_model(1))
+    with open(cache_manager.journal.path, "a") as f:
+        f.write('{"model_id": "BIOMD00000')
+    
+    cache_manager.save_model("BIOMD0000000002", make_model(2))
+    reloaded = CacheManager(temp_cache_dir)
+    assert list(reloaded.cache) == ["BIOMD0000000001", "BIOMD0000000002"]
+    assert reloaded.journal.entries == 2
+
+def test_append_after_torn_journal_without_complete_lines(temp_cache_dir, monkeypatch, make_model):
+    monkeypatch.setattr("biomodels_cache_admin.wal.TAIL_BLOCK_SIZE", 4)
+    journal = CacheJournal(os.path.join(temp_cache_dir, "test.journal"))
+    with open(journal.path, "w") as f:
+        f.write('{"model_id": "BIOMD00000')
+    journal.append("BIOMD0000000001", make_model(1))
+    assert [model_id for model_id, _ in journal.replay()] == ["BIOMD0000000001"]
+    with open(journal.path, "rb") as f:
+        assert f.read().count(b"\n") == 1
+
+def test_save_model_appends_without_rewriting_snapshot(temp_cache_dir, make_model):
+    cache_manager = CacheManager(temp_cache_dir)
+    cache_file = os.path.join(temp_cache_dir, "biomodels_cache.json")
+    mtime = os.stat(cache_file).st_mtime_ns
+    
+    cache_manager.save_model("BIOMD0000000001", make_model(1))
+    cache_manager.save_model("BIOMD0000000002", make_model(2))
+    
+    assert os.stat(cache_file).st_mtime_ns == mtime
+    with open(cache_file, "r") as f:
+        assert json.load(f) == {}
+    assert cache_manager.journal.entries == 2
+    
+    # A new manager replays the journal on load
+    reloaded = CacheManager(temp_cache_dir)
+    assert reloaded.get_model("2") == make_model(2)
+    assert len(reloaded.cache) == 2
+
+def test_journal_replay_overrides_snapshot(temp_cache_dir, make_model):
+    cache_manager = CacheManager(temp_cache_dir)
+    cache_manager.update_cache([make_model(1)])
+    cache_manager.save_model("BIOMD0000000001", dict(make_model(1), name="Updated"))
+    
+    reloaded = CacheManager(temp_cache_dir)
+    assert reloaded.get_model("1")["name"] == "Updated"
+
+def test_compaction_threshold(temp_cache_dir, make_model):
+    cache_manager = CacheManager(temp_cache_dir, compact_threshold=3)
+    for i in range(1, 4):
+        cache_manager.save_model(f"BIOMD{i:010d}", make_model(i))
+    
+    # The third write triggered compaction
+    assert cache_manager.journal.entries == 0
+    assert not os.path.exists(cache_manager.journal.path)
+    with open(cache_manager.cache_file, "r") as f:
+        assert len(json.load(f)) == 3
+    
+    cache_manager.save_model("BIOMD0000000004", make_model(4))
+    cache_manager.compact()
+    with open(cache_manager.cache_file, "r") as f:
+        assert len(json.load(f)) == 4